@@ -1,44 +1,26 @@
 import streamlit as st
-from paddleocr import PaddleOCR
-from PIL import Image
 from datetime import datetime
 import os
-import json
 import hashlib
-import requests
-
-# Hugging Face Zephyr 설정
-HF_TOKEN = ""
-API_URL = "https://api-inference.huggingface.co/models/HuggingFaceH4/zephyr-7b-beta"
-headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-
-def summarize_text_with_zephyr(text):
-    prompt = f"다음 글의 핵심을 요약해줘:\\n{text}"
-    payload = {"inputs": prompt, "parameters": {"max_new_tokens": 300, "temperature": 0.5}}
-    response = requests.post(API_URL, headers=headers, json=payload)
-    try:
-        result = response.json()
-        if isinstance(result, list) and "generated_text" in result[0]:
-            return result[0]["generated_text"]
-        else:
-            return f"요약 실패: 예상치 못한 응답 형식입니다.\\n{result}"
-    except Exception as e:
-        return f"요약 실패: {e}\\n\\n응답: {response.text}"
+from summarizer import stream_summary_with_zephyr, summary_failed
+from ocr_cache import cached_ocr
+from ocr_batch import extract_texts
+import incremental_ocr
+import ocr_engine
+import data_access
+import image_catalog
+import image_ingest
+import thumbnails
+import search_index
+import note_history
+import metrics
+
+# rerun 한 번을 하나의 트레이스로 기록
+metrics.begin_trace("app")
 
 def init_user_data():
     if not os.path.exists('users'):
         os.makedirs('users')
-    if not os.path.exists('users/user_data.json'):
-        with open('users/user_data.json', 'w', encoding='utf-8') as f:
-            json.dump({}, f)
-
-def load_users():
-    with open('users/user_data.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_users(users):
-    with open('users/user_data.json', 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=4)
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -46,28 +28,37 @@ def hash_password(password):
 def create_user_folder(username):
     user_folder = f'users/{username}'
     os.makedirs(f'{user_folder}/images', exist_ok=True)
-    if not os.path.exists(f'{user_folder}/notes.json'):
-        with open(f'{user_folder}/notes.json', 'w', encoding='utf-8') as f:
-            json.dump({}, f)
 
 def save_user_note(username, lecture, week, note):
-    path = f'users/{username}/notes.json'
-    if not os.path.exists(path):
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump({}, f)
-    with open(path, 'r', encoding='utf-8') as f:
-        notes = json.load(f)
-    notes.setdefault(lecture, {})[week] = note
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(notes, f, ensure_ascii=False, indent=4)
+    data_access.save_note(lecture, week, note, username=username)
 
 def load_user_notes(username):
-    with open(f'users/{username}/notes.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return data_access.load_notes(username)
 
 # 초기화
 init_user_data()
-ocr = PaddleOCR(lang='korean', use_angle_cls=True)
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+# OCR 엔진은 처음 쓸 때 한 번만 만들고 모든 세션이 공유
+def load_ocr():
+    return ocr_engine.get_ocr(OCR_SETTINGS)
+
+# 서버 시작 시 백그라운드에서 모델을 미리 올려둠 (첫 요청이 모델 로드를 기다리지 않도록)
+# set_page_config 보다 먼저 실행되므로 스피너를 표시하지 않음
+@st.cache_resource(show_spinner=False)
+def prewarm_ocr():
+    return ocr_engine.prewarm(OCR_SETTINGS)
+
+if ocr_engine.PREWARM:
+    prewarm_ocr()
+
+# Prometheus 형식 지표 제공 (METRICS_PORT 를 정한 경우, 서버 프로세스당 한 번)
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    return metrics.serve()
+
+if metrics.PORT:
+    start_metrics_server()
 
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -83,24 +74,23 @@ if 'ocr_text' not in st.session_state:
 st.set_page_config(page_title="판서OCR서비스", layout="wide")
 
 def handle_login():
-    users = load_users()
     u, p = st.session_state.login_username, st.session_state.login_password
-    if u in users and users[u]["password"] == hash_password(p):
+    # 전체 사용자를 읽지 않고 아이디 하나만 조회 (캐시됨)
+    user = data_access.get_user(u)
+    if user is not None and user["password"] == hash_password(p):
         st.session_state.logged_in = True
         st.session_state.username = u
     else:
         st.error("아이디 또는 비밀번호가 일치하지 않습니다.")
 
 def handle_signup():
-    users = load_users()
     u, p, c = st.session_state.signup_username, st.session_state.signup_password, st.session_state.signup_password_confirm
-    if u in users:
-        st.error("이미 존재하는 아이디입니다.")
-    elif p != c:
+    if p != c:
         st.error("비밀번호가 일치하지 않습니다.")
+    # 아이디 확인과 추가를 한 번에 해서 동시에 같은 아이디로 가입해도 한 명만 성공
+    elif not data_access.create_user(u, {"password": hash_password(p), "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}):
+        st.error("이미 존재하는 아이디입니다.")
     else:
-        users[u] = {"password": hash_password(p), "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-        save_users(users)
         create_user_folder(u)
         st.success("회원가입이 완료되었습니다. 로그인해주세요.")
 
@@ -133,6 +123,19 @@ else:
     if col2.button('강의 목록', use_container_width=True):
         st.session_state.menu_selection = '강의 목록'
 
+    # 내 필기/요약/OCR 텍스트 검색
+    search_query = st.sidebar.text_input('필기 검색:', key='search_query', placeholder='검색어 입력')
+    if search_query.strip():
+        st.header(f"'{search_query}' 검색 결과")
+        results = search_index.search(search_query, username=st.session_state.username)
+        if not results:
+            st.info(f"'{search_query}'와(과) 일치하는 내용이 없습니다.")
+        for result in results:
+            label = search_index.KIND_LABELS.get(result["kind"], result["kind"])
+            st.markdown(f"**{result['lecture']} {result['week']}** · {label}")
+            st.markdown(result["snippet"])
+        st.divider()
+
     if st.session_state.menu_selection == '이미지 업로드':
         st.title('환영합니다! 👋')
         st.markdown('## 강의 사진을 업로드하세요.')
@@ -147,28 +150,42 @@ else:
         img_file = st.file_uploader('', type=['png', 'jpg', 'jpeg'])
 
         if img_file is not None:
-            filename = f"{upload_lecture}_{upload_week}_{datetime.now().isoformat().replace(':', '_')}.jpg"
-            user_image_path = f'users/{st.session_state.username}/images'
-            os.makedirs(user_image_path, exist_ok=True)
-            full_path = os.path.join(user_image_path, filename)
-
-            with open(full_path, 'wb') as f:
-                f.write(img_file.getbuffer())
+            # 조각 단위로 해시하며 저장하고 한 번만 디코딩 (내용 해시로 한 번만 저장하므로 rerun이 반복되어도 다시 쓰지 않음)
+            full_path = image_ingest.ingest_upload(img_file, upload_lecture, upload_week,
+                                                   username=st.session_state.username)
             st.success(f'파일 업로드 성공! {upload_lecture} {upload_week}에 이미지가 저장되었습니다.')
-            st.image(Image.open(full_path))
+            st.image(thumbnails.get_thumbnail(full_path))
 
             if st.button("OCR 실행"):
                 with st.spinner("OCR 수행 중..."):
-                    result = ocr.ocr(full_path)
-                    extracted_texts = [line[1][0] for line in result[0]]
-                    st.session_state.ocr_text = "\\n".join(extracted_texts)
+                    # 같은 칠판을 전에 찍은 사진이 있으면 바뀐 부분만 OCR
+                    earlier = [image["path"] for image in image_catalog.latest_images(
+                        upload_lecture, upload_week, limit=20, username=st.session_state.username)]
+                    previous = incremental_ocr.find_previous(full_path, earlier) if incremental_ocr.INCREMENTAL else None
+                    if previous:
+                        result = incremental_ocr.incremental_ocr(load_ocr(), full_path, previous, OCR_SETTINGS)
+                    else:
+                        # 업로드 때 디코딩해 둔 배열을 전처리해서 OCR
+                        result = cached_ocr(load_ocr(), full_path, OCR_SETTINGS)
+                    # 빈 칠판/빈 페이지면 result[0] 이 None
+                    extracted_texts = extract_texts(result)
+                    st.session_state.ocr_text = "\n".join(extracted_texts)
+                    search_index.index_ocr(upload_lecture, upload_week, full_path, "\n".join(extracted_texts),
+                                           username=st.session_state.username)
 
         note = st.text_area("필기 내용 입력 (OCR 결과 또는 직접 입력):", value=st.session_state.get("ocr_text", ""), height=200)
 
         if note.strip():
             if st.button("요약하기"):
-                with st.spinner("Zephyr 모델로 요약 중..."):
-                    st.session_state.summary_text = summarize_text_with_zephyr(note)
+                # 생성되는 요약을 바로 보여주고, 끝나면 아래 요약 결과 칸으로 옮김
+                stream_area = st.empty()
+                with stream_area.container():
+                    st.session_state.summary_text = st.write_stream(stream_summary_with_zephyr(note))
+                stream_area.empty()
+                # 요약도 검색되도록 색인 (실패한 요약은 빼고)
+                if not summary_failed(st.session_state.summary_text):
+                    search_index.index_summary(upload_lecture, upload_week, 'note', st.session_state.summary_text,
+                                               username=st.session_state.username)
 
         if st.session_state.get("summary_text"):
             st.subheader("요약 내용")
@@ -195,12 +212,12 @@ else:
 
         selected_week = st.sidebar.selectbox('주차를 선택하세요:', lecture_weeks[lecture_option])
         st.header(f'{lecture_option} - {selected_week}')
-        user_image_path = f'users/{st.session_state.username}/images'
-        if os.path.exists(user_image_path):
-            image_files = [f for f in os.listdir(user_image_path) if f.startswith(f"{lecture_option}_{selected_week}")]
-            if image_files:
-                latest_image = sorted(image_files)[-1]
-                st.image(Image.open(os.path.join(user_image_path, latest_image)), caption=f"최근 이미지: {latest_image}")
+        latest = image_catalog.latest_images(lecture_option, selected_week, limit=1, username=st.session_state.username)
+        if latest:
+            latest_image = latest[0]["path"]
+            st.image(thumbnails.get_thumbnail(latest_image), caption=f"최근 이미지: {image_catalog.image_label(latest[0])}")
+            if st.checkbox("원본 크기로 보기", key='latest_image_full'):
+                st.image(latest_image)
         try:
             user_notes = load_user_notes(st.session_state.username)
             if lecture_option in user_notes and selected_week in user_notes[lecture_option]:
@@ -210,7 +227,26 @@ else:
                 if st.button("필기 수정 저장"):
                     save_user_note(st.session_state.username, lecture_option, selected_week, new_note)
                     st.success("필기가 수정되었습니다!")
+
+                # 수정 기록 (이전 버전과 비교, 되돌리기)
+                history = note_history.versions(lecture_option, selected_week, username=st.session_state.username)
+                if len(history) > 1:
+                    with st.expander(f"수정 기록 ({len(history)}개 버전)"):
+                        labels = {v["version"]: f"버전 {v['version']} ({datetime.fromtimestamp(v['created_at']).strftime('%m-%d %H:%M')})"
+                                  for v in history}
+                        old_version = st.selectbox("비교할 이전 버전:", list(labels)[1:], format_func=labels.get)
+                        st.code("\n".join(note_history.diff(lecture_option, selected_week, old_version,
+                                                             username=st.session_state.username)) or "차이가 없습니다.",
+                                language='diff')
+                        if st.button("이 버전으로 되돌리기"):
+                            save_user_note(st.session_state.username, lecture_option, selected_week,
+                                           note_history.get_text(lecture_option, selected_week, old_version,
+                                                                 username=st.session_state.username))
+                            st.success(f"{labels[old_version]}으로 되돌렸습니다.")
+                            st.rerun()
             else:
                 st.info("이 강의/주차에 저장된 필기가 없습니다.")
         except:
-            st.info("이 강의/주차에 저장된 필기가 없습니다.")
\ No newline at end of file
+            st.info("이 강의/주차에 저장된 필기가 없습니다.")
+
+metrics.end_trace()
@@ -1,17 +1,32 @@
 import streamlit as st
-import pandas as pd
-from PIL import Image
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
-import json
-import torch
-from paddleocr import PaddleOCR
-import openai
 from dotenv import load_dotenv
-import os
 
+# 아래 모듈들은 불러올 때 환경 변수(MODEL_*, OCR_*, OPENAI_MODEL 등)를 읽으므로 .env 를 먼저 읽음
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+from ocr_cache import cached_ocr
+from ocr_batch import iter_ocr_batch, extract_texts, warm_pool, BATCH_WORKERS
+import ocr_engine
+from incremental_ocr import merge_transcript
+from data_access import (
+    load_notes, save_note,
+    create_course_with_schedule, update_week_info, remove_course,
+    course_names, course_schedule, shift_course_dates, mark_weeks, resize_course, import_courses,
+)
+import schedule
+import ocr_jobs
+from summarizer import stream_summary, summary_failed
+import image_catalog
+import image_ingest
+import thumbnails
+import search_index
+import note_history
+import metrics
+
+# rerun 한 번을 하나의 트레이스로 기록 (구간별 시간은 '성능 지표' 메뉴에서 확인)
+metrics.begin_trace("app_ver_2", profile=st.session_state.get('profile_reruns'))
 
 # 페이지 설정
 st.set_page_config(
@@ -21,157 +36,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 텍스트 요약 함수
-def summarize_text(text, lecture=None):
+# OCR 설정 (OCR 결과 캐시 키에도 포함됨)
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+# OCR 엔진은 처음 쓸 때 만들고 프로세스의 모든 세션이 공유 (GPU가 있으면 사용)
+def load_ocr():
+    return ocr_engine.get_ocr(OCR_SETTINGS)
 
-    if lecture:
-        prompt = f"""이 글은 '{lecture}' 강의의 내용이야 강의 내용을 요약하고 즁요한 부분이나 핵심부분 설명해주는데 줄바꿈이나 오타는 너가 정리해서 부탁할게:\n\n{text}. """
+# 서버 시작 시 백그라운드에서 모델을 미리 올려둠 (첫 요청이 모델 로드를 기다리지 않도록)
+@st.cache_resource
+def prewarm_ocr():
+    threads = [ocr_engine.prewarm(OCR_SETTINGS)]
+    if BATCH_WORKERS > 0:
+        threads.append(warm_pool(OCR_SETTINGS))
+    return threads
 
-    else:
-        prompt = f"""다음 글을 핵심 내용만 요약해주는데 줄바꿈이나 오타는 너가 정리해서 부탁할게:\n\n{text}"""
-
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # gpt-3.5-turbo 또는 gpt-4 선택 가능
-            messages=[
-                {"role": "system", "content": "너는 전문적인 학습 도우미야."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=300
-        )
+# 업로드 OCR 을 작업 워커가 맡으면 이 프로세스의 엔진은 강의 목록에서 OCR 할 때 처음 올림 (메모리 절약)
+if ocr_engine.PREWARM and ocr_jobs.JOB_WORKERS == 0:
+    prewarm_ocr()
 
-        summary = response["choices"][0]["message"]["content"].strip()
-        return summary
+# OCR 작업 워커 시작 (서버 프로세스당 한 번, 모든 세션이 공유)
+@st.cache_resource
+def start_ocr_workers():
+    return ocr_jobs.start_workers(OCR_SETTINGS)
 
-    except Exception as e:
-        return f"[요약 실패: {str(e)}]"
+if ocr_jobs.JOB_WORKERS > 0:
+    start_ocr_workers()
 
-# OCR 초기화 (GPU 사용 가능)
+# Prometheus 형식 지표 제공 (METRICS_PORT 를 정한 경우, 서버 프로세스당 한 번)
 @st.cache_resource
-def load_ocr():
-    return PaddleOCR(lang='korean', use_angle_cls=True, use_gpu=torch.cuda.is_available())
-
-ocr = load_ocr()
-
-
-# 데이터 관리 함수
-@st.cache_data(show_spinner=False)
-def load_courses():
-    if not os.path.exists('courses/courses.json'):
-        return {}
-    with open('courses/courses.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_courses(courses):
-    with open('courses/courses.json', 'w', encoding='utf-8') as f:
-        json.dump(courses, f, ensure_ascii=False, indent=4)
-
-@st.cache_data(show_spinner=False)
-def load_notes():
-    if os.path.exists('notes.json'):
-        with open('notes.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def save_note(lecture, week, note):
-    notes = load_notes()
-    if lecture not in notes:
-        notes[lecture] = {}
-    notes[lecture][week] = note
-    with open('notes.json', 'w', encoding='utf-8') as f:
-        json.dump(notes, f, ensure_ascii=False, indent=4)
-def create_course_with_schedule(course_name, start_date_str):
-    """15주차 강의를 만들고 날짜 정보를 포함합니다."""
-    courses = load_courses()
-    
-    if course_name in courses:
-        return False
-    
-    try:
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-        course_schedule = {}
-        
-        # 15주차 생성
-        for i in range(1, 16):
-            week_date = start_date + timedelta(days=(i-1)*7)
-            week_name = f"{i}주차"
-            week_date_str = week_date.strftime("%Y-%m-%d")
-            course_schedule[week_name] = {
-                "date": week_date_str,
-                "display_name": f"{i}주차({week_date.strftime('%m월 %d일')})",
-                "type": "regular"  # regular, midterm, final, holiday
-            }
-        
-        courses[course_name] = course_schedule
-        save_courses(courses)
-        return True
-    except Exception as e:
-        print(f"Error creating course: {e}")
-        return False
-
-def update_week_info(course_name, week_name, date_str=None, week_type=None):
-    """주차 정보를 업데이트합니다."""
-    courses = load_courses()
-    
-    if course_name not in courses or week_name not in courses[course_name]:
-        return False
-    
-    try:
-        if date_str:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            courses[course_name][week_name]["date"] = date_str
-            courses[course_name][week_name]["display_name"] = f"{week_name}({date_obj.strftime('%m월 %d일')})"
-        
-        if week_type:
-            courses[course_name][week_name]["type"] = week_type
-            
-            # 특별 주차 표시 업데이트
-            if week_type != "regular":
-                type_display = {
-                    "midterm": "중간고사",
-                    "final": "기말고사",
-                    "holiday": "휴강"
-                }
-                display_name = courses[course_name][week_name]["display_name"]
-                week_num = week_name.split("주차")[0]
-                date_part = display_name.split("(")[1].split(")")[0]
-                
-                courses[course_name][week_name]["display_name"] = f"{week_num}주차({date_part}) - {type_display.get(week_type, '')}"
-        
-        save_courses(courses)
-        return True
-    except Exception as e:
-        print(f"Error updating week: {e}")
-        return False
-
-def remove_course(course_name):
-    courses = load_courses()
-    if course_name in courses:
-        del courses[course_name]
-        save_courses(courses)
-        return True
-    return False
-
-def save_note(lecture, week, note):
-    if os.path.exists('notes.json'):
-        with open('notes.json', 'r', encoding='utf-8') as f:
-            notes = json.load(f)
-    else:
-        notes = {}
-    
-    if lecture not in notes:
-        notes[lecture] = {}
-    notes[lecture][week] = note
-    
-    with open('notes.json', 'w', encoding='utf-8') as f:
-        json.dump(notes, f, ensure_ascii=False, indent=4)
+def start_metrics_server():
+    return metrics.serve()
 
-def load_notes():
-    if os.path.exists('notes.json'):
-        with open('notes.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+if metrics.PORT:
+    start_metrics_server()
 
 # 세션 상태 기본값 초기화
 if 'menu_selection' not in st.session_state:
@@ -185,6 +83,99 @@ if 'ocr_text' not in st.session_state:
 if 'summary_text' not in st.session_state:
     st.session_state.summary_text = ""
 
+# OCR 작업 상태 표시 (이 부분만 주기적으로 다시 실행되며 진행 상황을 확인)
+@st.fragment(run_every=1.0)
+def show_ocr_job_status(lecture, week):
+    job_id = st.session_state.get('ocr_job_id')
+    job = ocr_jobs.get_job(job_id) if job_id else None
+    if job is None or job["lecture"] != lecture or job["week"] != week:
+        job = ocr_jobs.latest_job(lecture, week)
+    if job is None:
+        return
+
+    total = len(job["images"])
+    status_labels = {"queued": "대기 중", "running": "처리 중", "done": "완료", "failed": "실패"}
+    if job["status"] in ('queued', 'running'):
+        st.progress(job["done_count"] / total if total else 0.0, text=f"OCR 작업 #{job['id']} 진행 중... ({job['done_count']}/{total})")
+        with st.expander("이미지별 진행 상황"):
+            for image in job["images"]:
+                st.write(f"{os.path.basename(image['path'])}: {status_labels.get(image['status'], image['status'])}")
+        return
+
+    if job["status"] == 'done':
+        st.success(f"OCR 작업 #{job['id']}이 완료되어 필기에 저장되었습니다.")
+    else:
+        st.error(f"OCR 작업 #{job['id']}이 실패했습니다: {job['error']}")
+
+    # 이 세션에서 시작한 작업이면 결과를 입력창에 한 번만 반영
+    if job["id"] == job_id and st.session_state.get('ocr_job_applied') != job_id:
+        st.session_state.ocr_job_applied = job_id
+        st.session_state.ocr_text = job["text"] or ""
+        st.rerun()
+
+# 필기/요약/OCR 텍스트 검색 결과 표시
+def show_search_results(query):
+    filter_col1, filter_col2 = st.columns(2)
+    lecture = filter_col1.selectbox('강의:', ('전체',) + course_names(), key='search_lecture')
+    week = None
+    view = course_schedule(lecture) if lecture != '전체' else None
+    if view is not None and view.weeks:
+        week = filter_col2.selectbox('주차:', ('전체',) + view.names,
+                                     format_func=lambda w: view.by_name[w].display_name if w in view.by_name else w,
+                                     key='search_week')
+    results = search_index.search(query, lecture=None if lecture == '전체' else lecture,
+                                  week=None if week in (None, '전체') else week)
+    if not results:
+        st.info(f"'{query}'와(과) 일치하는 내용이 없습니다.")
+        return
+    st.caption(f"{len(results)}건")
+    for result in results:
+        label = search_index.KIND_LABELS.get(result["kind"], result["kind"])
+        st.markdown(f"**{result['lecture']} {result['week']}** · {label}")
+        st.markdown(result["snippet"])
+
+# 성능 지표 (구간별 소요 시간, 카운터, 최근 요청 트레이스, 프로파일)
+def show_metrics_page():
+    st.header('성능 지표')
+    st.toggle("느린 rerun 프로파일 (cProfile)", key='profile_reruns',
+              help=f"{metrics.PROFILE_SLOW}초보다 오래 걸린 rerun 의 프로파일을 {metrics.PROFILE_DIR} 에 저장합니다.")
+
+    st.subheader("구간별 소요 시간 (최근 %d회 기준)" % metrics.WINDOW)
+    st.dataframe([
+        {"구간": stat["name"], "라벨": ", ".join(f"{k}={v}" for k, v in stat["labels"].items()),
+         "횟수": stat["count"], "p50(ms)": stat["p50"] * 1000, "p95(ms)": stat["p95"] * 1000,
+         "p99(ms)": stat["p99"] * 1000}
+        for stat in metrics.timing_stats()
+    ], use_container_width=True)
+
+    counters = metrics.counter_stats()
+    if counters:
+        st.subheader("카운터")
+        st.dataframe([
+            {"이름": stat["name"], "라벨": ", ".join(f"{k}={v}" for k, v in stat["labels"].items()), "값": stat["value"]}
+            for stat in counters
+        ], use_container_width=True)
+
+    with st.expander("모듈별 누적 통계"):
+        st.json(metrics.external_stats())
+
+    st.subheader("최근 요청")
+    for trace in metrics.recent_traces()[:10]:
+        started = datetime.fromtimestamp(trace["started_at"]).strftime('%H:%M:%S')
+        with st.expander(f"{started} {trace['name']} {trace['seconds'] * 1000:.0f}ms ({trace['status']})"):
+            st.text("\n".join(
+                f"{'  ' * span['depth']}{span['name']} {span.get('seconds', 0) * 1000:.1f}ms (+{span['start'] * 1000:.0f}ms)"
+                for span in trace["spans"]
+            ) or "기록된 구간이 없습니다.")
+            if trace.get("profile"):
+                st.caption(f"프로파일: {trace['profile']}")
+
+    for profile in metrics.recent_profiles():
+        with st.expander(f"프로파일 {os.path.basename(profile['path'])} ({profile['seconds']:.1f}s)"):
+            st.code(profile["top"])
+
+    st.download_button("Prometheus 형식으로 내려받기", metrics.prometheus_text(), file_name="metrics.prom")
+
 st.title("판서OCR서비스")
 
 # 사이드바 구성
@@ -204,6 +195,16 @@ with col3:
     if st.button('강의/주차 관리', use_container_width=True, key='btn_manage'):
         st.session_state.show_course_manager = True
         st.session_state.menu_selection = '강의/주차 관리'
+if metrics.ADMIN_PAGE and st.sidebar.button('성능 지표', use_container_width=True, key='btn_metrics'):
+    st.session_state.menu_selection = '성능 지표'
+    st.session_state.show_course_manager = False
+
+# 전체 필기 검색 (검색어가 있으면 선택한 메뉴 위에 결과를 표시)
+search_query = st.sidebar.text_input('필기 검색:', key='search_query', placeholder='검색어 입력')
+if search_query.strip():
+    st.header(f"'{search_query}' 검색 결과")
+    show_search_results(search_query)
+    st.divider()
 
 # 강의/주차 관리 기능
 if st.session_state.show_course_manager:
@@ -217,20 +218,31 @@ if st.session_state.show_course_manager:
         with st.form("add_course_form"):
             new_course = st.text_input("추가할 강의명:")
             start_date = st.date_input("첫 수업 날짜:", datetime.now())
+            term_weeks = st.number_input("주차 수:", min_value=1, max_value=52, value=schedule.TERM_WEEKS)
             submit_course = st.form_submit_button("강의 추가")
             
             if submit_course and new_course:
                 start_date_str = start_date.strftime("%Y-%m-%d")
-                if create_course_with_schedule(new_course, start_date_str):
-                    st.success(f"'{new_course}' 강의가 15주차로 추가되었습니다.")
+                if create_course_with_schedule(new_course, start_date_str, int(term_weeks)):
+                    st.success(f"'{new_course}' 강의가 {int(term_weeks)}주차로 추가되었습니다.")
                     st.rerun()
                 else:
                     st.error(f"'{new_course}' 강의가 이미 존재하거나 추가할 수 없습니다.")
         
+        st.subheader("여러 강의 한 번에 추가")
+        st.caption("CSV 열: 강의명, 첫 수업 날짜(YYYY-MM-DD), 주차 수(비우면 %d)" % schedule.TERM_WEEKS)
+        course_csv = st.file_uploader("강의 목록 CSV", type=['csv'], key='import_courses_csv')
+        if course_csv is not None and st.button("CSV로 강의 추가", key='import_courses_btn'):
+            try:
+                added = import_courses(schedule.parse_csv(course_csv.getvalue().decode('utf-8-sig').splitlines()))
+                st.success(f"{len(added)}개 강의를 추가했습니다. (이미 있는 강의는 건너뜀)")
+            except (ValueError, UnicodeDecodeError) as e:
+                st.error(f"CSV를 읽을 수 없습니다: {e}")
+
         st.subheader("강의 삭제")
-        courses = load_courses()
-        if courses:
-            course_to_delete = st.selectbox("삭제할 강의 선택:", list(courses.keys()), key='delete_course_select')
+        names = course_names()
+        if names:
+            course_to_delete = st.selectbox("삭제할 강의 선택:", names, key='delete_course_select')
             if st.button("강의 삭제", key='delete_course_btn'):
                 if remove_course(course_to_delete):
                     st.success(f"'{course_to_delete}' 강의가 삭제되었습니다.")
@@ -242,63 +254,80 @@ if st.session_state.show_course_manager:
     
     with tab2:
         st.subheader("주차 관리")
-        courses = load_courses()
+        names = course_names()
         
-        if courses:
-            selected_course = st.selectbox("강의 선택:", list(courses.keys()), key='week_manage_course')
+        if names:
+            selected_course = st.selectbox("강의 선택:", names, key='week_manage_course')
+            view = course_schedule(selected_course)
             
-            if selected_course and selected_course in courses:
-                weeks = list(courses[selected_course].keys())
-                
-                if weeks:
+            if view is not None:
+                if view.weeks:
                     st.write(f"**{selected_course}의 주차 목록:**")
                     
                     # 주차 정보 테이블로 표시
-                    week_data = []
-                    for week in sorted(weeks, key=lambda x: int(x.split('주차')[0])):
-                        week_info = courses[selected_course][week]
-                        week_data.append({
-                            "주차": week,
-                            "날짜": week_info["date"],
-                            "표시명": week_info["display_name"],
-                            "유형": week_info["type"]
-                        })
-                    
-                    df = pd.DataFrame(week_data)
-                    st.dataframe(df)
+                    st.dataframe([
+                        {"주차": week.name, "날짜": week.date.strftime(schedule.DATE_FORMAT),
+                         "표시명": week.display_name, "유형": week.type}
+                        for week in view.weeks
+                    ])
                     
                     # 주차 정보 수정
                     st.subheader("주차 정보 수정")
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        edit_week = st.selectbox("수정할 주차:", weeks, key='edit_week_select')
+                        edit_week = st.selectbox("수정할 주차:", view.names, key='edit_week_select')
                     
                     with col2:
-                        week_types = {
-                            "regular": "일반 수업", 
-                            "midterm": "중간고사", 
-                            "final": "기말고사", 
-                            "holiday": "휴강"
-                        }
                         edit_type = st.selectbox(
                             "주차 유형:", 
-                            list(week_types.keys()),
-                            format_func=lambda x: week_types[x],
-                            index=list(week_types.keys()).index(courses[selected_course][edit_week]["type"]),
+                            list(schedule.WEEK_TYPES),
+                            format_func=lambda x: schedule.WEEK_TYPES[x],
+                            index=list(schedule.WEEK_TYPES).index(view.by_name[edit_week].type),
                             key='edit_week_type'
                         )
                     
-                    # 날짜 형식 변환
-                    current_date = datetime.strptime(courses[selected_course][edit_week]["date"], "%Y-%m-%d").date()
-                    edit_date = st.date_input("날짜 수정:", current_date, key='edit_week_date')
+                    edit_date = st.date_input("날짜 수정:", view.by_name[edit_week].date, key='edit_week_date')
                     
                     if st.button("주차 정보 수정", key='update_week_btn'):
-                        if update_week_info(selected_course, edit_week, edit_date.strftime("%Y-%m-%d"), edit_type):
+                        if update_week_info(selected_course, edit_week, edit_date.strftime(schedule.DATE_FORMAT), edit_type):
                             st.success(f"'{edit_week}' 정보가 수정되었습니다.")
                             st.rerun()
                         else:
                             st.error("주차 정보 수정에 실패했습니다.")
+                    
+                    # 여러 주차 한 번에 바꾸기
+                    st.subheader("일정 일괄 변경")
+                    numbers = [week.number for week in view.weeks]
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        shift_from = st.selectbox("이 주차부터:", numbers, format_func=lambda n: f"{n}주차", key='shift_from')
+                        shift_days = st.number_input("날짜를 며칠 옮길까요? (앞당기려면 음수)", value=7, step=1, key='shift_days')
+                        if st.button("날짜 옮기기", key='shift_btn'):
+                            if shift_course_dates(selected_course, int(shift_days), shift_from):
+                                st.success(f"{shift_from}주차부터 날짜를 {int(shift_days)}일 옮겼습니다.")
+                                st.rerun()
+                            else:
+                                st.error("날짜를 옮기지 못했습니다.")
+                    with col2:
+                        mark_range = st.select_slider("주차 범위:", numbers, value=(numbers[0], numbers[-1]),
+                                                      format_func=lambda n: f"{n}주차", key='mark_range')
+                        mark_type = st.selectbox("유형:", list(schedule.WEEK_TYPES),
+                                                 format_func=lambda x: schedule.WEEK_TYPES[x], key='mark_type')
+                        if st.button("유형 지정", key='mark_btn'):
+                            if mark_weeks(selected_course, mark_range[0], mark_range[1], mark_type):
+                                st.success(f"{mark_range[0]}~{mark_range[1]}주차를 '{schedule.WEEK_TYPES[mark_type]}'(으)로 바꿨습니다.")
+                                st.rerun()
+                            else:
+                                st.error("주차 유형을 바꾸지 못했습니다.")
+                    
+                    term_weeks = st.number_input("주차 수 변경:", min_value=1, max_value=52, value=len(view.weeks), key='resize_weeks')
+                    if term_weeks != len(view.weeks) and st.button("주차 수 적용", key='resize_btn'):
+                        if resize_course(selected_course, int(term_weeks)):
+                            st.success(f"{selected_course}을(를) {int(term_weeks)}주차로 바꿨습니다.")
+                            st.rerun()
+                        else:
+                            st.error("주차 수를 바꾸지 못했습니다.")
                 else:
                     st.info(f"{selected_course}에 등록된 주차가 없습니다.")
         else:
@@ -309,33 +338,30 @@ elif st.session_state.menu_selection == '이미지 업로드':
     # 제목과 소개
     st.header('강의 사진을 업로드하세요.')
     
-    # 강의와 주차 선택 (업로드 시)
-    courses = load_courses()
+    # 강의와 주차 선택 (업로드 시, 선택 목록은 강의 데이터가 바뀔 때만 새로 만듦)
+    names = course_names()
     
-    if not courses:
+    if not names:
         st.warning("등록된 강의가 없습니다. '강의/주차 관리' 메뉴에서 강의를 추가해주세요.")
     else:
         upload_lecture = st.selectbox(
             '강의 선택:',
-            list(courses.keys()),
+            names,
             key='upload_lecture_select'
         )
+        view = course_schedule(upload_lecture)
         
-        if not courses[upload_lecture]:
+        if not view.weeks:
             st.warning(f"'{upload_lecture}'에 등록된 주차가 없습니다.")
         else:
-            # 주차 목록 생성 (display_name 표시)
-            weeks = courses[upload_lecture]
-            week_options = [weeks[w]["display_name"] for w in sorted(weeks.keys(), key=lambda x: int(x.split('주차')[0]))]
-            week_map = {weeks[w]["display_name"]: w for w in weeks.keys()}
-            
+            # 주차 목록 (display_name 표시)
             upload_week_display = st.selectbox(
                 '주차 선택:',
-                week_options,
+                view.options,
                 key='upload_week_select'
             )
             
-            upload_week = week_map[upload_week_display]
+            upload_week = view.by_display[upload_week_display]
             
             # 여러 이미지 업로드 기능으로 변경
             img_files = st.file_uploader('여러 이미지를 선택하세요', type=['png', 'jpg', 'jpeg'], accept_multiple_files=True, key='image_uploader')
@@ -343,20 +369,10 @@ elif st.session_state.menu_selection == '이미지 업로드':
             if img_files:
                 uploaded_image_paths = []
                 
-                user_image_path = 'images'
-                if not os.path.exists(user_image_path):
-                    os.makedirs(user_image_path)
-                
-                # 업로드된 각 이미지 처리
+                # 업로드된 각 이미지 처리: 조각 단위로 해시하며 저장하고 한 번만 디코딩
+                # (내용 해시로 한 번만 저장하므로 rerun이 반복되어도 다시 쓰지 않음)
                 for img_file in img_files:
-                    # 이미지명이 고유하도록 시간을 활용하여 변경
-                    current_time = datetime.now()
-                    filename = f"{upload_lecture}_{upload_week}_{current_time.isoformat().replace(':', '_')}_{img_file.name}"
-                    
-                    # 폴더에 저장
-                    with open(os.path.join(user_image_path, filename), 'wb') as f:
-                        f.write(img_file.getbuffer())
-                    uploaded_image_paths.append(os.path.join(user_image_path, filename))
+                    uploaded_image_paths.append(image_ingest.ingest_upload(img_file, upload_lecture, upload_week))
                 
                 st.success(f'{len(img_files)}개의 파일이 업로드 되었습니다! {upload_lecture} {upload_week_display}에 이미지가 저장되었습니다.')
                 
@@ -366,20 +382,36 @@ elif st.session_state.menu_selection == '이미지 업로드':
                 
                 for i, img_path in enumerate(uploaded_image_paths):
                     with cols[i % 3]:
-                        img = Image.open(img_path)
-                        st.image(img, caption=os.path.basename(img_path), use_container_width=True)
+                        # 원본 대신 업로드 때 만든 썸네일을 표시
+                        st.image(thumbnails.get_thumbnail(img_path, 'small'), caption=img_files[i].name, use_container_width=True)
                 
                 # OCR 기능 추가
                 if st.button("OCR 실행", key='ocr_execute_btn'):
-                    with st.spinner("OCR 수행 중..."):
-                        all_texts = []
-                        for img_path in uploaded_image_paths:
-                            result = ocr.ocr(img_path)
-                            if result and result[0]:  # PaddleOCR 결과 확인
-                                extracted_texts = [line[1][0] for line in result[0]]
-                                all_texts.extend(extracted_texts)
-                        
-                        st.session_state.ocr_text = "\n".join(all_texts)
+                    if ocr_jobs.JOB_WORKERS > 0:
+                        # 작업 큐에 넣고 백그라운드 워커가 처리 (페이지를 떠나도 계속 진행)
+                        # 이전에 올린 같은 칠판 사진이 있으면 바뀐 부분만 OCR하도록 함께 넘김
+                        earlier = [image["path"] for image in image_catalog.latest_images(upload_lecture, upload_week, limit=20)]
+                        st.session_state.ocr_job_id = ocr_jobs.enqueue_job(upload_lecture, upload_week, uploaded_image_paths,
+                                                                           earlier=earlier)
+                    else:
+                        with st.spinner("OCR 수행 중..."):
+                            per_image_texts = []
+                            progress = st.progress(0.0)
+                            # 업로드 때 디코딩해 둔 배열을 전처리해서 OCR하고, 이미지별 결과를 업로드 순서대로 표시
+                            for i, _, result in iter_ocr_batch(uploaded_image_paths, OCR_SETTINGS, ocr=None if BATCH_WORKERS > 0 else load_ocr()):
+                                extracted_texts = extract_texts(result)
+                                per_image_texts.append(extracted_texts)
+                                search_index.index_ocr(upload_lecture, upload_week, uploaded_image_paths[i], "\n".join(extracted_texts))
+                                progress.progress((i + 1) / len(uploaded_image_paths), text=f"OCR 진행 중... ({i + 1}/{len(uploaded_image_paths)})")
+                                with st.expander(f"{img_files[i].name} ({len(extracted_texts)}줄)"):
+                                    st.text("\n".join(extracted_texts))
+                            
+                            # 같은 칠판을 여러 번 찍어서 겹치는 줄은 한 번만 남김
+                            st.session_state.ocr_text = "\n".join(merge_transcript(per_image_texts))
+            
+            # OCR 작업 진행 상황 (다른 메뉴에 다녀와도 이 강의/주차의 최근 작업을 보여줌)
+            if ocr_jobs.JOB_WORKERS > 0:
+                show_ocr_job_status(upload_lecture, upload_week)
             
             # 필기 내용 입력 (OCR 결과 또는 직접 입력)
             note = st.text_area("필기 내용 입력 (OCR 결과 또는 직접 입력):", value=st.session_state.get("ocr_text", ""), height=200, key='note_input')
@@ -387,8 +419,14 @@ elif st.session_state.menu_selection == '이미지 업로드':
             # 요약 기능 추가
             if note.strip():
                 if st.button("요약하기", key='summarize_btn'):
-                    with st.spinner("텍스트 요약 중..."):
-                        st.session_state.summary_text = summarize_text(note)
+                    # 생성되는 요약을 바로 보여주고, 끝나면 아래 요약 결과 칸으로 옮김
+                    stream_area = st.empty()
+                    with stream_area.container():
+                        st.session_state.summary_text = st.write_stream(stream_summary(note))
+                    stream_area.empty()
+                    # 요약도 검색되도록 색인 (실패한 요약은 빼고)
+                    if not summary_failed(st.session_state.summary_text):
+                        search_index.index_summary(upload_lecture, upload_week, 'note', st.session_state.summary_text)
             
             # 요약 결과 표시
             if st.session_state.get("summary_text"):
@@ -404,41 +442,41 @@ elif st.session_state.menu_selection == '이미지 업로드':
                 save_note(upload_lecture, upload_week, note)
                 st.success("필기가 저장되었습니다!")
 
+elif st.session_state.menu_selection == '성능 지표':
+    show_metrics_page()
+
 # 강의 목록 메뉴
 else:  
     st.sidebar.header('강의 목록')
-    courses = load_courses()
+    names = course_names()
     
-    if not courses:
+    if not names:
         st.warning("등록된 강의가 없습니다. '강의/주차 관리' 메뉴에서 강의를 추가해주세요.")
     else:
         lecture_option = st.sidebar.selectbox(
             '강의를 선택하세요:',
-            list(courses.keys()),
+            names,
             key='lecture_list_select'
         )
+        view = course_schedule(lecture_option)
         
-        if not courses[lecture_option]:
+        if not view.weeks:
             st.warning(f"'{lecture_option}'에 등록된 주차가 없습니다.")
         else:
-            # 주차 목록 생성 (display_name 표시)
-            weeks = courses[lecture_option]
-            week_options = [weeks[w]["display_name"] for w in sorted(weeks.keys(), key=lambda x: int(x.split('주차')[0]))]
-            week_map = {weeks[w]["display_name"]: w for w in weeks.keys()}
-            
+            # 주차 목록 (display_name 표시)
             selected_week_display = st.sidebar.selectbox(
                 '주차를 선택하세요:',
-                week_options,
+                view.options,
                 key='week_list_select'
             )
             
-            selected_week = week_map[selected_week_display]
+            selected_week = view.by_display[selected_week_display]
             
             # 강의와 주차에 따른 내용 표시
             st.header(f'{lecture_option} - {selected_week_display}')
             
             # 주차 유형에 따른 알림 표시
-            week_type = courses[lecture_option][selected_week]["type"]
+            week_type = view.by_name[selected_week].type
             if week_type == "midterm":
                 st.info("📝 중간고사 주간입니다.")
             elif week_type == "final":
@@ -446,61 +484,68 @@ else:
             elif week_type == "holiday":
                 st.warning("🏖️ 휴강 주간입니다.")
             
-            # 저장된 이미지 확인 및 표시
-            user_image_path = 'images'
-            if os.path.exists(user_image_path):
-                # 해당 강의와 주차에 맞는 이미지 찾기
-                image_files = [f for f in os.listdir(user_image_path) 
-                           if f.startswith(f"{lecture_option}_{selected_week}") and 
-                           (f.endswith('.jpg') or f.endswith('.jpeg') or f.endswith('.png'))]
+            # 저장된 이미지 확인 및 표시 (카탈로그 인덱스로 최신 이미지 조회)
+            image_count = image_catalog.count_images(lecture_option, selected_week)
+            
+            if image_count:
+                st.subheader("업로드한 강의 이미지")
                 
-                if image_files:
-                    st.subheader("업로드한 강의 이미지")
-                    
-                    # 이미지 파일을 날짜순으로 정렬
-                    sorted_images = sorted(image_files, reverse=True)  # 최신 이미지가 먼저 오도록
-                    
-                    # 갤러리 형태로 이미지 표시 (그리드 레이아웃)
-                    cols = st.columns(min(3, len(sorted_images)))  # 한 행에 최대 3개의 이미지 표시
-                    
-                    for i, img_file in enumerate(sorted_images[:9]):  # 최대 9개 이미지만 표시
-                        with cols[i % 3]:
-                            img = Image.open(os.path.join(user_image_path, img_file))
-                            st.image(img, caption=img_file, use_container_width=True)
-                    
-                    # 더 많은 이미지가 있을 경우 선택할 수 있게 함
-                    if len(sorted_images) > 9:
-                        st.subheader("모든 이미지 보기")
-                        selected_image = st.selectbox(
-                            "다른 이미지 선택:",
-                            sorted_images,
-                            key='additional_image_select'
-                        )
-                        img = Image.open(os.path.join(user_image_path, selected_image))
-                        st.image(img, caption=selected_image)
-                    
-                    # OCR 기능 추가 - 강의 목록에서도 OCR 가능하게
-                    if st.button("선택한 이미지에서 OCR 실행", key='ocr_from_list_btn'):
-                        if 'selected_image' in locals():
-                            with st.spinner("OCR 수행 중..."):
-                                img_path = os.path.join(user_image_path, selected_image)
-                                result = ocr.ocr(img_path)
-                                if result and result[0]:
-                                    extracted_texts = [line[1][0] for line in result[0]]
-                                    st.session_state.ocr_text = "\n".join(extracted_texts)
-                                    st.text_area("OCR 결과:", value=st.session_state.ocr_text, height=200, key='ocr_result_display')
-                                    
-                                    # 요약 옵션 추가
-                                    if st.button("OCR 결과 요약하기", key='summarize_ocr_btn'):
-                                        with st.spinner("텍스트 요약 중..."):
-                                            summary = summarize_text(st.session_state.ocr_text)
-                                            st.session_state.summary_text = summary
-                                            st.text_area("요약 결과:", value=summary, height=150, key='ocr_summary_display')
-                        else:
-                            st.warning("OCR을 실행할 이미지를 선택해주세요.")
-                else:
-                    st.info(f"{lecture_option} {selected_week_display}에 업로드된 이미지가 없습니다.")
-                            
+                # 최신 이미지가 먼저 오도록 최대 9개만 조회
+                latest = image_catalog.latest_images(lecture_option, selected_week, limit=9)
+                
+                # 갤러리 형태로 이미지 표시 (그리드 레이아웃)
+                cols = st.columns(min(3, len(latest)))  # 한 행에 최대 3개의 이미지 표시
+                
+                for i, image in enumerate(latest):  # 최대 9개 이미지만 표시
+                    with cols[i % 3]:
+                        # 썸네일을 기본으로 보여주고 원본은 요청할 때만 불러옴
+                        st.image(thumbnails.get_thumbnail(image["path"]), caption=image_catalog.image_label(image), use_container_width=True)
+                        if st.button("원본 보기", key=f"full_image_btn_{i}"):
+                            st.session_state.full_image_path = image["path"]
+                
+                full_image_path = st.session_state.get('full_image_path')
+                if full_image_path and full_image_path in [image["path"] for image in latest]:
+                    st.subheader("원본 이미지")
+                    st.image(full_image_path)
+                
+                # 더 많은 이미지가 있을 경우 선택할 수 있게 함
+                if image_count > 9:
+                    st.subheader("모든 이미지 보기")
+                    image_labels = {image["path"]: image_catalog.image_label(image)
+                                    for image in image_catalog.latest_images(lecture_option, selected_week)}
+                    selected_image = st.selectbox(
+                        "다른 이미지 선택:",
+                        list(image_labels),
+                        format_func=image_labels.get,
+                        key='additional_image_select'
+                    )
+                    st.image(thumbnails.get_thumbnail(selected_image), caption=image_labels[selected_image])
+                    if st.checkbox("원본 크기로 보기", key='additional_image_full'):
+                        st.image(selected_image)
+                
+                # OCR 기능 추가 - 강의 목록에서도 OCR 가능하게
+                if st.button("선택한 이미지에서 OCR 실행", key='ocr_from_list_btn'):
+                    if 'selected_image' in locals():
+                        with st.spinner("OCR 수행 중..."):
+                            img_path = selected_image
+                            result = cached_ocr(load_ocr(), img_path, OCR_SETTINGS)
+                            if result and result[0]:
+                                extracted_texts = [line[1][0] for line in result[0]]
+                                st.session_state.ocr_text = "\n".join(extracted_texts)
+                                st.text_area("OCR 결과:", value=st.session_state.ocr_text, height=200, key='ocr_result_display')
+                                
+                                # 요약 옵션 추가
+                                if st.button("OCR 결과 요약하기", key='summarize_ocr_btn'):
+                                    st.caption("요약 결과:")
+                                    summary = st.write_stream(stream_summary(st.session_state.ocr_text))
+                                    st.session_state.summary_text = summary
+                                    if not summary_failed(summary):
+                                        search_index.index_summary(lecture_option, selected_week, 'ocr', summary)
+                    else:
+                        st.warning("OCR을 실행할 이미지를 선택해주세요.")
+            else:
+                st.info(f"{lecture_option} {selected_week_display}에 업로드된 이미지가 없습니다.")
+                        
             # 저장된 노트 불러오기
             try:
                 notes = load_notes()
@@ -510,16 +555,32 @@ else:
                     
                     # 노트 내용 요약 기능
                     if st.button("필기 내용 요약하기", key='summarize_note_btn'):
-                        with st.spinner("필기 내용 요약 중..."):
-                            summary = summarize_text(notes[lecture_option][selected_week])
-                            st.text_area("요약 결과:", value=summary, height=150, key='note_summary_display')
+                        st.caption("요약 결과:")
+                        summary = st.write_stream(stream_summary(notes[lecture_option][selected_week]))
+                        if not summary_failed(summary):
+                            search_index.index_summary(lecture_option, selected_week, 'note', summary)
                     
                     # 수정 가능하도록
                     new_note = st.text_area("필기 수정:", value=notes[lecture_option][selected_week], height=200, key="edit_note")
                     if st.button("필기 수정 저장", key='save_edited_note_btn'):
                         save_note(lecture_option, selected_week, new_note)
                         st.success("필기가 수정되었습니다!")
+                    
+                    # 수정 기록 (이전 버전과 비교, 되돌리기)
+                    history = note_history.versions(lecture_option, selected_week)
+                    if len(history) > 1:
+                        with st.expander(f"수정 기록 ({len(history)}개 버전)"):
+                            labels = {v["version"]: f"버전 {v['version']} ({datetime.fromtimestamp(v['created_at']).strftime('%m-%d %H:%M')})"
+                                      for v in history}
+                            old_version = st.selectbox("비교할 이전 버전:", list(labels)[1:], format_func=labels.get, key='note_history_version')
+                            st.code("\n".join(note_history.diff(lecture_option, selected_week, old_version)) or "차이가 없습니다.", language='diff')
+                            if st.button("이 버전으로 되돌리기", key='restore_note_btn'):
+                                save_note(lecture_option, selected_week, note_history.get_text(lecture_option, selected_week, old_version))
+                                st.success(f"{labels[old_version]}으로 되돌렸습니다.")
+                                st.rerun()
                 else:
                     st.info("이 강의/주차에 저장된 필기가 없습니다.")
             except:
-                st.info("이 강의/주차에 저장된 필기가 없습니다.")
\ No newline at end of file
+                st.info("이 강의/주차에 저장된 필기가 없습니다.")
+
+metrics.end_trace()
@@ -0,0 +1,142 @@
+"""동시 로그인/회원가입 부하 시험 (여러 프로세스 x 스레드, 빈 DB).
+
+사용법:
+    python -m bench.auth_load [--processes 4] [--threads 16] [--signups 300] [--contended 20] [--logins 600]
+    python -m bench.auth_load --mode legacy    # 예전 방식(전체 사용자 읽기 -> 전체 다시 쓰기)과 비교
+
+미리 가입한 사용자들의 로그인, 새 아이디 가입, 같은 아이디에 여러 세션이 동시에 가입하는 경우를 섞어서
+동시에 실행한 뒤, 가입에 성공했다고 응답한 계정이 모두 그 비밀번호로 남아 있는지(잃어버리거나 덮어쓴 계정이 없는지),
+같은 아이디는 한 명만 가입에 성공했는지 확인합니다. 문제가 있으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import hashlib
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+CONTENDERS = 5
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _hash(password):
+    # app.py 의 hash_password 와 같은 방식
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _record(password):
+    return {"password": _hash(password), "created_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+# 예전 app.py 방식
+def _legacy_signup(username, password):
+    import storage
+    users = storage.load_users()
+    if username in users:
+        return False
+    users[username] = _record(password)
+    storage.save_users(users)
+    return True
+
+
+def _legacy_login(username, password):
+    import storage
+    users = storage.load_users()
+    return username in users and users[username]["password"] == _hash(password)
+
+
+# 지금 방식 (data_access 의 아이디별 조회/캐시와 원자적 가입)
+def _signup(username, password):
+    import data_access
+    return data_access.create_user(username, _record(password))
+
+
+def _login(username, password):
+    import data_access
+    user = data_access.get_user(username)
+    return user is not None and user["password"] == _hash(password)
+
+
+def _run_tasks(mode, tasks, threads):
+    signup, login = (_legacy_signup, _legacy_login) if mode == "legacy" else (_signup, _login)
+
+    def run(task):
+        kind, username, password = task
+        start = time.perf_counter()
+        try:
+            ok = (signup if kind == "signup" else login)(username, password)
+            error = None
+        except Exception as e:
+            ok, error = False, str(e)
+        return kind, username, password, ok, time.perf_counter() - start, error
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(run, tasks))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동시 로그인/회원가입 부하 시험")
+    parser.add_argument("--mode", choices=["store", "legacy"], default="store")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16, help="프로세스당 동시 세션 수")
+    parser.add_argument("--existing", type=int, default=200, help="미리 가입해 둘 사용자 수")
+    parser.add_argument("--signups", type=int, default=300, help="새 아이디 가입 수")
+    parser.add_argument("--contended", type=int, default=20, help=f"{CONTENDERS}개 세션이 동시에 가입을 시도할 아이디 수")
+    parser.add_argument("--logins", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # 모듈을 불러오기 전에 빈 DB로 바꿔둠 (spawn 으로 띄우는 프로세스도 같은 환경 변수를 받음)
+    os.environ["STUDIO_DB"] = os.path.join(tempfile.mkdtemp(), "studio.db")
+    import storage
+
+    storage.save_users({f"user{i}": _record(f"pw{i}") for i in range(args.existing)})
+
+    rng = random.Random(args.seed)
+    tasks = [("signup", f"new{i}", f"new-pw{i}") for i in range(args.signups)]
+    tasks += [("signup", f"contended{i}", f"pw{i}-{j}") for i in range(args.contended) for j in range(CONTENDERS)]
+    tasks += [("login", f"user{i}", f"pw{i}") for i in (rng.randrange(args.existing) for _ in range(args.logins))]
+    rng.shuffle(tasks)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=mp.get_context('spawn')) as pool:
+        futures = [pool.submit(_run_tasks, args.mode, tasks[i::args.processes], args.threads)
+                   for i in range(args.processes)]
+        results = [row for future in futures for row in future.result()]
+    wall = time.perf_counter() - start
+
+    print(f"{args.mode}: {len(results)}개 요청, {args.processes}프로세스 x {args.threads}스레드, "
+          f"{wall:.2f}s ({len(results) / wall:.0f}/s)")
+    for kind in ("login", "signup"):
+        seconds = [row[4] for row in results if row[0] == kind]
+        if seconds:
+            print(f"{kind:<8}{len(seconds):>6}회  p50 {_percentile(seconds, 0.5) * 1000:8.2f}ms"
+                  f"  p95 {_percentile(seconds, 0.95) * 1000:8.2f}ms  p99 {_percentile(seconds, 0.99) * 1000:8.2f}ms")
+
+    # 결과 확인: 가입 성공으로 응답한 계정이 그 비밀번호로 남아 있어야 함
+    errors = [row for row in results if row[5]]
+    failed_logins = [row for row in results if row[0] == "login" and not row[3]]
+    succeeded = [row for row in results if row[0] == "signup" and row[3]]
+    lost = [row for row in succeeded if (storage.get_user(row[1]) or {}).get("password") != _hash(row[2])]
+    winners = {}
+    for row in succeeded:
+        winners[row[1]] = winners.get(row[1], 0) + 1
+    duplicated = [name for name, count in winners.items() if count > 1]
+    missing = [row for row in results if row[0] == "signup" and row[1].startswith("new") and not row[3]]
+
+    print(f"예외 {len(errors)}건, 실패한 로그인 {len(failed_logins)}건, 실패한 새 아이디 가입 {len(missing)}건")
+    print(f"잃어버리거나 덮어쓴 계정 {len(lost)}건, 두 명 이상 가입에 성공한 아이디 {len(duplicated)}개 / {args.contended}개")
+    for row in errors[:5]:
+        print(f"    {row[0]} {row[1]}: {row[5]}")
+    return 1 if errors or failed_logins or lost or duplicated or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
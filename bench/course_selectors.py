@@ -0,0 +1,82 @@
+"""강의/주차 선택 목록을 만드는 rerun 비용: 예전 방식(매번 정렬, week_map 생성) vs 버전별 캐시(schedule.view).
+
+사용법:
+    python -m bench.course_selectors [--courses 10 100 1000] [--reruns 2000]
+
+빈 DB에 강의 N개를 한 번에 등록(import_courses)한 뒤, 업로드 화면과 같은 순서로
+강의 목록 -> 선택한 강의의 주차 목록 -> 선택한 표시명의 주차 찾기를 rerun 횟수만큼 반복합니다 (강의 5개를 번갈아 선택).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _legacy(data_access, lecture):
+    # 예전 app_ver_2.py 방식
+    courses = data_access.load_courses()
+    names = list(courses.keys())
+    weeks = courses[lecture]
+    week_options = [weeks[w]["display_name"] for w in sorted(weeks.keys(), key=lambda x: int(x.split('주차')[0]))]
+    week_map = {weeks[w]["display_name"]: w for w in weeks.keys()}
+    return names, week_map[week_options[-1]]
+
+
+def _cached(data_access, lecture):
+    names = data_access.course_names()
+    view = data_access.course_schedule(lecture)
+    return names, view.by_display[view.options[-1]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강의/주차 선택 목록 rerun 비용")
+    parser.add_argument("--courses", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--reruns", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # 모듈을 불러오기 전에 빈 DB로 바꿔둠
+    os.environ["STUDIO_DB"] = os.path.join(tempfile.mkdtemp(), "studio.db")
+    import data_access
+    import schedule
+    import storage
+
+    rng = random.Random(args.seed)
+    print(f"{'courses':>8}{'mode':>8}{'p50(us)':>10}{'p95(us)':>10}{'p99(us)':>10}")
+    for size in args.courses:
+        storage.save_courses({})
+        start = time.perf_counter()
+        data_access.import_courses({
+            f"강의{i}": schedule.to_schedule(schedule.build("2025-03-03", schedule.TERM_WEEKS))
+            for i in range(size)
+        })
+        import_seconds = time.perf_counter() - start
+        # 사용자마다 보는 강의는 몇 개뿐이므로 그 안에서 고름
+        viewed = [f"강의{rng.randrange(size)}" for _ in range(5)]
+        lectures = [rng.choice(viewed) for _ in range(args.reruns)]
+        # 시간을 재기 전에 두 방식이 같은 강의 목록과 주차를 돌려주는지 확인
+        for lecture in viewed:
+            names, week = _cached(data_access, lecture)
+            assert (list(names), week) == _legacy(data_access, lecture), lecture
+        for mode, func in (("legacy", _legacy), ("cached", _cached)):
+            data_access.clear_cache()
+            seconds = []
+            for lecture in lectures:
+                t0 = time.perf_counter()
+                func(data_access, lecture)
+                seconds.append(time.perf_counter() - t0)
+            print(f"{size:>8}{mode:>8}" + "".join(
+                f"{_percentile(seconds, q) * 1e6:>10.1f}" for q in (0.5, 0.95, 0.99)))
+        print(f"{'':>8}  {size}개 강의 일괄 등록 {import_seconds * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""요약 기능 시험용 로컬 LLM 스텁 서버.
+
+OpenAI 형식(POST .../chat/completions)과 Hugging Face 추론 API 형식(그 밖의 POST)에
+고정된 규칙의 요약을 돌려주고, 받은 요청 수를 셉니다.
+요청에 "stream": true 가 있으면 토큰을 SSE로 하나씩 보냅니다.
+--error-rate 비율만큼 503/429 를, --slow-rate 비율만큼 --slow-latency 지연을 섞어서 돌려줍니다.
+
+    python -m bench.fake_llm --port 8008 --latency 0.5 --token-latency 0.05
+    python -m bench.fake_llm --error-rate 0.2 --slow-rate 0.05 --slow-latency 30
+    OPENAI_API_BASE=http://127.0.0.1:8008/v1 HF_API_URL=http://127.0.0.1:8008/hf streamlit run app_ver_2.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_summary(prompt):
+    # 프롬프트 마지막 줄들을 잘라서 요약처럼 돌려줌
+    body = prompt.split("\n\n", 1)[-1]
+    return f"요약: {body[:60]}"
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, events):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for event in events:
+            self.wfile.write(f"data: {event}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.close_connection = True
+
+    def _tokens(self, text):
+        # 두 글자씩 토큰으로 보고 토큰마다 지연을 넣음
+        for i in range(0, len(text), 2):
+            if self.server.token_latency:
+                time.sleep(self.server.token_latency)
+            yield text[i:i + 2]
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", "0"))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.calls += 1
+            roll = server.random.random()
+        if roll < server.error_rate:
+            status = 429 if roll < server.error_rate / 4 else 503
+            self._send_json(status, {"error": "injected"})
+            return
+        if roll > 1 - server.slow_rate:
+            time.sleep(server.slow_latency)
+        elif server.latency:
+            time.sleep(server.latency)
+
+        stream = request.get("stream", False)
+        if self.path.endswith("/chat/completions"):
+            prompt = request["messages"][-1]["content"]
+            if stream:
+                events = (
+                    json.dumps({"choices": [{"index": 0, "delta": {"content": token}}]}, ensure_ascii=False)
+                    for token in self._tokens(fake_summary(prompt))
+                )
+                self._send_stream(_with_done(events))
+                return
+            self._send_json(200, {
+                "id": "fake",
+                "object": "chat.completion",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": fake_summary(prompt)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+        else:
+            summary = fake_summary(request.get("inputs", ""))
+            if stream:
+                self._send_stream(
+                    json.dumps({"token": {"text": token, "special": False}, "generated_text": None}, ensure_ascii=False)
+                    for token in self._tokens(summary)
+                )
+                return
+            self._send_json(200, [{"generated_text": summary}])
+
+
+def _with_done(events):
+    # OpenAI 스트림은 마지막에 [DONE] 을 보냄
+    yield from events
+    yield "[DONE]"
+
+
+def start_server(port=0, latency=0.0, token_latency=0.0, error_rate=0.0, slow_rate=0.0, slow_latency=0.0, seed=None):
+    """백그라운드 스레드에서 스텁 서버를 띄우고 (서버, 기본 URL)을 반환합니다."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.token_latency = token_latency
+    server.error_rate = error_rate
+    server.slow_rate = slow_rate
+    server.slow_latency = slow_latency
+    server.random = random.Random(seed)
+    server.calls = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 LLM 스텁 서버")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답마다 넣을 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="스트리밍 토큰마다 넣을 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503/429 로 실패시킬 요청 비율")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="아주 느리게 응답할 요청 비율")
+    parser.add_argument("--slow-latency", type=float, default=30.0, help="느린 응답의 지연(초)")
+    args = parser.parse_args(argv)
+    server, url = start_server(args.port, args.latency, args.token_latency,
+                               args.error_rate, args.slow_rate, args.slow_latency)
+    print(f"스텁 서버 실행 중: {url} (OpenAI: {url}/v1, HF: {url}/hf)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""같은 칠판 연속 사진의 전체 OCR vs 증분 OCR 비교.
+
+사용법:
+    python -m bench.incremental_ocr sequence/ [--json out.json]
+
+sequence/ 안의 이미지를 파일명 순서(찍은 순서)로 처리합니다. 캐시 효과를 빼기 위해
+모드마다 빈 OCR 캐시 폴더를 씁니다. 중복 줄 제거 전/후 줄 수도 함께 보여줍니다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg')
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="증분 OCR 벤치마크")
+    parser.add_argument("sequence_dir")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    paths = [os.path.join(args.sequence_dir, name) for name in sorted(os.listdir(args.sequence_dir))
+             if name.lower().endswith(IMAGE_EXTS)]
+    if not paths:
+        print("이미지가 없습니다.")
+        return 1
+
+    from paddleocr import PaddleOCR
+    import incremental_ocr
+    import ocr_cache
+    from ocr_batch import extract_texts
+
+    ocr = PaddleOCR(**OCR_SETTINGS, use_gpu=False, show_log=False)
+    report = {}
+
+    ocr_cache.CACHE_DIR = tempfile.mkdtemp()
+    start = time.perf_counter()
+    full_texts = [extract_texts(ocr_cache.cached_ocr(ocr, path, OCR_SETTINGS)) for path in paths]
+    report["full"] = {"seconds": time.perf_counter() - start}
+
+    ocr_cache.CACHE_DIR = tempfile.mkdtemp()
+    start = time.perf_counter()
+    incremental_texts = []
+    for i, path in enumerate(paths):
+        previous = incremental_ocr.find_previous(path, paths[:i][::-1])
+        if previous:
+            result = incremental_ocr.incremental_ocr(ocr, path, previous, OCR_SETTINGS)
+        else:
+            result = ocr_cache.cached_ocr(ocr, path, OCR_SETTINGS)
+        incremental_texts.append(extract_texts(result))
+    report["incremental"] = {"seconds": time.perf_counter() - start, **incremental_ocr.incremental_stats()}
+
+    for mode, texts in (("full", full_texts), ("incremental", incremental_texts)):
+        report[mode]["lines"] = sum(len(lines) for lines in texts)
+        report[mode]["merged_lines"] = len(incremental_ocr.merge_transcript(texts))
+        stats = report[mode]
+        print(f"{mode:<12} {stats['seconds']:7.2f}s  줄 {stats['lines']:5d} -> 중복 제거 후 {stats['merged_lines']:5d}")
+    print(f"증분 OCR 통계: {incremental_ocr.incremental_stats()}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
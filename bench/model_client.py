@@ -0,0 +1,97 @@
+"""모델 API 호출 방식 비교: 예전 방식(요청마다 requests.post, 시간 제한/재시도 없음) vs model_client.
+
+스텁 서버가 일부 요청을 실패(503/429)시키거나 아주 느리게 응답하도록 해서
+동시 요청의 성공률과 지연 분포(p50/p95/p99)를 비교합니다.
+
+    python -m bench.model_client --requests 200 --concurrency 16 --error-rate 0.1 --slow-rate 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_llm import start_server
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _run(call, count, concurrency):
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(count)))
+    return results, time.perf_counter() - start
+
+
+def _report(name, results, wall):
+    latencies = [elapsed for _, elapsed in results]
+    ok = sum(1 for success, _ in results if success)
+    print(
+        f"{name:<14} 성공 {ok}/{len(results)}  "
+        f"p50 {statistics.median(latencies) * 1000:7.0f}ms  "
+        f"p95 {_percentile(latencies, 0.95) * 1000:7.0f}ms  "
+        f"p99 {_percentile(latencies, 0.99) * 1000:7.0f}ms  "
+        f"최대 {max(latencies) * 1000:7.0f}ms  전체 {wall:.1f}s"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="모델 API 클라이언트 부하 비교")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="보통 응답의 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument("--read-timeout", type=float, default=2.0, help="model_client 읽기 시간 제한(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # model_client 를 불러오기 전에 설정을 바꿔둠
+    os.environ["MODEL_READ_TIMEOUT"] = str(args.read_timeout)
+    os.environ.setdefault("MODEL_MAX_CONCURRENCY", str(args.concurrency))
+    os.environ.setdefault("MODEL_BACKOFF_BASE", "0.1")
+    # 실패를 섞어 넣는 시험이므로 브레이커가 열리지 않게 함
+    os.environ.setdefault("MODEL_BREAKER_FAILURES", str(args.requests))
+    import model_client
+    import requests
+
+    server, url = start_server(latency=args.latency, error_rate=args.error_rate,
+                               slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=args.seed)
+    endpoint = f"{url}/hf"
+
+    def payload(i):
+        return {"inputs": f"요청 {i}\n\n통계학2 3주차 판서 내용입니다.", "parameters": {}}
+
+    def legacy(i):
+        response = requests.post(endpoint, json=payload(i))
+        response.raise_for_status()
+        return response.json()
+
+    def pooled(i):
+        return model_client.post_json("bench", endpoint, payload(i))
+
+    _report("requests.post", *_run(legacy, args.requests, args.concurrency))
+    server.random.seed(args.seed)
+    _report("model_client", *_run(pooled, args.requests, args.concurrency))
+    print(f"model_client 통계: {model_client.client_stats()}")
+    print(f"스텁 서버 호출 수: {server.calls}")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""필기 수정 기록 저장 크기와 복원 시간: 전체 복사본 vs 델타 + 주기적 스냅샷(note_history).
+
+사용법:
+    python -m bench.note_history [--edits 500] [--lines 200] [--keep 100] [--interval 32]
+
+빈 DB에서 필기 하나를 edits 번 고쳐 저장하며 (매번 몇 줄 수정/추가/삭제), 남은 버전의
+텍스트 합계와 실제 저장 크기, 임의 버전 복원 시간(p50/p95)과 최신 내용 읽기 시간을 봅니다.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _edit(rng, lines):
+    lines = list(lines)
+    for _ in range(rng.randint(1, 4)):
+        op = rng.random()
+        i = rng.randrange(len(lines) + 1)
+        if op < 0.5 and i < len(lines):
+            lines[i] = f"- 수정된 필기 {rng.randrange(10 ** 6)}: 정리한 내용과 예시\n"
+        elif op < 0.8 or len(lines) < 10:
+            lines.insert(i, f"- 추가한 필기 {rng.randrange(10 ** 6)}: 새로 들은 설명\n")
+        elif i < len(lines):
+            del lines[i]
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="필기 수정 기록 벤치마크")
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--keep", type=int, default=100)
+    parser.add_argument("--interval", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # 모듈을 불러오기 전에 빈 DB와 설정으로 바꿔둠
+    os.environ["STUDIO_DB"] = os.path.join(tempfile.mkdtemp(), "studio.db")
+    os.environ["NOTE_HISTORY_KEEP"] = str(args.keep)
+    os.environ["NOTE_HISTORY_SNAPSHOT_INTERVAL"] = str(args.interval)
+    import note_history
+    import storage
+
+    rng = random.Random(args.seed)
+    lines = [f"- {i}번째 줄: 강의 내용 정리\n" for i in range(args.lines)]
+    texts = {}
+    start = time.perf_counter()
+    for version in range(1, args.edits + 1):
+        lines = _edit(rng, lines)
+        texts[version] = ''.join(lines)
+        storage.save_note("벤치", "1주차", texts[version])
+    save_ms = (time.perf_counter() - start) / args.edits * 1000
+
+    # 첫 저장 전에는 필기가 없었으므로 버전 번호가 저장 순서와 같음
+    kept = note_history.versions("벤치", "1주차")
+    numbers = [row["version"] for row in kept]
+    stats = note_history.history_stats()
+
+    seconds = []
+    for version in [rng.choice(numbers) for _ in range(500)]:
+        t0 = time.perf_counter()
+        text = note_history.get_text("벤치", "1주차", version)
+        seconds.append(time.perf_counter() - t0)
+        assert text == texts[version]
+    latest = []
+    for _ in range(500):
+        t0 = time.perf_counter()
+        storage.get_note("벤치", "1주차")
+        latest.append(time.perf_counter() - t0)
+
+    full = sum(len(texts[v].encode('utf-8')) for v in numbers)
+    print(f"수정 {args.edits}번, 보관 {len(kept)}개 버전 (스냅샷 {stats['snapshots']}개), 저장 {save_ms:.2f}ms/회")
+    print(f"전체 복사본 {full / 1024:.1f}KB -> 저장 {stats['stored_bytes'] / 1024:.1f}KB "
+          f"({stats['stored_bytes'] / full * 100:.1f}%)")
+    print(f"버전 복원 p50 {_percentile(seconds, 0.5) * 1000:.2f}ms, p95 {_percentile(seconds, 0.95) * 1000:.2f}ms, "
+          f"최신 읽기 p50 {_percentile(latest, 0.5) * 1e6:.0f}us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""OCR 백엔드 비교 벤치마크 (처리량, 지연, 문자 정확도).
+
+사용법:
+    python -m bench.ocr_backends samples/ [--backends paddle paddle-mkldnn onnx] [--threads 4] [--json out.json]
+
+samples/ 는 고정된 한국어 판서 시험 세트로, 이미지마다 같은 이름의 .txt 정답 파일을 둡니다.
+백엔드마다 새 프로세스에서 모델을 만들고, 워밍업 한 번 뒤 모든 이미지를 전처리된 입력으로 OCR합니다.
+onnx 백엔드는 먼저 python ocr_engine.py export-onnx 로 모델을 내보내야 합니다.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.preprocess import IMAGE_EXTS, char_accuracy
+
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _run_backend(name, paths, threads):
+    if threads:
+        os.environ["OCR_CPU_THREADS"] = str(threads)
+    import ocr_engine
+    from ocr_batch import extract_texts
+    from preprocess import preprocess_image
+
+    start = time.perf_counter()
+    ocr = ocr_engine.create_ocr(OCR_SETTINGS, backend_name=name, use_gpu=False)
+    build_s = time.perf_counter() - start
+
+    images = [preprocess_image(path) for path in paths]
+    ocr.ocr(images[0])
+
+    rows = []
+    start = time.perf_counter()
+    for path, img in zip(paths, images):
+        t = time.perf_counter()
+        result = ocr.ocr(img)
+        rows.append({"path": path, "seconds": time.perf_counter() - t, "text": "\n".join(extract_texts(result))})
+    total_s = time.perf_counter() - start
+    return {"backend": name, "build_s": build_s, "total_s": total_s, "rows": rows}
+
+
+def _summarize(report):
+    seconds = [row["seconds"] for row in report["rows"]]
+    accuracies = [row["accuracy"] for row in report["rows"] if row.get("accuracy") is not None]
+    return {
+        "backend": report["backend"],
+        "images": len(seconds),
+        "build_s": report["build_s"],
+        "images_per_s": len(seconds) / report["total_s"] if report["total_s"] else 0.0,
+        "p50_s": statistics.median(seconds),
+        "p95_s": _percentile(seconds, 0.95),
+        "char_accuracy": statistics.mean(accuracies) if accuracies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 백엔드 비교 벤치마크")
+    parser.add_argument("sample_dir")
+    parser.add_argument("--backends", nargs="+", default=["paddle", "paddle-mkldnn", "onnx"])
+    parser.add_argument("--threads", type=int, default=0, help="엔진당 CPU 스레드 수 (0 이면 백엔드 기본값)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    paths = sorted(
+        os.path.join(args.sample_dir, name)
+        for name in os.listdir(args.sample_dir)
+        if name.lower().endswith(IMAGE_EXTS)
+    )
+    if not paths:
+        print("샘플 이미지가 없습니다.", file=sys.stderr)
+        return 1
+
+    reports = []
+    for name in args.backends:
+        # 백엔드마다 새 프로세스에서 실행해서 스레드 설정과 메모리가 섞이지 않게 함
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            try:
+                reports.append(pool.submit(_run_backend, name, paths, args.threads).result())
+            except Exception as e:
+                print(f"{name}: 실행 실패 ({e})", file=sys.stderr)
+
+    for report in reports:
+        for row in report["rows"]:
+            truth_path = os.path.splitext(row["path"])[0] + ".txt"
+            if os.path.exists(truth_path):
+                with open(truth_path, 'r', encoding='utf-8') as f:
+                    row["accuracy"] = char_accuracy(f.read(), row["text"])
+
+    summaries = [_summarize(r) for r in reports]
+    print(f"{'backend':<16}{'images':>8}{'build(s)':>10}{'img/s':>8}{'p50(s)':>9}{'p95(s)':>9}{'accuracy':>10}")
+    for s in summaries:
+        acc = f"{s['char_accuracy']:.3f}" if s["char_accuracy"] is not None else "-"
+        print(f"{s['backend']:<16}{s['images']:>8}{s['build_s']:>10.2f}{s['images_per_s']:>8.2f}"
+              f"{s['p50_s']:>9.3f}{s['p95_s']:>9.3f}{acc:>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"threads": args.threads, "summaries": summaries, "reports": reports}, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""OCR 단계별(검출/방향 분류/인식) 소요 시간 비교: 기본 PaddleOCR vs 적응형 파이프라인.
+
+사용법:
+    python -m bench.ocr_stages samples/ [--json out.json]
+
+기본 파이프라인의 단계별 시간은 PaddleOCR 내부(TextSystem)가 돌려주는 time_dict 를,
+적응형은 ocr_pipeline.last_timings() 를 씁니다. 빈 사진도 섞어 두면 인식을 건너뛰는 효과를 볼 수 있습니다.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from bench.preprocess import IMAGE_EXTS, char_accuracy
+
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 단계별 시간 비교")
+    parser.add_argument("sample_dir")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    paths = sorted(
+        os.path.join(args.sample_dir, name)
+        for name in os.listdir(args.sample_dir)
+        if name.lower().endswith(IMAGE_EXTS)
+    )
+    if not paths:
+        print("샘플 이미지가 없습니다.", file=sys.stderr)
+        return 1
+
+    import ocr_engine
+    import ocr_pipeline
+    from preprocess import preprocess_image
+
+    ocr_engine.ADAPTIVE = False
+    engine = ocr_engine.create_ocr(OCR_SETTINGS, use_gpu=False)
+    images = [preprocess_image(path) for path in paths]
+    engine.ocr(images[0])
+
+    rows = []
+    for path, img in zip(paths, images):
+        # TextSystem.__call__ 은 (상자, 인식 결과, 단계별 시간)을 돌려줌
+        boxes, rec_res, time_dict = engine(img, cls=True)
+        standard = {stage: time_dict.get(stage, 0.0) for stage in ("det", "cls", "rec")}
+        standard["total"] = time_dict.get("all", sum(standard.values()))
+        standard_text = "\n".join(text for text, _ in (rec_res or []))
+
+        result = ocr_pipeline.adaptive_ocr(engine, img)
+        adaptive_text = "\n".join(line[1][0] for line in (result[0] or []))
+        row = {"path": path, "standard": standard, "adaptive": ocr_pipeline.last_timings(),
+               "agreement": char_accuracy(standard_text, adaptive_text)}
+        rows.append(row)
+
+    print(f"{'mode':<10}" + "".join(f"{stage + '(ms)':>12}" for stage in ocr_pipeline.STAGES))
+    for mode in ("standard", "adaptive"):
+        means = {stage: statistics.mean(row[mode][stage] for row in rows) for stage in ocr_pipeline.STAGES}
+        print(f"{mode:<10}" + "".join(f"{means[stage] * 1000:>12.1f}" for stage in ocr_pipeline.STAGES))
+    stats = ocr_pipeline.stage_stats()
+    print(f"빈 사진으로 인식 생략: {stats['skipped_blank']}/{stats['calls']}, "
+          f"상자별 방향 분류 생략: {stats['cls_skipped']}/{stats['calls']}")
+    print(f"기본 대비 텍스트 일치도: {statistics.mean(row['agreement'] for row in rows):.3f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"rows": rows, "stats": stats}, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""업로드 -> OCR -> 요약 -> 저장 전체 흐름 벤치마크 (Streamlit 없이 페이지와 같은 함수를 호출).
+
+사용법:
+    python -m bench.pipeline [--notes 10 100 1000 10000] [--images 5] [--json out.json]
+    python -m bench.pipeline --skip ocr --json new.json --baseline base.json [--tolerance 0.2]
+
+단계별로 새 프로세스와 빈 작업 폴더(DB, OCR 캐시, 요약 캐시)에서 실행해서 최대 메모리(RSS)와
+디스크에 쓴 바이트를 따로 측정합니다.
+    ocr        합성 한국어 판서 이미지를 만들고 엔진 생성(load_ocr), 첫 OCR(캐시 없음), 캐시 적중을 측정
+    summarize  로컬 스텁 LLM(bench.fake_llm)으로 summarize_text 를 측정
+    storage    합성 필기 N개로 save_note / load_notes / load_courses 를 측정 (--notes 크기마다)
+합성 데이터는 --seed 로 고정되므로 같은 설정의 결과끼리 비교할 수 있습니다.
+--baseline 을 주면 p95 가 허용치(--tolerance)보다 느려지거나 처리량이 줄어든 항목을 표시하고 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+STAGES = ("ocr", "summarize", "storage")
+WEEKS_PER_COURSE = 15
+
+# 합성 필기에 쓸 낱말 (강의 필기에 흔한 표현)
+_SUBJECTS = ["표본분포", "중심극한정리", "신뢰구간", "가설검정", "회귀분석", "분산분석", "베이즈 정리", "최대우도추정",
+             "경사하강법", "역전파", "합성곱 신경망", "과적합", "정규화", "교차검증", "사용성 평가", "인지 부하"]
+_PREDICATES = ["의 정의를 배웠다", "을 예제로 계산했다", "의 가정을 확인해야 한다", "은 시험에 나온다",
+               "과 관련된 공식을 정리했다", "의 한계를 토론했다", "을 실습 과제로 구현한다", "의 직관적 의미를 설명했다"]
+_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def korean_sentences(rng, count):
+    return [f"{rng.choice(_SUBJECTS)}{rng.choice(_PREDICATES)}." for _ in range(count)]
+
+
+def synthetic_note(rng, lines=12):
+    return "\n".join(korean_sentences(rng, lines))
+
+
+def find_font(path=None):
+    for candidate in ([path] if path else []) + list(_FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def board_image(path, lines, font_path=None, size=(1600, 1000), rng=None):
+    """칠판 사진처럼 보이는 이미지(어두운 녹색 판, 분필색 글씨, 약간의 기울기와 잡음)를 만듭니다."""
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+    rng = rng or random.Random(0)
+    img = Image.new('RGB', size, (32, 58, 44))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.truetype(font_path, 44) if font_path else ImageFont.load_default()
+    margin = 80
+    for i, line in enumerate(lines):
+        chalk = tuple(rng.randint(215, 245) for _ in range(3))
+        draw.text((margin + rng.randint(-10, 10), margin + i * 70), line, fill=chalk, font=font)
+    img = img.rotate(rng.uniform(-2, 2), resample=Image.BICUBIC, fillcolor=(20, 20, 20))
+    noise = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(0, 6, (size[1], size[0], 3))
+    img = Image.fromarray(np.clip(np.asarray(img, dtype=np.float32) + noise, 0, 255).astype(np.uint8))
+    img.filter(ImageFilter.GaussianBlur(0.6)).save(path, quality=90)
+    return path
+
+
+# 측정 도구
+def _write_bytes():
+    # 리눅스에서만: 이 프로세스가 write() 로 넘긴 바이트 수
+    try:
+        with open("/proc/self/io", 'r') as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _summarize_ops(name, seconds, wall=None):
+    wall = sum(seconds) if wall is None else wall
+    return {
+        "op": name,
+        "count": len(seconds),
+        "seconds": wall,
+        "throughput": len(seconds) / wall if wall else 0.0,
+        "p50_ms": _percentile(seconds, 0.5) * 1000,
+        "p95_ms": _percentile(seconds, 0.95) * 1000,
+        "p99_ms": _percentile(seconds, 0.99) * 1000,
+    }
+
+
+def _timed_each(func, items):
+    seconds = []
+    start = time.perf_counter()
+    for item in items:
+        t = time.perf_counter()
+        func(item)
+        seconds.append(time.perf_counter() - t)
+    return seconds, time.perf_counter() - start
+
+
+def _run_stage(stage, size, args):
+    """새 프로세스에서 단계 하나를 실행합니다. 설정은 모듈을 불러오기 전에 환경 변수로 바꿉니다."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{stage}-")
+    os.chdir(workdir)
+    os.environ["STUDIO_DB"] = os.path.join(workdir, "studio.db")
+    os.environ["OCR_CACHE_DIR"] = os.path.join(workdir, "ocr-cache")
+    os.environ["SUMMARY_CACHE_DB"] = os.path.join(workdir, "summaries.db")
+    rng = random.Random(args["seed"])
+    written = _write_bytes()
+
+    ops = globals()[f"_stage_{stage}"](size, args, rng, workdir)
+
+    written_after = _write_bytes()
+    return {
+        "stage": stage,
+        "size": size,
+        "ops": ops,
+        # 리눅스에서 ru_maxrss 단위는 KB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "disk_bytes": _dir_bytes(workdir),
+        "write_bytes": written_after - written if written is not None else None,
+    }
+
+
+def _stage_ocr(size, args, rng, workdir):
+    import ocr_engine
+    from bench.preprocess import char_accuracy
+    from ocr_batch import extract_texts
+    from ocr_cache import cached_ocr
+
+    font = find_font(args["font"])
+    images = []
+    for i in range(size):
+        lines = korean_sentences(rng, 8)
+        path = board_image(os.path.join(workdir, f"board_{i}.jpg"), lines, font, rng=rng)
+        with open(path, 'rb') as f:
+            images.append((f.read(), "\n".join(lines)))
+
+    # 페이지의 load_ocr() 와 같은 프로세스 공용 엔진
+    start = time.perf_counter()
+    ocr = ocr_engine.get_ocr(OCR_SETTINGS)
+    build = [time.perf_counter() - start]
+
+    accuracies = []
+
+    def run(item):
+        data, truth = item
+        text = "\n".join(extract_texts(cached_ocr(ocr, data, OCR_SETTINGS)))
+        accuracies.append(char_accuracy(truth, text))
+
+    cold, cold_wall = _timed_each(run, images)
+    warm, warm_wall = _timed_each(lambda item: cached_ocr(ocr, item[0], OCR_SETTINGS), images)
+    ops = [_summarize_ops("load_ocr", build), _summarize_ops("ocr", cold, cold_wall),
+           _summarize_ops("ocr_cached", warm, warm_wall)]
+    ops[1]["char_accuracy"] = sum(accuracies) / len(accuracies) if font else None
+    return ops
+
+
+def _stage_summarize(size, args, rng, workdir):
+    from bench.fake_llm import start_server
+
+    server, url = start_server(latency=args["llm_latency"], seed=args["seed"])
+    os.environ["OPENAI_API_BASE"] = f"{url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    import summarizer
+
+    notes = [synthetic_note(rng) for _ in range(size)]
+    failures = []
+
+    def run(note):
+        # summarize_text 는 실패를 예외 대신 "[요약 실패: ...]" 문자열로 돌려줌
+        if summarizer.summarize_text(note).startswith("[요약 실패"):
+            failures.append(note)
+
+    cold, cold_wall = _timed_each(run, notes)
+    warm, warm_wall = _timed_each(summarizer.summarize_text, notes)
+    server.shutdown()
+    ops = [_summarize_ops("summarize_text", cold, cold_wall), _summarize_ops("summarize_text_cached", warm, warm_wall)]
+    ops[0].update(llm_calls=server.calls, failures=len(failures))
+    return ops
+
+
+def _stage_storage(size, args, rng, workdir):
+    import data_access
+
+    courses = [f"강의{i}" for i in range((size + WEEKS_PER_COURSE - 1) // WEEKS_PER_COURSE)]
+    created, created_wall = _timed_each(
+        lambda name: data_access.create_course_with_schedule(name, "2025-03-03"), courses
+    )
+    targets = [(courses[i // WEEKS_PER_COURSE], f"{i % WEEKS_PER_COURSE + 1}주차", synthetic_note(rng))
+               for i in range(size)]
+    saved, saved_wall = _timed_each(lambda target: data_access.save_note(*target), targets)
+
+    def load_cold(_):
+        data_access.clear_cache()
+        data_access.load_notes()
+
+    loads = range(min(50, max(5, size)))
+    cold, cold_wall = _timed_each(load_cold, loads)
+    # 변경이 없는 일반 rerun 처럼 캐시된 값을 다시 읽음
+    warm, warm_wall = _timed_each(lambda _: data_access.load_notes(), loads)
+    course_loads, course_wall = _timed_each(lambda _: data_access.load_courses(), loads)
+    # 사용자가 필기 하나를 고칠 때 (전체 노트가 있는 상태에서)
+    edits = [targets[rng.randrange(size)] for _ in loads]
+    edited, edited_wall = _timed_each(lambda target: data_access.save_note(target[0], target[1], target[2] + " 수정"), edits)
+    return [
+        _summarize_ops("create_course", created, created_wall),
+        _summarize_ops("save_note", saved, saved_wall),
+        _summarize_ops("load_notes_cold", cold, cold_wall),
+        _summarize_ops("load_notes", warm, warm_wall),
+        _summarize_ops("load_courses", course_loads, course_wall),
+        _summarize_ops("edit_note", edited, edited_wall),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """baseline 보다 p95 가 tolerance(비율) 넘게 느려지거나 처리량이 그만큼 줄어든 항목 목록."""
+    old_ops = {
+        (run["stage"], run["size"], op["op"]): op
+        for run in baseline.get("runs", []) for op in run["ops"]
+    }
+    regressions = []
+    for run in report["runs"]:
+        for op in run["ops"]:
+            old = old_ops.get((run["stage"], run["size"], op["op"]))
+            if old is None:
+                continue
+            name = f"{run['stage']}[{run['size']}].{op['op']}"
+            if old["p95_ms"] > 0 and op["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} p95: {old['p95_ms']:.2f}ms -> {op['p95_ms']:.2f}ms")
+            if op["throughput"] * (1 + tolerance) < old["throughput"]:
+                regressions.append(f"{name} 처리량: {old['throughput']:.1f}/s -> {op['throughput']:.1f}/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전체 필기 흐름 벤치마크")
+    parser.add_argument("--notes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="저장소 단계의 필기 수")
+    parser.add_argument("--images", type=int, default=5, help="OCR 단계의 합성 판서 이미지 수")
+    parser.add_argument("--summaries", type=int, default=20, help="요약 단계의 필기 수")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="스텁 LLM 응답 지연(초)")
+    parser.add_argument("--font", help="합성 이미지에 쓸 한글 글꼴 경로 (없으면 시스템에서 찾음)")
+    parser.add_argument("--skip", nargs="*", default=[], choices=STAGES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    options = {"seed": args.seed, "font": args.font, "llm_latency": args.llm_latency}
+    plan = []
+    if "ocr" not in args.skip:
+        plan.append(("ocr", args.images))
+    if "summarize" not in args.skip:
+        plan.append(("summarize", args.summaries))
+    if "storage" not in args.skip:
+        plan.extend(("storage", size) for size in args.notes)
+    if "ocr" not in args.skip and not find_font(args.font):
+        print("한글 글꼴을 찾지 못해 OCR 정확도는 계산하지 않습니다 (--font 로 지정).", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created_at": time.time(),
+            "options": vars(args),
+        },
+        "runs": [],
+    }
+    for stage, size in plan:
+        # 단계마다 새 프로세스 (최대 RSS와 모듈 캐시가 섞이지 않게)
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            try:
+                run = pool.submit(_run_stage, stage, size, options).result()
+            except Exception as e:
+                print(f"{stage}[{size}]: 실행 실패 ({e})", file=sys.stderr)
+                report["runs"].append({"stage": stage, "size": size, "error": str(e), "ops": []})
+                continue
+        report["runs"].append(run)
+        print(f"{stage}[{size}]  최대 RSS {run['peak_rss_mb']:.0f}MB  디스크 {run['disk_bytes'] / 1024:.0f}KB")
+        for op in run["ops"]:
+            print(f"    {op['op']:<22}{op['count']:>7}회 {op['throughput']:>10.1f}/s"
+                  f"  p50 {op['p50_ms']:>9.2f}ms  p95 {op['p95_ms']:>9.2f}ms  p99 {op['p99_ms']:>9.2f}ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failed = any("error" in run for run in report["runs"])
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"느려짐: {line}")
+        return 1 if regressions or failed else 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
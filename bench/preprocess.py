@@ -0,0 +1,131 @@
+"""OCR 전처리 전/후 비교 벤치마크.
+
+사용법:
+    python -m bench.preprocess samples/ [--max-long-edge 1600] [--no-crop] [--json out.json]
+
+samples/ 안의 이미지마다 같은 이름의 .txt 파일(정답 텍스트)이 있으면 문자 정확도도 계산합니다.
+모드마다 별도 프로세스에서 실행해서 최대 메모리(RSS)를 따로 측정합니다.
+"""
+import argparse
+import difflib
+import json
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg')
+
+
+def char_accuracy(expected, actual):
+    """공백을 제외한 문자 기준 정확도 (1 - 편집거리 / 정답 길이)."""
+    expected = "".join(expected.split())
+    actual = "".join(actual.split())
+    if not expected:
+        return 1.0 if not actual else 0.0
+    try:
+        from rapidfuzz.distance import Levenshtein
+        distance = Levenshtein.distance(expected, actual)
+    except ImportError:
+        matcher = difflib.SequenceMatcher(None, expected, actual, autojunk=False)
+        distance = max(len(expected), len(actual)) - sum(b.size for b in matcher.get_matching_blocks())
+    return max(0.0, 1.0 - distance / len(expected))
+
+
+def _run_mode(mode, paths, ocr_settings, preprocess_settings):
+    from paddleocr import PaddleOCR
+    from preprocess import preprocess_image
+
+    ocr = PaddleOCR(**ocr_settings, use_gpu=False, show_log=False)
+    # 모델 워밍업 (첫 호출 비용은 측정에서 제외)
+    if paths:
+        ocr.ocr(paths[0])
+
+    rows = []
+    for path in paths:
+        start = time.perf_counter()
+        if mode == 'raw':
+            result = ocr.ocr(path)
+        else:
+            result = ocr.ocr(preprocess_image(path, preprocess_settings))
+        elapsed = time.perf_counter() - start
+        lines = [line[1][0] for line in result[0]] if result and result[0] else []
+        rows.append({"path": path, "seconds": elapsed, "text": "\n".join(lines)})
+
+    # 리눅스에서 ru_maxrss 단위는 KB
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"mode": mode, "rows": rows, "peak_rss_mb": peak_rss_kb / 1024}
+
+
+def _summarize(report):
+    seconds = [r["seconds"] for r in report["rows"]]
+    accuracies = [r["accuracy"] for r in report["rows"] if r.get("accuracy") is not None]
+    return {
+        "mode": report["mode"],
+        "images": len(seconds),
+        "mean_s": statistics.mean(seconds) if seconds else 0.0,
+        "median_s": statistics.median(seconds) if seconds else 0.0,
+        "peak_rss_mb": report["peak_rss_mb"],
+        "char_accuracy": statistics.mean(accuracies) if accuracies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 전처리 전/후 벤치마크")
+    parser.add_argument("sample_dir")
+    parser.add_argument("--max-long-edge", type=int, default=1600)
+    parser.add_argument("--no-grayscale", action="store_true")
+    parser.add_argument("--no-crop", action="store_true")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    paths = sorted(
+        os.path.join(args.sample_dir, name)
+        for name in os.listdir(args.sample_dir)
+        if name.lower().endswith(IMAGE_EXTS)
+    )
+    if not paths:
+        print("샘플 이미지가 없습니다.", file=sys.stderr)
+        return 1
+
+    ocr_settings = {"lang": "korean", "use_angle_cls": True}
+    preprocess_settings = {
+        "max_long_edge": args.max_long_edge,
+        "grayscale": not args.no_grayscale,
+        "crop_board": not args.no_crop,
+    }
+
+    reports = []
+    for mode in ('raw', 'preprocessed'):
+        # 모드마다 새 프로세스에서 실행해서 최대 RSS가 섞이지 않게 함
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            reports.append(pool.submit(_run_mode, mode, paths, ocr_settings, preprocess_settings).result())
+
+    for report in reports:
+        for row in report["rows"]:
+            truth_path = os.path.splitext(row["path"])[0] + ".txt"
+            if os.path.exists(truth_path):
+                with open(truth_path, 'r', encoding='utf-8') as f:
+                    row["accuracy"] = char_accuracy(f.read(), row["text"])
+
+    summaries = [_summarize(r) for r in reports]
+    print(f"{'mode':<14}{'images':>8}{'mean(s)':>10}{'median(s)':>11}{'peakRSS(MB)':>13}{'accuracy':>10}")
+    for s in summaries:
+        acc = f"{s['char_accuracy']:.3f}" if s["char_accuracy"] is not None else "-"
+        print(f"{s['mode']:<14}{s['images']:>8}{s['mean_s']:>10.3f}{s['median_s']:>11.3f}{s['peak_rss_mb']:>13.1f}{acc:>10}")
+
+    raw, pre = summaries
+    if pre["mean_s"]:
+        print(f"속도 향상: x{raw['mean_s'] / pre['mean_s']:.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"settings": preprocess_settings, "summaries": summaries, "reports": reports}, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
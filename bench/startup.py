@@ -0,0 +1,150 @@
+"""앱 시작 시간(모듈 import)과 첫 OCR 요청 지연 측정.
+
+사용법:
+    python -m bench.startup [--image board.jpg] [--json out.json] [--baseline base.json]
+
+각 측정은 새 파이썬 프로세스에서 실행해서 이미 불러온 모듈의 영향을 받지 않습니다.
+--baseline 을 주면 이전 결과와 비교해서 허용치(--tolerance)보다 느려진 항목을 표시하고 종료 코드 1을 반환합니다.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+APPS = ('app.py', 'app_ver_2.py')
+OCR_SETTINGS = {"lang": "korean", "use_angle_cls": True}
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+_FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import ocr_engine
+settings, image = json.loads(sys.argv[1]), sys.argv[2]
+imported = time.perf_counter()
+ocr = ocr_engine.get_ocr(settings, use_gpu=False)
+built = time.perf_counter()
+ocr.ocr(image)
+first = time.perf_counter()
+ocr.ocr(image)
+second = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "build_s": built - imported,
+    "first_ocr_s": first - built,
+    "warm_ocr_s": second - first,
+    "first_request_s": first - start,
+}))
+"""
+
+
+def top_level_imports(path):
+    """앱 파일 맨 위에서 불러오는 모듈 이름 목록."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def _run(args):
+    output = subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+    return output.stdout, output.stderr
+
+
+def slowest_imports(modules, limit=10):
+    """python -X importtime 결과에서 누적 시간이 가장 긴 모듈들."""
+    _, stderr = _run(["-X", "importtime", "-c", _IMPORT_SCRIPT, *modules])
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # 첫 줄은 머리글(self [us] | cumulative | imported package)
+        if cumulative_us.strip().isdigit():
+            rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": us / 1000} for us, name in rows[:limit]]
+
+
+def _sample_image():
+    from PIL import Image, ImageDraw
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "sample.png")
+    img = Image.new('RGB', (1200, 400), (40, 40, 40))
+    draw = ImageDraw.Draw(img)
+    for i in range(4):
+        draw.text((60, 60 + i * 80), f"Sample board line {i + 1}", fill=(235, 235, 235))
+    img.save(path)
+    return path
+
+
+def compare(report, baseline, tolerance):
+    """baseline 보다 tolerance(비율) 넘게 느려진 항목 목록."""
+    regressions = []
+    for section in ("imports", "first_request"):
+        for name, value in report.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if isinstance(value, dict):
+                value, old = value.get("seconds"), (old or {}).get("seconds")
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old > 0:
+                if value > old * (1 + tolerance):
+                    regressions.append(f"{section}.{name}: {old:.2f}s -> {value:.2f}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="앱 시작/첫 요청 지연 측정")
+    parser.add_argument("--image", help="첫 OCR 요청에 쓸 이미지 (없으면 합성 이미지)")
+    parser.add_argument("--no-ocr", action="store_true", help="첫 OCR 요청 측정 생략")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = {"imports": {}, "first_request": {}}
+    for app in APPS:
+        modules = top_level_imports(app)
+        stdout, _ = _run(["-c", _IMPORT_SCRIPT, *modules])
+        report["imports"][app] = {
+            "seconds": json.loads(stdout)["seconds"],
+            "slowest": slowest_imports(modules),
+        }
+        print(f"{app:<14} import {report['imports'][app]['seconds']:.2f}s")
+        for row in report["imports"][app]["slowest"][:5]:
+            print(f"    {row['module']:<40} {row['cumulative_ms']:8.1f}ms")
+
+    if not args.no_ocr:
+        stdout, _ = _run(["-c", _FIRST_REQUEST_SCRIPT, json.dumps(OCR_SETTINGS), args.image or _sample_image()])
+        report["first_request"] = json.loads(stdout)
+        for name, seconds in report["first_request"].items():
+            print(f"{name:<16} {seconds:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"느려짐: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
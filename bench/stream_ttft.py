@@ -0,0 +1,75 @@
+"""스트리밍 요약의 첫 토큰 시간(TTFT)과 전체 시간을 비스트리밍 호출과 비교합니다 (로컬 스텁 서버 사용).
+
+    python -m bench.stream_ttft --runs 5 --latency 0.5 --token-latency 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench.fake_llm import start_server
+
+
+def _measure_stream(tokens):
+    start = time.perf_counter()
+    first = None
+    for _ in tokens:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def _measure_call(call):
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    # 비스트리밍은 응답이 다 와야 화면에 보이므로 첫 표시 시간 = 전체 시간
+    return elapsed, elapsed
+
+
+def _report(name, samples):
+    ttft = [s[0] for s in samples]
+    total = [s[1] for s in samples]
+    print(f"{name:<22} 첫 표시 {statistics.median(ttft) * 1000:8.1f}ms   전체 {statistics.median(total) * 1000:8.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스트리밍 요약 TTFT 측정")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5, help="첫 응답 전 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.05, help="토큰마다 지연(초)")
+    args = parser.parse_args(argv)
+
+    server, url = start_server(latency=args.latency, token_latency=args.token_latency)
+    # openai / summarizer 를 불러오기 전에 주소와 캐시 위치를 바꿔둠
+    os.environ["OPENAI_API_BASE"] = f"{url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    os.environ["HF_API_URL"] = f"{url}/hf"
+    os.environ["SUMMARY_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "summaries.db")
+    import summarizer
+
+    # 캐시에 걸리지 않도록 매번 다른 텍스트를 씀
+    def text(kind, i):
+        return f"{kind} {i}: 통계학2 3주차 판서 내용입니다. 표본분포와 중심극한정리, 신뢰구간을 다룹니다."
+
+    results = {
+        "OpenAI 비스트리밍": [_measure_call(lambda i=i: summarizer.summarize_text(text("a", i), "통계학2"))
+                          for i in range(args.runs)],
+        "OpenAI 스트리밍": [_measure_stream(summarizer.stream_summary(text("b", i), "통계학2"))
+                         for i in range(args.runs)],
+        "Zephyr 비스트리밍": [_measure_call(lambda i=i: summarizer.summarize_text_with_zephyr(text("c", i)))
+                          for i in range(args.runs)],
+        "Zephyr 스트리밍": [_measure_stream(summarizer.stream_summary_with_zephyr(text("d", i)))
+                         for i in range(args.runs)],
+    }
+    for name, samples in results.items():
+        _report(name, samples)
+    print(f"기록된 TTFT 표본: { {k: len(v) for k, v in summarizer.ttft_stats().items()} }")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
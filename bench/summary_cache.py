@@ -0,0 +1,48 @@
+"""요약 캐시와 동일 요청 합치기 확인용 스크립트 (로컬 스텁 서버 사용).
+
+    python -m bench.summary_cache --sessions 20 --latency 1.0
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_llm import start_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="요약 캐시 / 요청 합치기 확인")
+    parser.add_argument("--sessions", type=int, default=20, help="동시에 같은 요약을 요청할 세션 수")
+    parser.add_argument("--latency", type=float, default=1.0, help="스텁 서버 응답 지연(초)")
+    args = parser.parse_args(argv)
+
+    server, url = start_server(latency=args.latency)
+    # openai / summarizer 를 불러오기 전에 주소와 캐시 위치를 바꿔둠
+    os.environ["OPENAI_API_BASE"] = f"{url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    os.environ["SUMMARY_CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "summaries.db")
+    import summarizer
+    import summary_cache
+
+    text = "통계학2 3주차 판서 내용입니다. 표본분포와 중심극한정리를 다룹니다."
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        results = list(pool.map(lambda _: summarizer.summarize_text(text, "통계학2"), range(args.sessions)))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summarizer.summarize_text(text, "통계학2")
+    warm = time.perf_counter() - start
+
+    print(f"동시 요청 {args.sessions}개 -> 스텁 서버 호출 {server.calls}회, {cold:.3f}s")
+    print(f"캐시 적중 요청: {warm * 1000:.2f}ms")
+    print(f"캐시 통계: {summary_cache.cache_stats()}")
+    server.shutdown()
+    return 0 if server.calls == 1 and len(set(results)) == 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
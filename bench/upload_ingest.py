@@ -0,0 +1,242 @@
+"""업로드 처리 벤치마크: 예전 방식(getvalue 로 통째 복사) vs 조각 단위 저장 + 한 번만 디코딩.
+
+사용법:
+    python -m bench.upload_ingest [--images 20] [--width 4000] [--height 3000] [--json out.json]
+
+합성 사진(JPEG)을 만들어 두고 모드마다 새 프로세스와 빈 작업 폴더에서 페이지의 업로드 처리
+(블롭 저장, 카탈로그 기록, 썸네일)와 OCR 입력 준비(캐시 키, 전처리)까지를 실행합니다. OCR 엔진은 돌리지 않습니다.
+업로드 파일은 Streamlit 처럼 메모리의 버퍼(BytesIO)로 주어지며, 버퍼를 다 읽은 뒤의 RSS 를 기준으로
+처리 중 늘어난 최대 RSS, 이미지당 전체 바이트 복사(getvalue/파일 전체 읽기) 수와
+실제 디코딩 수, 이미 저장한 사진으로 rerun 했을 때의 업로드 처리 시간, 저장한 사진을 다시 OCR 할 때
+(OCR 캐시 미스, 배치, 작업 워커) OCR 입력을 준비하는 시간을 비교합니다.
+    legacy  getvalue -> put_blob -> add_image(data) -> make_thumbnails(data) -> read_source -> preprocess_image(bytes)
+    stream  image_ingest.ingest_upload -> ocr_cache.source_key(경로) -> image_ingest.ocr_image(전처리해 둔 배열)
+"""
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MODES = ("legacy", "stream")
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _status_mb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # 리눅스가 아니면 ru_maxrss (macOS 는 바이트 단위)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak():
+    # 리눅스에서 최대 RSS(VmHWM)를 지금 RSS 로 되돌림 (버퍼를 읽는 동안의 최대치를 빼기 위해)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def photo(rng, width, height):
+    """칠판 사진 비슷한 합성 이미지 (조명 그라데이션 + 판서 선 + 센서 잡음) JPEG 바이트."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 40 + 30 * (x / width) + 20 * (y / height)
+    img = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        draw.line([(x0, y0), (x0 + rng.randrange(-400, 400), y0 + rng.randrange(-60, 60))],
+                  fill=(230, 230, 220), width=max(2, width // 600))
+    arr = np.asarray(img).astype(np.int16)
+    noise = np.random.default_rng(rng.randrange(1 << 30)).integers(-6, 7, arr.shape, dtype=np.int16)
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(arr + noise, 0, 255).astype(np.uint8)).save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+class _Upload(io.BytesIO):
+    """Streamlit UploadedFile 처럼 name 과 getvalue 가 있는 메모리 버퍼 (getvalue 호출 수를 셈)."""
+    copies = 0
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+    def getvalue(self):
+        _Upload.copies += 1
+        return super().getvalue()
+
+
+def _run(mode, paths, workdir):
+    os.chdir(workdir)
+    os.environ["STUDIO_DB"] = os.path.join(workdir, "studio.db")
+    from PIL import ImageFile
+
+    import blob_store
+    import image_catalog
+    import image_ingest
+    import ocr_cache
+    import thumbnails
+    from preprocess import cache_settings, preprocess_image
+
+    counts = {"decodes": 0, "file_reads": 0}
+    load = ImageFile.ImageFile.load
+
+    def counting_load(self):
+        # 아직 디코딩하지 않은 이미지를 처음 불러올 때만 셈
+        if self.tile:
+            counts["decodes"] += 1
+        return load(self)
+
+    ImageFile.ImageFile.load = counting_load
+    read_source = ocr_cache.read_source
+
+    def counting_read_source(source):
+        if isinstance(source, str):
+            counts["file_reads"] += 1
+        return read_source(source)
+
+    ocr_cache.read_source = counting_read_source
+
+    image_catalog.get_conn()
+    settings = cache_settings({"lang": "korean", "use_angle_cls": True})
+    # 처음 불러오는 모듈(cv2, 이미지 플러그인)의 메모리가 측정에 섞이지 않도록 작은 사진으로 미리 한 번 실행
+    preprocess_image(photo(random.Random(0), 64, 48))
+    counts["decodes"] = 0
+    uploads = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            uploads.append(_Upload(f.read(), os.path.basename(path)))
+    reset = _reset_peak()
+    baseline = _status_mb("VmRSS") if reset else _status_mb("VmHWM")
+
+    seconds = []
+    stored = []
+    start = time.perf_counter()
+    for upload in uploads:
+        t0 = time.perf_counter()
+        if mode == "legacy":
+            data = upload.getvalue()
+            _, path, created = blob_store.put_blob(data, upload.name)
+            image_catalog.add_image(path, "벤치", "1주차", original_name=upload.name, data=data)
+            if created:
+                thumbnails.make_thumbnails(path, data=data)
+            del data
+            data = ocr_cache.read_source(upload)
+            key = ocr_cache.make_key(data, settings)
+            img = preprocess_image(data)
+            stored.append(path)
+        else:
+            path = image_ingest.ingest_upload(upload, "벤치", "1주차")
+            key, data = ocr_cache.source_key(path, settings)
+            img = image_ingest.ocr_image(path, data)
+        stored.append(path)
+        del data, img, key
+        seconds.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+    peak = _status_mb("VmHWM")
+    n = len(uploads)
+    copies, decodes = _Upload.copies + counts["file_reads"], counts["decodes"]
+
+    # Streamlit 은 버튼을 누를 때마다 업로드 처리 부분을 다시 실행함 (이미 저장한 사진)
+    rerun = time.perf_counter()
+    for upload in uploads:
+        if mode == "legacy":
+            data = upload.getvalue()
+            _, path, created = blob_store.put_blob(data, upload.name)
+            image_catalog.add_image(path, "벤치", "1주차", original_name=upload.name, data=data)
+            del data
+        else:
+            image_ingest.ingest_upload(upload, "벤치", "1주차")
+    rerun = time.perf_counter() - rerun
+
+    # 저장한 사진을 다시 OCR 할 때의 입력 준비 (예전에는 파일을 읽어서 다시 디코딩, 전처리)
+    ocr_input = time.perf_counter()
+    for path in stored:
+        if mode == "legacy":
+            img = preprocess_image(ocr_cache.read_source(path))
+        else:
+            img = image_ingest.ocr_image(path)
+        del img
+    ocr_input = time.perf_counter() - ocr_input
+
+    return {
+        "mode": mode,
+        "images": n,
+        "seconds": wall,
+        "p50_ms": _percentile(seconds, 0.5) * 1000,
+        "p95_ms": _percentile(seconds, 0.95) * 1000,
+        "rerun_ms": rerun / n * 1000,
+        "ocr_input_ms": ocr_input / n * 1000,
+        "upload_mb": sum(len(upload.getbuffer()) for upload in uploads) / (1024 * 1024),
+        "peak_rss_growth_mb": max(0.0, peak - baseline),
+        "copies_per_image": copies / n,
+        "decodes_per_image": decodes / n,
+        "disk_mb": _dir_bytes(workdir) / (1024 * 1024),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="업로드 처리 벤치마크")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sample_dir = tempfile.mkdtemp(prefix="upload-samples-")
+    paths = []
+    for i in range(args.images):
+        path = os.path.join(sample_dir, f"photo{i:03d}.jpg")
+        with open(path, 'wb') as f:
+            f.write(photo(rng, args.width, args.height))
+        paths.append(path)
+
+    results = []
+    for mode in MODES:
+        # 모드마다 새 프로세스에서 실행해서 최대 RSS 를 따로 측정
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as pool:
+            results.append(pool.submit(_run, mode, paths, tempfile.mkdtemp(prefix=f"upload-{mode}-")).result())
+
+    print(f"{args.images}장, {args.width}x{args.height}, 업로드 {results[0]['upload_mb']:.1f}MB")
+    print(f"{'mode':<8}{'total(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'rerun(ms)':>10}{'ocr_in(ms)':>11}{'RSS+(MB)':>10}"
+          f"{'copies':>8}{'decodes':>9}{'disk(MB)':>10}")
+    for row in results:
+        print(f"{row['mode']:<8}{row['seconds']:>10.2f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+              f"{row['rerun_ms']:>10.1f}{row['ocr_input_ms']:>11.1f}{row['peak_rss_growth_mb']:>10.1f}{row['copies_per_image']:>8.1f}{row['decodes_per_image']:>9.1f}"
+              f"{row['disk_mb']:>10.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""내용 주소 기반 이미지 저장소.
+
+이미지 바이트는 sha256 해시 이름으로 한 번만 저장하고(images/blobs/ab/<해시>.jpg),
+강의/주차 항목은 이미지 카탈로그에서 해시를 가리킵니다.
+같은 사진을 다시 올리거나 rerun이 반복되어도 추가로 쓰지 않습니다.
+
+    python blob_store.py migrate   # 기존 images/, users/*/images 파일을 블롭으로 합치기
+    python blob_store.py gc        # 어떤 항목도 가리키지 않는 블롭 지우기
+"""
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+
+BLOB_DIR = os.path.join('images', 'blobs')
+# 업로드 도중(블롭 저장 ~ 카탈로그 기록 사이)인 블롭을 지우지 않도록 두는 유예 시간(초)
+GC_GRACE_SECONDS = 600
+
+_EXT_ALIASES = {'.jpeg': '.jpg'}
+
+
+def _normalize_ext(name):
+    ext = os.path.splitext(name or '')[1].lower() or '.jpg'
+    return _EXT_ALIASES.get(ext, ext)
+
+
+def blob_path(content_hash, ext='.jpg'):
+    return os.path.join(BLOB_DIR, content_hash[:2], f"{content_hash}{ext}")
+
+
+def is_blob_path(path):
+    return os.path.normpath(path).startswith(os.path.normpath(BLOB_DIR) + os.sep)
+
+
+def put_blob(data, name=None):
+    """바이트를 블롭으로 저장하고 (해시, 경로, 새로 썼는지)를 반환합니다."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = blob_path(content_hash, _normalize_ext(name))
+    if os.path.exists(path):
+        return content_hash, path, False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return content_hash, path, True
+
+
+def _chunks(fileobj, chunk_size):
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        yield chunk
+
+
+def put_stream(fileobj, name=None, chunk_size=1024 * 1024):
+    """파일 객체를 chunk_size 씩 읽으면서 해시하고 블롭으로 저장합니다.
+    전체를 한 번에 bytes 로 만들지 않습니다. (해시, 경로, 새로 썼는지, 바이트 수)를 반환합니다."""
+    ext = _normalize_ext(name or getattr(fileobj, 'name', None))
+    if getattr(fileobj, 'seekable', lambda: False)():
+        # 업로드 버퍼처럼 다시 읽을 수 있으면 먼저 해시만 계산해서, 이미 있는 블롭은 디스크에 쓰지 않음 (rerun)
+        h = hashlib.sha256()
+        size = 0
+        for chunk in _chunks(fileobj, chunk_size):
+            h.update(chunk)
+            size += len(chunk)
+        content_hash = h.hexdigest()
+        path = blob_path(content_hash, ext)
+        if os.path.exists(path):
+            return content_hash, path, False, size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in _chunks(fileobj, chunk_size):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        return content_hash, path, True, size
+
+    # 한 번만 읽을 수 있으면 해시하면서 임시 파일에 쓰고, 이미 있는 내용이면 임시 파일을 지움
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    tmp_path = os.path.join(BLOB_DIR, f"upload.{os.getpid()}.{threading.get_ident()}.tmp")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        content_hash = h.hexdigest()
+        path = blob_path(content_hash, ext)
+        created = not os.path.exists(path)
+        if created:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return content_hash, path, created, size
+
+
+def _remove_with_thumbnails(path):
+    import thumbnails
+
+    for size in thumbnails.THUMB_SIZES:
+        try:
+            os.remove(thumbnails.thumbnail_path(path, size))
+        except OSError:
+            pass
+    os.remove(path)
+
+
+def collect_garbage(grace_seconds=GC_GRACE_SECONDS):
+    """카탈로그에서 참조하지 않는 블롭과 그 썸네일을 지우고, 되찾은 바이트 수를 반환합니다."""
+    import image_catalog
+
+    referenced = {
+        row[0] for row in image_catalog.get_conn().execute("SELECT DISTINCT content_hash FROM images")
+    }
+    cutoff = time.time() - grace_seconds
+    reclaimed = 0
+    if not os.path.isdir(BLOB_DIR):
+        return 0
+    for prefix in os.listdir(BLOB_DIR):
+        prefix_dir = os.path.join(BLOB_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for filename in os.listdir(prefix_dir):
+            path = os.path.join(prefix_dir, filename)
+            if not os.path.isfile(path) or filename.endswith('.tmp'):
+                continue
+            content_hash = os.path.splitext(filename)[0]
+            if content_hash in referenced:
+                continue
+            try:
+                st = os.stat(path)
+                if st.st_mtime > cutoff:
+                    continue
+                _remove_with_thumbnails(path)
+                reclaimed += st.st_size
+            except OSError:
+                pass
+    return reclaimed
+
+
+def migrate_legacy_images():
+    """기존 타임스탬프 파일들을 블롭으로 옮기고 중복을 합칩니다. (옮긴 파일 수, 지운 중복 수)를 반환합니다."""
+    import image_catalog
+
+    legacy = []
+    for username, image_dir in image_catalog.image_dirs():
+        if not os.path.isdir(image_dir):
+            continue
+        for filename in os.listdir(image_dir):
+            if not filename.lower().endswith(image_catalog.IMAGE_EXTS):
+                continue
+            parsed = image_catalog.parse_filename(filename)
+            if parsed is None:
+                continue
+            lecture, week, uploaded_at, original_name = parsed
+            legacy.append((uploaded_at, username, lecture, week, original_name, os.path.join(image_dir, filename)))
+
+    # 가장 먼저 올린 사진의 업로드 시각이 남도록 오래된 순서로 처리
+    legacy.sort()
+    moved = 0
+    duplicates = 0
+    conn = image_catalog.get_conn()
+    for uploaded_at, username, lecture, week, original_name, path in legacy:
+        with open(path, 'rb') as f:
+            data = f.read()
+        _, new_path, _ = put_blob(data, original_name or path)
+        with image_catalog.storage.transaction(conn):
+            conn.execute("DELETE FROM images WHERE path = ?", (path,))
+            added = image_catalog.insert_image(conn, new_path, lecture, week, original_name, data, username, uploaded_at)
+        if added:
+            moved += 1
+        else:
+            duplicates += 1
+        _remove_with_thumbnails(path)
+        thumb_dir = os.path.join(os.path.dirname(path), 'thumbs')
+        if os.path.isdir(thumb_dir) and not os.listdir(thumb_dir):
+            shutil.rmtree(thumb_dir, ignore_errors=True)
+    return moved, duplicates
+
+
+if __name__ == "__main__":
+    command = sys.argv[1:]
+    if command == ["migrate"]:
+        moved, duplicates = migrate_legacy_images()
+        print(f"{moved}개 이미지를 블롭으로 옮기고 중복 {duplicates}개를 정리했습니다.")
+    elif command == ["gc"]:
+        print(f"{collect_garbage() / (1024 * 1024):.1f}MB를 정리했습니다.")
+    else:
+        print("사용법: python blob_store.py migrate | gc")
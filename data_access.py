@@ -0,0 +1,252 @@
+"""강의/필기 데이터 접근 계층 (프로세스 내 캐시 + write-through).
+
+읽기는 storage 의 데이터 버전(versions 테이블)만 확인하고, 버전이 같으면
+메모리에 있는 값을 그대로 돌려줍니다. 버전 행은 SQLite 페이지 캐시에 남아 있으므로
+변경이 없는 일반 rerun에서는 디스크를 읽지 않습니다.
+쓰기는 storage 에 반영한 뒤 같은 버전으로 캐시를 갱신하고, 다른 프로세스가 쓴 경우에는
+버전이 달라지므로 다음 읽기에서 다시 불러옵니다.
+
+강의/주차 선택 목록처럼 데이터에서 계산한 값도 같은 버전 동안 캐시합니다 (_derived).
+
+반환되는 dict는 캐시와 공유되므로 읽기 전용으로 다뤄야 합니다.
+"""
+import copy
+import threading
+
+import schedule
+import storage
+
+_cache = {}
+_derived_cache = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _count(name, kind):
+    stat = _stats.setdefault(name, {"hits": 0, "misses": 0})
+    stat[kind] += 1
+
+
+def _cached(name, loader):
+    # 버전을 먼저 읽고 데이터를 읽어야 오래된 값이 새 버전으로 저장되지 않음
+    version = storage.get_version(name)
+    with _lock:
+        entry = _cache.get(name)
+        if entry is not None and entry[0] == version:
+            _count(name, "hits")
+            return entry[1]
+        _count(name, "misses")
+
+    value = loader()
+    with _lock:
+        _cache[name] = (version, value)
+    return value
+
+
+def _write_through(name, new_version, update):
+    """방금 쓴 내용을 캐시에 반영합니다. 중간에 다른 쓰기가 있었으면 캐시를 버립니다."""
+    with _lock:
+        entry = _cache.get(name)
+        if entry is not None and new_version is not None and entry[0] == new_version - 1:
+            _cache[name] = (new_version, update(entry[1]))
+        else:
+            _cache.pop(name, None)
+
+
+def _derived(name, key, build):
+    """name 데이터에서 계산한 값을 같은 데이터 버전 동안 캐시합니다."""
+    version = storage.get_version(name)
+    with _lock:
+        entry = _derived_cache.get(name)
+        if entry is not None and entry[0] == version and key in entry[1]:
+            _count(f"{name}_derived", "hits")
+            return entry[1][key]
+        _count(f"{name}_derived", "misses")
+
+    value = build()
+    with _lock:
+        entry = _derived_cache.get(name)
+        if entry is None or entry[0] < version:
+            # 버전이 바뀌면 이전 버전에서 계산한 값(지운 강의 등)은 모두 버림
+            entry = _derived_cache[name] = (version, {})
+        if entry[0] == version:
+            entry[1][key] = value
+    return value
+
+
+def cache_stats():
+    """캐시 이름별 hit/miss 횟수를 반환합니다."""
+    with _lock:
+        return {name: dict(stat) for name, stat in _stats.items()}
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _derived_cache.clear()
+        _users.clear()
+
+
+# 필기 노트
+def load_notes(username=''):
+    return _cached(storage.notes_version_name(username), lambda: storage.load_notes(username))
+
+
+def save_note(lecture, week, note, username=''):
+    new_version = storage.save_note(lecture, week, note, username=username)
+
+    def update(notes):
+        # 캐시를 읽는 다른 스레드에 영향이 없도록 바뀐 부분만 복사해서 교체
+        notes = dict(notes)
+        notes[lecture] = dict(notes.get(lecture, {}), **{week: note})
+        return notes
+
+    _write_through(storage.notes_version_name(username), new_version, update)
+
+
+# 사용자 (로그인할 때 아이디 하나만 조회하고, 사용자 데이터 버전이 바뀌면 다시 읽음)
+_users = {}
+
+
+def get_user(username):
+    version = storage.get_version('users')
+    with _lock:
+        entry = _users.get(username)
+        if entry is not None and entry[0] == version:
+            _count('users', "hits")
+            return entry[1]
+        _count('users', "misses")
+
+    record = storage.get_user(username)
+    # 없는 아이디는 캐시하지 않음 (잘못 입력한 아이디로 캐시가 커지지 않도록)
+    if record is not None:
+        with _lock:
+            _users[username] = (version, record)
+    return record
+
+
+def create_user(username, record):
+    """새 사용자를 추가합니다. 이미 있는 아이디면 False."""
+    new_version = storage.create_user(username, record)
+    if new_version is None:
+        return False
+    with _lock:
+        # 다른 아이디의 캐시는 이전 버전으로 남으므로 다음 조회에서 다시 읽음
+        _users[username] = (new_version, dict(record))
+    return True
+
+
+# 강의
+def load_courses():
+    return _cached('courses', storage.load_courses)
+
+
+def save_courses(courses):
+    new_version = storage.save_courses(courses)
+    _write_through('courses', new_version, lambda _: copy.deepcopy(courses))
+
+
+def _save_course(course_name, schedule):
+    new_version = storage.save_course(course_name, schedule)
+
+    def update(courses):
+        courses = dict(courses)
+        courses[course_name] = schedule
+        return courses
+
+    _write_through('courses', new_version, update)
+
+
+def create_course_with_schedule(course_name, start_date_str, weeks=schedule.TERM_WEEKS):
+    """weeks 주차(기본 TERM_WEEKS) 강의를 만들고 날짜 정보를 포함합니다."""
+    courses = load_courses()
+
+    if course_name in courses:
+        return False
+
+    try:
+        _save_course(course_name, schedule.to_schedule(schedule.build(start_date_str, weeks)))
+        return True
+    except Exception as e:
+        print(f"Error creating course: {e}")
+        return False
+
+
+def _update_schedule(course_name, change):
+    # 캐시된 dict 는 건드리지 않고 Week 튜플로 바꿔서 고친 뒤 새 dict 로 저장
+    courses = load_courses()
+    if course_name not in courses:
+        return False
+    try:
+        _save_course(course_name, schedule.to_schedule(change(schedule.parse(courses[course_name]))))
+        return True
+    except Exception as e:
+        print(f"Error updating schedule: {e}")
+        return False
+
+
+def update_week_info(course_name, week_name, date_str=None, week_type=None):
+    """주차 정보를 업데이트합니다."""
+    try:
+        number = schedule.week_number(week_name)
+    except ValueError:
+        return False
+    return _update_schedule(course_name, lambda weeks: schedule.update_week(weeks, number, date_str, week_type))
+
+
+def shift_course_dates(course_name, days, first_week=1):
+    """first_week 주차부터 끝까지의 날짜를 days 일 옮깁니다."""
+    return _update_schedule(course_name, lambda weeks: schedule.shift(weeks, days, first_week))
+
+
+def mark_weeks(course_name, first_week, last_week, week_type):
+    """first_week ~ last_week 주차의 유형을 한 번에 바꿉니다."""
+    return _update_schedule(course_name, lambda weeks: schedule.mark(weeks, first_week, last_week, week_type))
+
+
+def resize_course(course_name, weeks):
+    """강의의 주차 수를 바꿉니다 (줄이면 뒤쪽 주차를 지우고, 늘리면 매주 이어서 만듦)."""
+    return _update_schedule(course_name, lambda current: schedule.resize(current, weeks))
+
+
+def import_courses(courses):
+    """{강의명: 일정 dict} 를 한 번에 등록합니다. 이미 있는 강의는 건너뛰고, 등록한 강의명 목록을 반환합니다."""
+    new_version, added = storage.add_courses(courses)
+
+    def update(cached):
+        cached = dict(cached)
+        for name in added:
+            cached[name] = courses[name]
+        return cached
+
+    if new_version is not None:
+        _write_through('courses', new_version, update)
+    return added
+
+
+# 강의/주차 선택 목록 (강의 데이터 버전마다 한 번만 만들어서 rerun 비용이 강의 수와 상관없음)
+def course_names():
+    return _derived('courses', 'names', lambda: tuple(load_courses()))
+
+
+def course_schedule(course_name):
+    """강의의 schedule.ScheduleView (주차 순서 목록, 표시명, 역참조). 없는 강의면 None."""
+    def build():
+        courses = load_courses()
+        return schedule.view(courses[course_name]) if course_name in courses else None
+
+    return _derived('courses', ('schedule', course_name), build)
+
+
+def remove_course(course_name):
+    new_version = storage.delete_course(course_name)
+    if new_version is None:
+        return False
+
+    def update(courses):
+        courses = dict(courses)
+        courses.pop(course_name, None)
+        return courses
+
+    _write_through('courses', new_version, update)
+    return True
@@ -0,0 +1,221 @@
+"""강의 이미지 카탈로그.
+
+이미지를 저장할 때 강의, 주차, 업로드 시각, 원본 파일명, 내용 해시, 크기, 경로를 기록해서
+"강의/주차의 최근 이미지 N개"를 디렉터리 전체 스캔 없이 인덱스로 찾습니다.
+같은 강의/주차에 같은 내용(해시)의 이미지는 한 번만 기록됩니다 (blob_store 참고).
+이전 방식의 타임스탬프 파일을 다시 등록하고 사라진 파일을 정리하려면:
+    python image_catalog.py rebuild
+"""
+import hashlib
+import io
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import storage
+
+# app_ver_2.py 의 공용 이미지 폴더와 app.py 의 사용자별 이미지 폴더
+SHARED_IMAGE_DIR = 'images'
+USERS_DIR = 'users'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL DEFAULT '',
+    lecture TEXT NOT NULL,
+    week TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    original_name TEXT,
+    content_hash TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    path TEXT NOT NULL,
+    UNIQUE (username, lecture, week, content_hash)
+);
+CREATE INDEX IF NOT EXISTS images_lecture_week ON images(username, lecture, week, uploaded_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS images_content_hash ON images(content_hash);
+"""
+SCHEMA_VERSION = '2'
+
+
+# {강의}_{주차}_{업로드 시각}_{원본 파일명} 또는 {강의}_{주차}_{업로드 시각}.jpg
+_FILENAME_RE = re.compile(
+    r"^(?P<lecture>.+)_(?P<week>[^_]+)_(?P<ts>\d{4}-\d{2}-\d{2}T\d{2}_\d{2}_\d{2}(?:\.\d+)?)"
+    r"(?:_(?P<name>.+)|\.[A-Za-z]+)$"
+)
+
+_ready = set()
+
+
+def get_conn():
+    conn = storage.get_conn()
+    key = (os.getpid(), storage.DB_PATH)
+    if key not in _ready:
+        _create_schema(conn)
+        _ready.add(key)
+        _ensure_built(conn)
+    return conn
+
+
+def _create_schema(conn):
+    with storage.transaction(conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'image_catalog_schema'").fetchone()
+        if row and row["value"] == SCHEMA_VERSION:
+            return
+        # 버전 1 테이블(path UNIQUE)은 여러 항목이 같은 블롭을 가리킬 수 없으므로 새 스키마로 옮김
+        old = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images'").fetchone()
+        if old:
+            conn.execute("ALTER TABLE images RENAME TO images_v1")
+            conn.execute("DROP INDEX IF EXISTS images_lecture_week")
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        if old:
+            conn.execute(
+                "INSERT OR IGNORE INTO images "
+                "(username, lecture, week, uploaded_at, original_name, content_hash, width, height, path) "
+                "SELECT username, lecture, week, uploaded_at, original_name, content_hash, width, height, path "
+                "FROM images_v1 ORDER BY uploaded_at, id"
+            )
+            conn.execute("DROP TABLE images_v1")
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('image_catalog_schema', ?)", (SCHEMA_VERSION,)
+        )
+
+
+def _image_info(data):
+    from PIL import Image
+    # 헤더만 읽어서 크기를 구함 (전체 디코딩 없음)
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+    return hashlib.sha256(data).hexdigest(), width, height
+
+
+def _image_size(path):
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+
+def insert_image(conn, path, lecture, week, original_name, data, username, uploaded_at, content_hash=None):
+    """카탈로그에 항목을 추가합니다. 같은 강의/주차에 같은 내용이 이미 있으면 False.
+    content_hash 를 알면 data 없이 파일 헤더에서 크기만 읽습니다."""
+    if content_hash is not None:
+        width, height = _image_size(path)
+    else:
+        try:
+            content_hash, width, height = _image_info(data)
+        except Exception:
+            content_hash, width, height = hashlib.sha256(data).hexdigest(), None, None
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO images "
+        "(username, lecture, week, uploaded_at, original_name, content_hash, width, height, path) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (username, lecture, week, uploaded_at, original_name, content_hash, width, height, path),
+    )
+    return cur.rowcount > 0
+
+
+def add_image(path, lecture, week, original_name=None, data=None, username='', uploaded_at=None, content_hash=None):
+    """저장한 이미지를 카탈로그에 기록합니다. 새로 기록했으면 True."""
+    if data is None and content_hash is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    uploaded_at = uploaded_at or datetime.now().isoformat()
+    return insert_image(get_conn(), path, lecture, week, original_name, data, username, uploaded_at, content_hash)
+
+
+def latest_images(lecture, week, limit=None, username=''):
+    """강의/주차의 이미지를 최신순으로 반환합니다."""
+    sql = (
+        "SELECT * FROM images WHERE username = ? AND lecture = ? AND week = ? "
+        "ORDER BY uploaded_at DESC, id DESC"
+    )
+    params = [username, lecture, week]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(row) for row in get_conn().execute(sql, params)]
+
+
+def count_images(lecture, week, username=''):
+    return get_conn().execute(
+        "SELECT COUNT(*) FROM images WHERE username = ? AND lecture = ? AND week = ?",
+        (username, lecture, week),
+    ).fetchone()[0]
+
+
+def image_label(image):
+    """화면에 보여줄 이미지 이름 (업로드 시각 + 원본 파일명)."""
+    name = image.get("original_name") or os.path.basename(image["path"])
+    return f"{image['uploaded_at'][:16].replace('T', ' ')} {name}"
+
+
+def parse_filename(filename):
+    """저장 파일명에서 (강의, 주차, 업로드 시각, 원본 파일명)을 꺼냅니다."""
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None
+    date_part, time_part = match.group("ts").split("T")
+    uploaded_at = f"{date_part}T{time_part.replace('_', ':')}"
+    return match.group("lecture"), match.group("week"), uploaded_at, match.group("name")
+
+
+def image_dirs():
+    """이전 방식(타임스탬프 파일명)의 이미지 폴더를 (아이디, 경로)로 돌려줍니다."""
+    yield '', SHARED_IMAGE_DIR
+    if os.path.isdir(USERS_DIR):
+        for username in sorted(os.listdir(USERS_DIR)):
+            user_dir = os.path.join(USERS_DIR, username, 'images')
+            if os.path.isdir(user_dir):
+                yield username, user_dir
+
+
+def rebuild(conn=None):
+    """사라진 파일의 항목을 지우고, 이전 방식의 이미지 파일을 카탈로그에 등록합니다. 등록한 수를 반환합니다."""
+    conn = conn or get_conn()
+    count = 0
+    with storage.transaction(conn):
+        for row in conn.execute("SELECT id, path FROM images").fetchall():
+            if not os.path.exists(row["path"]):
+                conn.execute("DELETE FROM images WHERE id = ?", (row["id"],))
+
+        for username, image_dir in image_dirs():
+            if not os.path.isdir(image_dir):
+                continue
+            # 파일명 순서(강의/주차/시각)로 처리해서 중복 중 가장 먼저 올린 사진이 남도록 함
+            for filename in sorted(os.listdir(image_dir)):
+                if not filename.lower().endswith(IMAGE_EXTS):
+                    continue
+                parsed = parse_filename(filename)
+                if parsed is None:
+                    continue
+                lecture, week, uploaded_at, original_name = parsed
+                path = os.path.join(image_dir, filename)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if insert_image(conn, path, lecture, week, original_name, data, username, uploaded_at):
+                    count += 1
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('image_catalog_built', ?)", (str(time.time()),)
+        )
+    return count
+
+
+def _ensure_built(conn):
+    # 카탈로그가 처음 만들어질 때 한 번만 기존 파일을 등록
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'image_catalog_built'").fetchone() is None:
+        rebuild(conn)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["rebuild"]:
+        print(f"{rebuild()}개 이미지를 카탈로그에 등록했습니다.")
+    else:
+        print("사용법: python image_catalog.py rebuild")
@@ -0,0 +1,205 @@
+"""업로드 이미지 받기: 조각 단위 저장 + OCR 입력은 한 번만 전처리.
+
+업로드 파일을 통째로 bytes 로 복사하지 않고 CHUNK_SIZE 씩 읽으면서 해시를 계산하고 바로 블롭 임시 파일에 씁니다.
+썸네일은 원본을 썸네일 크기로 축소 디코딩해서 만들고, OCR 입력은 흑백으로 축소 디코딩해서 전처리(축소, 칠판 영역 자르기)까지
+끝낸 작은 배열을 .npy 로 저장해 둡니다. OCR 캐시, 배치, 증분 OCR 은 그 배열을 읽어서 쓰므로 사진을 다시 디코딩하지 않습니다.
+저장한 배열은 DECODED_MAX_BYTES 를 넘으면 가장 오래 쓰지 않은 것부터 지워지고, 필요하면 원본에서 다시 만듭니다.
+
+    python image_ingest.py evict   # OCR 입력 배열 캐시를 DECODED_MAX_BYTES 이하로 정리
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import metrics
+
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+DECODED_DIR = os.getenv("DECODED_CACHE_DIR", os.path.join("cache", "decoded"))
+DECODED_MAX_BYTES = int(os.getenv("DECODED_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {"uploads": 0, "stored": 0, "bytes": 0, "prepared": 0, "prepared_hits": 0}
+
+
+def _settings_tag(settings):
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def ocr_array_path(content_hash, settings=None):
+    from preprocess import PREPROCESS_SETTINGS
+
+    tag = _settings_tag(settings or PREPROCESS_SETTINGS)
+    return os.path.join(DECODED_DIR, content_hash[:2], f"{content_hash}_{tag}.npy")
+
+
+def _count(**values):
+    with _lock:
+        for name, value in values.items():
+            _stats[name] += value
+
+
+def ingest_stats():
+    with _lock:
+        return dict(_stats)
+
+
+@metrics.timed("ocr_input_prepare")
+def _prepare(path, content_hash, settings, with_thumbnails=False):
+    """블롭을 전처리한 OCR 입력 배열을 저장하고 반환합니다. with_thumbnails 이면 썸네일도 만듭니다."""
+    import numpy as np
+
+    import thumbnails
+    from preprocess import preprocess_image
+
+    # 색이 있는 원본 크기 디코딩 하나보다 썸네일 크기 컬러 + OCR 크기 흑백 축소 디코딩 두 번이
+    # 메모리를 덜 쓰고 빠름. 썸네일은 OCR 크기로 줄이기 전의 원본에서 만듦
+    if with_thumbnails:
+        thumbnails.make_thumbnails(path)
+    arr = preprocess_image(path, settings)
+    _count(prepared=1)
+
+    out_path = ocr_array_path(content_hash, settings)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, arr)
+    try:
+        replaced = os.path.getsize(out_path)
+    except OSError:
+        replaced = 0
+    os.replace(tmp_path, out_path)
+    # ocr_cache 와 같이 전체 크기를 누적해 두고, 넘었을 때만 폴더를 훑어서 정리
+    if _add_usage(os.path.getsize(out_path) - replaced) > DECODED_MAX_BYTES:
+        evict(DECODED_MAX_BYTES)
+    return arr
+
+
+def ocr_image(source, data=None, settings=None):
+    """OCR 에 넘길 전처리된 배열. 블롭 경로면 업로드 때 저장해 둔 배열을 쓰고 (없으면 한 번 만들어 저장),
+    아니면 바이트(또는 원래 입력)를 preprocess_image 로 전처리합니다."""
+    import blob_store
+    from preprocess import PREPROCESS_SETTINGS, preprocess_image
+
+    settings = settings or PREPROCESS_SETTINGS
+    if isinstance(source, str) and blob_store.is_blob_path(source):
+        import numpy as np
+
+        content_hash = os.path.splitext(os.path.basename(source))[0]
+        out_path = ocr_array_path(content_hash, settings)
+        try:
+            arr = np.load(out_path)
+            os.utime(out_path)
+            _count(prepared_hits=1)
+            return arr
+        except (OSError, ValueError):
+            pass
+        try:
+            return _prepare(source, content_hash, settings)
+        except Exception as e:
+            print(f"Error preparing OCR image: {e}")
+    return preprocess_image(data if data is not None else source, settings)
+
+
+@metrics.timed("upload_ingest")
+def ingest_upload(fileobj, lecture, week, username='', name=None):
+    """업로드 파일을 블롭으로 저장하고 카탈로그에 기록한 뒤, 썸네일과 OCR 입력 배열을 만듭니다. 블롭 경로를 반환합니다."""
+    import blob_store
+    import image_catalog
+    import thumbnails
+    from preprocess import PREPROCESS_SETTINGS
+
+    name = name or getattr(fileobj, 'name', None)
+    content_hash, path, created, size = blob_store.put_stream(fileobj, name, CHUNK_SIZE)
+    _count(uploads=1, stored=int(created), bytes=size if created else 0)
+    image_catalog.add_image(path, lecture, week, original_name=name, username=username,
+                            content_hash=content_hash, uploaded_at=datetime.now().isoformat())
+    if created or not os.path.exists(thumbnails.thumbnail_path(path, 'small')):
+        _prepare(path, content_hash, PREPROCESS_SETTINGS, with_thumbnails=True)
+    return path
+
+
+def _usage_conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), DECODED_DIR):
+        return conn
+    os.makedirs(DECODED_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(DECODED_DIR, "usage.db"), timeout=30, isolation_level=None,
+                           check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)")
+    _local.conn = conn
+    _local.key = (os.getpid(), DECODED_DIR)
+    return conn
+
+
+def _scan():
+    entries = []
+    for root, _, files in os.walk(DECODED_DIR):
+        for name in files:
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _add_usage(delta):
+    """캐시 전체 크기에 delta 바이트를 더하고 합계를 반환합니다. 기록이 없으면 폴더를 한 번 훑어서 시작합니다."""
+    conn = _usage_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("UPDATE usage SET bytes = bytes + ? WHERE id = 0", (delta,)).rowcount:
+            total = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0]
+        else:
+            # 방금 쓴 파일도 이미 폴더에 있으므로 delta 는 더하지 않음
+            total = sum(size for _, size, _ in _scan())
+            conn.execute("INSERT INTO usage (id, bytes) VALUES (0, ?)", (total,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return total
+
+
+def cache_bytes():
+    """누적해 둔 OCR 입력 배열 캐시 전체 크기(바이트)."""
+    row = _usage_conn().execute("SELECT bytes FROM usage WHERE id = 0").fetchone()
+    return row[0] if row else _add_usage(0)
+
+
+def evict(max_bytes):
+    """OCR 입력 배열 캐시 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 파일을 지웁니다.
+
+    폴더를 훑은 실제 크기로 누적 합계도 다시 맞춥니다 (다른 프로세스가 지운 파일, 직접 지운 파일).
+    """
+    with _lock:
+        entries = _scan()
+        total = sum(size for _, size, _ in entries)
+        if total > max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        _usage_conn().execute("INSERT OR REPLACE INTO usage (id, bytes) VALUES (0, ?)", (total,))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["evict"]:
+        evict(DECODED_MAX_BYTES)
+        print("OCR 입력 배열 캐시를 정리했습니다.")
+    else:
+        print("사용법: python image_ingest.py evict")
@@ -0,0 +1,258 @@
+"""같은 칠판을 여러 번 찍은 사진의 증분 OCR.
+
+판서가 채워지는 동안 같은 칠판을 여러 장 찍으면 대부분의 글자가 이전 사진과 같습니다.
+지각 해시(dHash)로 이전 사진과 거의 같은 칠판인지 확인하고, 특징점으로 두 사진을 정렬한 뒤
+달라진 영역의 글자 상자만 인식(recognition)하고 나머지는 이전 결과를 그대로 씁니다.
+여러 사진의 텍스트는 merge_transcript 로 중복 줄을 지워서 합칩니다.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+import ocr_cache
+import ocr_pipeline
+from image_ingest import ocr_image
+from preprocess import cache_settings
+
+INCREMENTAL = os.getenv("OCR_INCREMENTAL", "1") == "1"
+# dHash(64비트) 해밍 거리가 이 값 이하이면 같은 칠판으로 봄
+DUPLICATE_DISTANCE = int(os.getenv("OCR_DUPLICATE_DISTANCE", "12"))
+# 정렬에 필요한 최소 대응점 수
+MIN_MATCHES = 12
+# 두 사진의 밝기 차이가 이 값보다 크면 달라진 픽셀로 봄
+DIFF_THRESHOLD = 40
+# 글자 상자 안에서 달라진 픽셀 비율이 이 값보다 크면 다시 인식
+CHANGED_RATIO = 0.08
+# 이전 상자와 겹치는 비율(IoU)이 이 값 이상이어야 이전 텍스트를 재사용
+REUSE_IOU = 0.5
+# 중복 줄로 볼 유사도(0~100)
+DEDUP_SIMILARITY = int(os.getenv("OCR_DEDUP_SIMILARITY", "90"))
+
+_stats = {"incremental": 0, "full": 0, "reused_lines": 0, "recognized_lines": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**counts):
+    with _stats_lock:
+        for name, value in counts.items():
+            _stats[name] += value
+
+
+def incremental_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def board_hash(source):
+    """사진의 64비트 dHash. 작은 크기로만 디코딩하므로 빠릅니다."""
+    from PIL import Image, ImageOps
+
+    if not isinstance(source, str):
+        source = io.BytesIO(ocr_cache.read_source(source))
+    with Image.open(source) as img:
+        img.draft('L', (64, 64))
+        small = ImageOps.exif_transpose(img).convert('L').resize((9, 8), Image.BILINEAR)
+        pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join('1' if b else '0' for b in bits), 2)
+
+
+@lru_cache(maxsize=1024)
+def _path_hash(path, mtime):
+    return board_hash(path)
+
+
+def hash_path(path):
+    """경로별 dHash (파일이 바뀌지 않았으면 다시 계산하지 않음)."""
+    return _path_hash(path, os.path.getmtime(path))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def find_previous(path, candidates):
+    """candidates(최근 것부터) 중 path 와 같은 칠판으로 보이는 첫 사진을 반환합니다. 없으면 None."""
+    try:
+        current = hash_path(path)
+    except OSError:
+        return None
+    for candidate in candidates:
+        if candidate == path:
+            continue
+        try:
+            if hamming(current, hash_path(candidate)) <= DUPLICATE_DISTANCE:
+                return candidate
+        except OSError:
+            continue
+    return None
+
+
+def _gray(img):
+    import cv2
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def align(previous, current):
+    """이전 사진 좌표를 현재 사진 좌표로 옮기는 2x3 아핀 행렬을 구합니다. 정렬할 수 없으면 None."""
+    import cv2
+
+    orb = cv2.ORB_create(2000)
+    kp1, des1 = orb.detectAndCompute(_gray(previous), None)
+    kp2, des2 = orb.detectAndCompute(_gray(current), None)
+    if des1 is None or des2 is None:
+        return None
+    matches = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True).match(des1, des2)
+    if len(matches) < MIN_MATCHES:
+        return None
+    src = np.float32([kp1[m.queryIdx].pt for m in matches])
+    dst = np.float32([kp2[m.trainIdx].pt for m in matches])
+    matrix, inliers = cv2.estimateAffinePartial2D(src, dst, method=cv2.RANSAC, ransacReprojThreshold=4.0)
+    if matrix is None or inliers is None or int(inliers.sum()) < MIN_MATCHES:
+        return None
+    return matrix
+
+
+def changed_mask(previous, current, matrix):
+    """현재 사진에서 이전 사진과 달라졌거나 이전 사진에 없던 영역을 True 로 표시합니다."""
+    import cv2
+
+    h, w = current.shape[:2]
+    prev_gray = cv2.GaussianBlur(_gray(previous), (5, 5), 0)
+    cur_gray = cv2.GaussianBlur(_gray(current), (5, 5), 0)
+    warped = cv2.warpAffine(prev_gray, matrix, (w, h))
+    covered = cv2.warpAffine(np.full(prev_gray.shape, 255, np.uint8), matrix, (w, h))
+    diff = cv2.absdiff(cur_gray, warped)
+    mask = ((diff > DIFF_THRESHOLD) | (covered == 0)).astype(np.uint8)
+    # 조명/노이즈로 생긴 작은 점은 지우고 글자 획 주변은 넓힘
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    mask = cv2.dilate(mask, np.ones((5, 5), np.uint8))
+    return mask.astype(bool)
+
+
+def _rect(box):
+    pts = np.asarray(box, dtype=np.float32)
+    return pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()
+
+
+def _iou(a, b):
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _changed_fraction(mask, box):
+    h, w = mask.shape
+    x0, y0, x1, y1 = (int(round(v)) for v in _rect(box))
+    region = mask[max(0, y0):min(h, y1), max(0, x0):min(w, x1)]
+    return float(region.mean()) if region.size else 1.0
+
+
+def _warp_box(box, matrix):
+    pts = np.asarray(box, dtype=np.float32)
+    return pts @ matrix[:, :2].T + matrix[:, 2]
+
+
+def ocr_against_previous(ocr, current, previous, previous_result, use_angle_cls=True):
+    """이전 사진과 그 OCR 결과를 바탕으로 현재 사진을 증분 OCR합니다.
+
+    정렬할 수 없으면 None 을 반환하므로 호출한 쪽에서 전체 OCR을 하면 됩니다.
+    결과는 ocr.ocr() 와 같은 [[상자, [텍스트, 점수]], ...] 형식입니다.
+    """
+    matrix = align(previous, current)
+    if matrix is None:
+        return None
+    mask = changed_mask(previous, current, matrix)
+
+    previous_lines = [
+        (_rect(_warp_box(box, matrix)), text_score)
+        for box, text_score in (previous_result[0] if previous_result and previous_result[0] else [])
+    ]
+    boxes = ocr_pipeline.detect(ocr, current)
+
+    lines = []
+    to_recognize = []
+    for box in boxes:
+        if _changed_fraction(mask, box) <= CHANGED_RATIO and previous_lines:
+            rect = _rect(box)
+            best_iou, best = max(((_iou(rect, prev_rect), text_score) for prev_rect, text_score in previous_lines),
+                                 key=lambda item: item[0])
+            if best_iou >= REUSE_IOU:
+                lines.append([box, list(best)])
+                continue
+        to_recognize.append(box)
+
+    # 검출은 이미 했으므로 바뀐 상자만 인식 모델에 넣음
+    recognized = ocr_pipeline.recognize(ocr, current, to_recognize, cls=use_angle_cls)
+    lines.extend(recognized)
+
+    _count(incremental=1, reused_lines=len(lines) - len(recognized), recognized_lines=len(recognized))
+    return [ocr_cache.normalize(ocr_pipeline.reading_order(lines))]
+
+
+def incremental_ocr(ocr, source, previous_source, settings):
+    """previous_source(같은 칠판의 이전 사진)와 비교해서 source 를 OCR합니다.
+
+    이전 사진의 결과는 OCR 캐시에서 가져오고(없으면 계산), 현재 사진의 전체 OCR 결과가
+    캐시에 있으면 그것을 그대로 씁니다. 정렬에 실패하면 전체 OCR로 돌아갑니다.
+    """
+    data = ocr_cache.read_source(source)
+    key_settings = cache_settings(settings)
+    full_key = ocr_cache.make_key(data, key_settings)
+    result = ocr_cache.get(full_key)
+    if result is not None:
+        return result
+
+    previous_data = ocr_cache.read_source(previous_source)
+    incremental_key_settings = dict(key_settings, incremental=hashlib.sha256(previous_data).hexdigest())
+    incremental_key = ocr_cache.make_key(data, incremental_key_settings)
+    result = ocr_cache.get(incremental_key)
+    if result is not None:
+        return result
+
+    previous_result = ocr_cache.cached_ocr(ocr, previous_source, settings)
+    # 블롭이면 업로드 때 전처리해 둔 배열을 씀
+    current = ocr_image(source, data)
+    start = time.perf_counter()
+    result = ocr_against_previous(ocr, current, ocr_image(previous_source, previous_data), previous_result,
+                                  settings.get("use_angle_cls", True))
+    if result is None:
+        _count(full=1)
+        result, info = ocr_cache.timed_ocr(ocr, current)
+        ocr_cache.put(full_key, result, info)
+    else:
+        ocr_cache.put(incremental_key, result, {
+            "seconds": time.perf_counter() - start,
+            "incremental": incremental_key_settings["incremental"],
+        })
+    return result
+
+
+def _normalize_line(line):
+    return " ".join(unicodedata.normalize('NFC', line).split())
+
+
+def merge_transcript(texts):
+    """사진별 텍스트 줄 목록을 순서대로 합치면서 앞에서 이미 나온 줄(거의 같은 줄 포함)은 뺍니다."""
+    from rapidfuzz import fuzz, process
+
+    kept = []
+    seen = set()
+    for lines in texts:
+        for line in lines:
+            normalized = _normalize_line(line)
+            if not normalized or normalized in seen:
+                continue
+            if kept and process.extractOne(normalized, kept, scorer=fuzz.ratio, score_cutoff=DEDUP_SIMILARITY):
+                continue
+            seen.add(normalized)
+            kept.append(normalized)
+    return kept
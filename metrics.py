@@ -0,0 +1,319 @@
+"""성능 계측 (타이머, 카운터, 최근 구간 백분위, 요청별 트레이스, 프로파일).
+
+OCR, 요약, 저장소 읽기/쓰기, 이미지 디코딩/축소 같은 구간은 timer() / timed() 로 감싸서
+이름(과 라벨)별 최근 WINDOW 개 소요 시간으로 p50/p95/p99 를 계산합니다.
+Streamlit rerun 한 번은 begin_trace() ~ end_trace() 로 묶이고, 그 사이의 타이머는 트레이스의 구간(span)으로 남습니다.
+METRICS_PROFILE_SLOW 초보다 오래 걸린 rerun 은 (프로파일을 켠 경우) cProfile 결과를 PROFILE_DIR 에 저장합니다.
+실행 중인 프로세스를 샘플링하려면 py-spy 를 그대로 쓸 수 있습니다 (py-spy record --pid <PID>).
+
+지표는 Prometheus 텍스트 형식으로 내보냅니다.
+    METRICS_EXPORT_PATH=metrics.prom   rerun 이 끝날 때 (METRICS_EXPORT_INTERVAL 초마다) 파일로 기록
+    METRICS_PORT=9464                  http://localhost:9464/metrics 로 제공
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# 이름/라벨별로 보관할 최근 소요 시간 수
+WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+TRACE_SAMPLES = int(os.getenv("METRICS_TRACE_SAMPLES", "50"))
+EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH", "")
+EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "15"))
+PORT = int(os.getenv("METRICS_PORT", "0"))
+PROFILE = os.getenv("METRICS_PROFILE", "0") == "1"
+PROFILE_SLOW = float(os.getenv("METRICS_PROFILE_SLOW", "2.0"))
+PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", os.path.join("cache", "profiles"))
+ADMIN_PAGE = os.getenv("METRICS_ADMIN", "1") == "1"
+PREFIX = "studio"
+QUANTILES = (0.5, 0.95, 0.99)
+
+_timings = {}
+_counters = {}
+_traces = deque(maxlen=TRACE_SAMPLES)
+_profiles = deque(maxlen=10)
+_lock = threading.Lock()
+_local = threading.local()
+_last_export = 0.0
+_server = None
+
+# 다른 모듈이 따로 모으는 통계 (이미 불러온 모듈만 읽음: 지표를 보려고 무거운 모듈을 불러오지 않음)
+_EXTERNAL = (
+    ("ocr_pipeline", "stage_stats"),
+    ("incremental_ocr", "incremental_stats"),
+    ("model_client", "client_stats"),
+    ("summary_cache", "cache_stats"),
+    ("data_access", "cache_stats"),
+    ("image_ingest", "ingest_stats"),
+)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """name 구간의 소요 시간(초)을 기록합니다."""
+    key = _key(name, labels)
+    with _lock:
+        entry = _timings.get(key)
+        if entry is None:
+            entry = _timings[key] = {"samples": deque(maxlen=WINDOW), "count": 0, "sum": 0.0}
+        entry["samples"].append(seconds)
+        entry["count"] += 1
+        entry["sum"] += seconds
+
+
+def count(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def timer(name, **labels):
+    """with 블록의 소요 시간을 기록하고, 진행 중인 트레이스가 있으면 구간으로 남깁니다. 실패하면 errors 카운터도 올립니다."""
+    trace = getattr(_local, 'trace', None)
+    span = None
+    if trace is not None:
+        span = {"name": name, "labels": labels, "depth": trace["depth"],
+                "start": time.perf_counter() - trace["start"]}
+        trace["spans"].append(span)
+        trace["depth"] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # Streamlit 의 rerun/stop 은 실패가 아님
+        if isinstance(e, Exception):
+            count(f"{name}_errors", **labels)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        observe(name, seconds, **labels)
+        if span is not None:
+            span["seconds"] = seconds
+            trace["depth"] -= 1
+
+
+def timed(name, **labels):
+    """함수 호출 시간을 timer() 로 기록하는 데코레이터."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def timing_stats():
+    """이름/라벨별 호출 수, 합계, 최근 WINDOW 개의 p50/p95/p99 (초)."""
+    with _lock:
+        items = [(key, list(entry["samples"]), entry["count"], entry["sum"]) for key, entry in _timings.items()]
+    stats = []
+    for (name, labels), samples, total_count, total_sum in sorted(items):
+        samples.sort()
+        stats.append({
+            "name": name,
+            "labels": dict(labels),
+            "count": total_count,
+            "sum": total_sum,
+            **{f"p{int(q * 100)}": _percentile(samples, q) for q in QUANTILES},
+        })
+    return stats
+
+
+def counter_stats():
+    with _lock:
+        return [{"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())]
+
+
+def external_stats():
+    """다른 모듈의 누적 통계 (불러온 모듈만)."""
+    stats = {}
+    for module_name, func_name in _EXTERNAL:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            stats[module_name] = getattr(module, func_name)()
+    return stats
+
+
+# 요청(rerun)별 트레이스
+def begin_trace(name, profile=None):
+    """현재 스레드에서 새 트레이스를 시작합니다. 끝나지 않은 이전 트레이스(rerun/stop 으로 중단)는 먼저 닫습니다."""
+    if getattr(_local, 'trace', None) is not None:
+        end_trace(status="interrupted")
+    trace = {"name": name, "started_at": time.time(), "start": time.perf_counter(), "depth": 0, "spans": []}
+    if PROFILE if profile is None else profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            trace["profiler"] = profiler
+        except ValueError:
+            # 다른 세션이 이미 프로파일 중이면 (파이썬 3.12+ 는 동시에 하나만 가능) 이번 rerun 은 건너뜀
+            pass
+    _local.trace = trace
+
+
+def end_trace(status="ok"):
+    """현재 트레이스를 끝내고 기록합니다. 느렸고 프로파일 중이었으면 결과를 저장합니다."""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return None
+    _local.trace = None
+    profiler = trace.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+    seconds = time.perf_counter() - trace.pop("start")
+    trace.pop("depth")
+    trace.update(seconds=seconds, status=status)
+    observe("request", seconds, trace=trace["name"])
+    if profiler is not None and seconds >= PROFILE_SLOW:
+        trace["profile"] = _save_profile(profiler, trace)
+    with _lock:
+        _traces.append(trace)
+    maybe_export()
+    return trace
+
+
+def recent_traces():
+    """최근 트레이스 (최신순)."""
+    with _lock:
+        return list(reversed(_traces))
+
+
+def _save_profile(profiler, trace):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{trace['name']}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+    with _lock:
+        _profiles.append({"path": path, "trace": trace["name"], "seconds": trace["seconds"], "top": out.getvalue()})
+    return path
+
+
+def recent_profiles():
+    with _lock:
+        return list(reversed(_profiles))
+
+
+# Prometheus 텍스트 형식
+def _metric_name(name):
+    return f"{PREFIX}_{''.join(c if c.isascii() and c.isalnum() else '_' for c in name)}"
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in items.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(items, escaped)) + "}"
+
+
+def _flatten(prefix, value):
+    # 중첩 dict 의 숫자 값만 (이름_하위이름, 값) 으로 펼침
+    if isinstance(value, bool):
+        yield prefix, int(value)
+    elif isinstance(value, (int, float)):
+        yield prefix, value
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            yield from _flatten(f"{prefix}_{key}", child)
+
+
+def prometheus_text():
+    lines = []
+    seen = set()
+    for stat in timing_stats():
+        name = _metric_name(f"{stat['name']}_seconds")
+        if name not in seen:
+            lines.append(f"# TYPE {name} summary")
+            seen.add(name)
+        for q in QUANTILES:
+            lines.append(f"{name}{_labels(stat['labels'], quantile=q)} {stat[f'p{int(q * 100)}']:.6f}")
+        lines.append(f"{name}_count{_labels(stat['labels'])} {stat['count']}")
+        lines.append(f"{name}_sum{_labels(stat['labels'])} {stat['sum']:.6f}")
+    for stat in counter_stats():
+        name = _metric_name(f"{stat['name']}_total")
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_labels(stat['labels'])} {stat['value']}")
+    for module_name, stats in external_stats().items():
+        for name, value in _flatten(module_name, stats):
+            name = _metric_name(name)
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None):
+    """지표를 Prometheus 텍스트 파일로 기록합니다 (node_exporter textfile collector 등에서 읽음)."""
+    path = path or EXPORT_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+    return path
+
+
+def maybe_export():
+    global _last_export
+    if not EXPORT_PATH or time.monotonic() - _last_export < EXPORT_INTERVAL:
+        return
+    _last_export = time.monotonic()
+    try:
+        export()
+    except OSError as e:
+        print(f"Error exporting metrics: {e}")
+
+
+def serve(port=PORT):
+    """백그라운드 스레드에서 /metrics 를 제공하는 HTTP 서버를 띄웁니다 (프로세스에 하나)."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
+
+
+def reset():
+    global _last_export
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _traces.clear()
+        _profiles.clear()
+    _last_export = 0.0
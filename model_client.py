@@ -0,0 +1,292 @@
+"""모델 API(OpenAI, Hugging Face) 공용 HTTP 클라이언트.
+
+프로세스마다 keep-alive 연결을 재사용하는 httpx 클라이언트 하나를 두고,
+호출마다 전체 기한(재시도 포함)과 연결/읽기 시간 제한을 둡니다.
+동시에 나가는 요청 수는 세마포어로 제한하고, 429/5xx 와 연결 오류는 지터가 있는
+지수 백오프로 다시 시도합니다. 엔드포인트별 서킷 브레이커가 연속 실패 시 잠시 호출을 막아서
+느리거나 죽은 API 때문에 Streamlit 세션이 줄줄이 묶이지 않게 합니다.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# 연결/읽기 시간 제한(초), 재시도를 포함한 호출 전체 기한(초)
+CONNECT_TIMEOUT = float(os.getenv("MODEL_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("MODEL_READ_TIMEOUT", "60"))
+CALL_DEADLINE = float(os.getenv("MODEL_CALL_DEADLINE", "120"))
+# 프로세스 전체에서 동시에 보내는 요청 수와 유지할 연결 수
+MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))
+RETRY_ATTEMPTS = int(os.getenv("MODEL_RETRY_ATTEMPTS", "4"))
+BACKOFF_BASE = float(os.getenv("MODEL_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("MODEL_BACKOFF_MAX", "20"))
+# 연속 실패가 이 횟수에 이르면 BREAKER_RESET 초 동안 호출하지 않음
+BREAKER_FAILURES = int(os.getenv("MODEL_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("MODEL_BREAKER_RESET", "30"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_breakers = {}
+_stats = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+_stats_lock = threading.Lock()
+
+
+class ModelClientError(Exception):
+    pass
+
+
+class ModelHTTPError(ModelClientError):
+    def __init__(self, status, body, retry_after=None):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(ModelClientError):
+    pass
+
+
+class CircuitOpenError(ModelClientError):
+    pass
+
+
+class CircuitBreaker:
+    """연속 실패 횟수로 여닫는 서킷 브레이커 (closed -> open -> half-open)."""
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._count = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def enter(self):
+        """호출을 시작합니다. 막히면 None, 통과하면 그때의 상태("closed" 또는 "half-open")를 반환합니다.
+
+        "half-open" 으로 통과한 호출(시험 호출)은 끝날 때 record_success, record_failure, release 중 하나를 꼭 불러야 합니다.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_after or self._trial:
+                return None
+            # 열린 지 충분히 지났으면 시험 호출 하나만 통과시킴
+            self._trial = True
+            return "half-open"
+
+    def allow(self):
+        return self.enter() is not None
+
+    def record_success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release(self):
+        """성공도 실패도 아닌 결과(429, 기한 초과, 중간에 닫힌 스트림) 뒤에 시험 호출 자리만 돌려놓습니다."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            if self._trial or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+def get_breaker(name):
+    with _client_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker()
+        return breaker
+
+
+def get_client():
+    """keep-alive 연결을 재사용하는 프로세스 공용 httpx 클라이언트."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import httpx
+            _client = httpx.Client(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY),
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def client_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["breakers"] = {name: breaker.state for name, breaker in list(_breakers.items())}
+    return stats
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _backoff(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    # full jitter: 0 ~ base * 2^attempt
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _remaining(deadline):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("모델 API 호출 기한을 넘었습니다.")
+    return remaining
+
+
+def _timeout(deadline):
+    import httpx
+    remaining = _remaining(deadline)
+    return httpx.Timeout(min(READ_TIMEOUT, remaining), connect=min(CONNECT_TIMEOUT, remaining))
+
+
+@contextmanager
+def _slot(name, deadline):
+    """서킷 브레이커를 확인하고 동시 요청 자리를 하나 잡습니다.
+
+    블록을 빠져나가는 방법(반환, 예외, 기한 초과, 스트림을 중간에 닫음)과 상관없이 결과를 브레이커에 기록하므로
+    시험 호출이 결과 없이 끝나서 브레이커가 half-open 에 묶이는 일이 없습니다.
+    """
+    breaker = get_breaker(name)
+    mode = breaker.enter()
+    if mode is None:
+        _count("rejected")
+        raise CircuitOpenError(f"{name} API 호출이 잠시 중단되었습니다 (연속 실패).")
+    trial = mode == "half-open"
+    try:
+        if not _semaphore.acquire(timeout=_remaining(deadline)):
+            raise DeadlineExceeded("모델 API 동시 요청 대기 중 기한을 넘었습니다.")
+        try:
+            _count("requests")
+            yield
+        finally:
+            _semaphore.release()
+    except BaseException as error:
+        _record(breaker, error, trial)
+        raise
+    else:
+        breaker.record_success()
+
+
+def _is_retryable(error):
+    import httpx
+    if isinstance(error, ModelHTTPError):
+        return error.status in RETRY_STATUS
+    return isinstance(error, (httpx.TransportError, httpx.TimeoutException))
+
+
+def _record(breaker, error, trial):
+    import httpx
+    if isinstance(error, ModelHTTPError) and error.status == 429:
+        if trial:
+            breaker.release()
+    elif not isinstance(error, (ModelHTTPError, httpx.HTTPError, ValueError)):
+        # 기한 초과, 호출한 쪽이 스트림을 닫음(GeneratorExit) 등: 서버 상태를 알 수 없으므로 시험 호출 자리만 돌려놓음
+        if trial:
+            breaker.release()
+    elif _is_retryable(error):
+        breaker.record_failure()
+    else:
+        # 4xx 요청 오류나 잘못된 응답 본문은 서버가 살아 있다는 뜻이므로 실패로 세지 않음
+        breaker.record_success()
+
+
+def _handle_failure(attempt, error, deadline):
+    """다시 시도할 수 있으면 기다린 뒤 돌아옵니다. 아니면 예외를 올립니다 (브레이커 기록은 _slot 이 함)."""
+    if not _is_retryable(error) or attempt + 1 >= RETRY_ATTEMPTS:
+        _count("failures")
+        raise error
+    delay = _backoff(attempt, getattr(error, "retry_after", None))
+    if time.monotonic() + delay >= deadline:
+        _count("failures")
+        raise error
+    _count("retries")
+    time.sleep(delay)
+
+
+def post_json(name, url, payload, headers=None, deadline=CALL_DEADLINE):
+    """JSON 을 POST 하고 응답 JSON 을 반환합니다. name 은 서킷 브레이커를 나누는 엔드포인트 이름입니다."""
+    with metrics.timer("model_call", endpoint=name):
+        return _post_json(name, url, payload, headers, deadline)
+
+
+def _post_json(name, url, payload, headers, deadline):
+    import httpx
+
+    client = get_client()
+    end = time.monotonic() + deadline
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            with _slot(name, end):
+                response = client.post(url, json=payload, headers=headers, timeout=_timeout(end))
+                if response.status_code >= 400:
+                    raise ModelHTTPError(response.status_code, response.text, response.headers.get("Retry-After"))
+                return response.json()
+        except (ModelHTTPError, httpx.HTTPError, ValueError) as e:
+            _handle_failure(attempt, e, end)
+
+
+def stream_events(name, url, payload, headers=None, deadline=CALL_DEADLINE):
+    """SSE 응답의 data: 이벤트를 JSON 으로 하나씩 돌려줍니다.
+
+    첫 이벤트를 받기 전의 실패만 다시 시도합니다 (이미 화면에 나간 토큰을 되돌릴 수 없으므로).
+    """
+    import httpx
+
+    client = get_client()
+    end = time.monotonic() + deadline
+    for attempt in range(RETRY_ATTEMPTS):
+        started = False
+        try:
+            # 스트림을 다 읽을 때까지 동시 요청 자리를 잡고 있음
+            with _slot(name, end):
+                with client.stream("POST", url, json=payload, headers=headers, timeout=_timeout(end)) as response:
+                    if response.status_code >= 400:
+                        raise ModelHTTPError(response.status_code, response.read().decode('utf-8', 'replace'),
+                                             response.headers.get("Retry-After"))
+                    for line in response.iter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        started = True
+                        yield json.loads(data)
+                return
+        except (ModelHTTPError, httpx.HTTPError, ValueError) as e:
+            if started:
+                _count("failures")
+                raise
+            _handle_failure(attempt, e, end)
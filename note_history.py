@@ -0,0 +1,241 @@
+"""필기 수정 기록 (버전별 줄 단위 차이 + 주기적 전체 스냅샷).
+
+필기를 저장할 때마다(storage._upsert_note) 같은 트랜잭션에서 새 버전을 남기므로
+"필기 수정 저장" 이나 "요약 내용을 필기로 저장" 으로 이전 내용이 사라지지 않습니다.
+최신 내용은 지금처럼 notes 테이블에서 바로 읽고, 이 모듈은 이전 버전만 다룹니다.
+
+버전은 SNAPSHOT_INTERVAL 개마다 전체 텍스트(스냅샷)로, 그 사이는 다른 버전과의 줄 차이(델타)로 zlib 압축해 저장합니다.
+델타의 기준 버전은 스냅샷에서의 거리에서 가장 낮은 비트를 지운 버전(skip-delta)이라서
+어떤 버전이든 스냅샷에서 최대 log2(SNAPSHOT_INTERVAL) 번의 델타만 적용하면 복원됩니다.
+필기마다 최근 NOTE_HISTORY_KEEP 개 버전을 남기고, 그보다 오래된 스냅샷 구간은 통째로 지웁니다
+(남는 버전은 많아야 NOTE_HISTORY_KEEP + SNAPSHOT_INTERVAL 개).
+
+    python note_history.py prune [--keep N]   # 보관 개수를 줄인 뒤 전체 필기에 다시 적용
+    python note_history.py stats
+"""
+import argparse
+import difflib
+import json
+import os
+import time
+import zlib
+
+import storage
+
+SNAPSHOT_INTERVAL = int(os.getenv("NOTE_HISTORY_SNAPSHOT_INTERVAL", "32"))
+KEEP = int(os.getenv("NOTE_HISTORY_KEEP", "100"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS note_versions (
+    username TEXT NOT NULL DEFAULT '',
+    lecture TEXT NOT NULL,
+    week TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    base INTEGER,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (username, lecture, week, version)
+) WITHOUT ROWID
+"""
+
+_ready = set()
+
+
+def _ensure_schema(conn):
+    # storage 의 쓰기 트랜잭션 안에서 불리므로 executescript(자동 COMMIT)를 쓰지 않음
+    key = (os.getpid(), storage.DB_PATH)
+    if key not in _ready:
+        conn.execute(_SCHEMA)
+        _ready.add(key)
+
+
+def get_conn():
+    conn = storage.get_conn()
+    _ensure_schema(conn)
+    return conn
+
+
+# 델타: 기준 텍스트의 줄 범위 [i1, i2) 를 새 줄들로 바꾸는 연산 목록 (같은 부분은 저장하지 않음)
+def make_delta(base, text):
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    return [[i1, i2, lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_delta(base, delta):
+    base_lines = base.splitlines(keepends=True)
+    out = []
+    pos = 0
+    for i1, i2, lines in delta:
+        out.extend(base_lines[pos:i1])
+        out.extend(lines)
+        pos = i2
+    out.extend(base_lines[pos:])
+    return ''.join(out)
+
+
+def _encode(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def _row(conn, username, lecture, week, version):
+    return conn.execute(
+        "SELECT version, base, data FROM note_versions "
+        "WHERE username = ? AND lecture = ? AND week = ? AND version = ?",
+        (username, lecture, week, version),
+    ).fetchone()
+
+
+def _text(conn, username, lecture, week, version):
+    # 스냅샷까지 기준 버전을 따라간 뒤 (많아야 log2(SNAPSHOT_INTERVAL) 단계) 델타를 차례로 적용
+    chain = []
+    while True:
+        row = _row(conn, username, lecture, week, version)
+        if row is None:
+            raise KeyError(f"{lecture} {week} 버전 {version}")
+        if row["base"] is None:
+            text = _decode(row["data"])
+            break
+        chain.append(row["data"])
+        version = row["base"]
+    for data in reversed(chain):
+        text = apply_delta(text, _decode(data))
+    return text
+
+
+def record_version(conn, username, lecture, week, text, previous=None):
+    """새 필기 내용을 버전으로 남기고 버전 번호를 반환합니다. 호출하는 쪽의 트랜잭션 안에서 실행됩니다.
+
+    기록이 없는 필기면 덮어쓰기 전 내용(previous)을 먼저 1번 버전으로 남깁니다. 내용이 같으면 None.
+    """
+    _ensure_schema(conn)
+    if text == previous:
+        return None
+    row = conn.execute(
+        "SELECT MAX(version) AS latest, MAX(CASE WHEN base IS NULL THEN version END) AS snapshot "
+        "FROM note_versions WHERE username = ? AND lecture = ? AND week = ?",
+        (username, lecture, week),
+    ).fetchone()
+    latest, snapshot = row["latest"], row["snapshot"]
+    if latest is None and previous:
+        _insert(conn, username, lecture, week, 1, None, previous)
+        latest = snapshot = 1
+
+    version = (latest or 0) + 1
+    offset = version - snapshot if snapshot else SNAPSHOT_INTERVAL
+    full = _encode(text)
+    if offset >= SNAPSHOT_INTERVAL:
+        _insert(conn, username, lecture, week, version, None, text, full)
+    else:
+        base = snapshot + (offset & (offset - 1))
+        delta = _encode(make_delta(_text(conn, username, lecture, week, base), text))
+        # 거의 다 바뀌어서 델타가 더 크면 스냅샷으로 저장 (여기서 새 구간이 시작됨)
+        if len(delta) < len(full):
+            _insert(conn, username, lecture, week, version, base, text, delta)
+        else:
+            _insert(conn, username, lecture, week, version, None, text, full)
+    _prune(conn, username, lecture, week, version, KEEP)
+    return version
+
+
+def _insert(conn, username, lecture, week, version, base, text, data=None):
+    conn.execute(
+        "INSERT INTO note_versions (username, lecture, week, version, base, data, size, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (username, lecture, week, version, base, data if data is not None else _encode(text), len(text), time.time()),
+    )
+
+
+def _prune(conn, username, lecture, week, latest, keep):
+    # 최근 keep 개 버전의 기준 버전이 모두 남도록, 그보다 앞선 마지막 스냅샷 이전만 지움
+    cutoff = latest - keep + 1
+    if cutoff <= 1:
+        return 0
+    row = conn.execute(
+        "SELECT MAX(version) FROM note_versions "
+        "WHERE username = ? AND lecture = ? AND week = ? AND base IS NULL AND version <= ?",
+        (username, lecture, week, cutoff),
+    ).fetchone()
+    if row[0] is None:
+        return 0
+    return conn.execute(
+        "DELETE FROM note_versions WHERE username = ? AND lecture = ? AND week = ? AND version < ?",
+        (username, lecture, week, row[0]),
+    ).rowcount
+
+
+def versions(lecture, week, username=''):
+    """남아 있는 버전 목록 (최신순)."""
+    rows = get_conn().execute(
+        "SELECT version, base IS NULL AS snapshot, size, length(data) AS stored, created_at FROM note_versions "
+        "WHERE username = ? AND lecture = ? AND week = ? ORDER BY version DESC",
+        (username, lecture, week),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_text(lecture, week, version, username=''):
+    """version 번 버전의 필기 내용. 없는(지워진) 버전이면 KeyError."""
+    return _text(get_conn(), username, lecture, week, version)
+
+
+def diff(lecture, week, old, new=None, username=''):
+    """두 버전 사이의 unified diff 줄 목록. new 가 None 이면 지금 저장된 필기와 비교합니다."""
+    old_text = get_text(lecture, week, old, username)
+    if new is None:
+        new_text = storage.get_note(lecture, week, username) or ''
+        new_label = "현재"
+    else:
+        new_text = get_text(lecture, week, new, username)
+        new_label = f"버전 {new}"
+    return list(difflib.unified_diff(
+        old_text.splitlines(), new_text.splitlines(), f"버전 {old}", new_label, lineterm='',
+    ))
+
+
+def prune_all(keep=KEEP):
+    """모든 필기에 보관 개수를 다시 적용하고 지운 버전 수를 반환합니다."""
+    conn = get_conn()
+    removed = 0
+    with storage.transaction(conn):
+        notes = conn.execute(
+            "SELECT username, lecture, week, MAX(version) FROM note_versions GROUP BY username, lecture, week"
+        ).fetchall()
+        for username, lecture, week, latest in notes:
+            removed += _prune(conn, username, lecture, week, latest, keep)
+    return removed
+
+
+def history_stats():
+    row = get_conn().execute(
+        "SELECT COUNT(*) AS versions, COUNT(DISTINCT username || char(0) || lecture || char(0) || week) AS notes, "
+        "SUM(base IS NULL) AS snapshots, COALESCE(SUM(size), 0) AS text_bytes, "
+        "COALESCE(SUM(length(data)), 0) AS stored_bytes FROM note_versions"
+    ).fetchone()
+    return dict(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="필기 수정 기록 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prune = sub.add_parser("prune", help="보관 개수를 전체 필기에 다시 적용")
+    prune.add_argument("--keep", type=int, default=KEEP)
+    sub.add_parser("stats", help="버전 수와 저장 크기")
+    args = parser.parse_args(argv)
+
+    if args.command == "prune":
+        print(f"{prune_all(args.keep)}개 버전을 정리했습니다.")
+    elif args.command == "stats":
+        stats = history_stats()
+        print(f"필기 {stats['notes']}개, 버전 {stats['versions']}개 (스냅샷 {stats['snapshots'] or 0}개), "
+              f"텍스트 {stats['text_bytes'] / 1024:.1f}KB -> 저장 {stats['stored_bytes'] / 1024:.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import ocr_cache
+from image_ingest import ocr_image
+from preprocess import cache_settings
+
+# 배치 OCR 설정
+# OCR_BATCH_WORKERS=0 이면 프로세스 풀 없이 전달받은 OCR 인스턴스로 처리
+BATCH_WORKERS = int(os.getenv("OCR_BATCH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# 동시에 메모리에 올려둘 이미지 수 (디코딩 ~ OCR 완료 구간)
+MAX_IN_FLIGHT = int(os.getenv("OCR_MAX_IN_FLIGHT", "4"))
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+_local_ocr_lock = threading.Lock()
+
+# 워커 프로세스마다 하나씩 가지는 OCR 모델
+_worker_ocr = None
+
+
+def _init_worker(settings, cpu_threads):
+    global _worker_ocr
+    from ocr_engine import create_ocr
+    _worker_ocr = create_ocr(settings, use_gpu=False, cpu_threads=cpu_threads)
+
+
+def _ready():
+    return os.getpid()
+
+
+def _ocr_in_worker(img):
+    return ocr_cache.timed_ocr(_worker_ocr, img)
+
+
+def get_pool(settings, workers=BATCH_WORKERS):
+    """설정별로 한 번만 만들어지는 OCR 프로세스 풀을 반환합니다."""
+    global _pool, _pool_key
+    key = (tuple(sorted(settings.items())), workers)
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(settings, cpu_threads),
+            )
+            _pool_key = key
+        return _pool
+
+
+def warm_pool(settings, workers=BATCH_WORKERS):
+    """풀의 워커 프로세스를 모두 띄워서 모델 로드를 미리 끝내 둡니다 (백그라운드 스레드, 스레드를 반환)."""
+    def warm():
+        pool = get_pool(settings, workers)
+        # 워커는 작업이 들어올 때 뜨므로 워커 수만큼 빈 작업을 보내서 초기화를 기다림
+        for future in [pool.submit(_ready) for _ in range(workers)]:
+            future.result()
+
+    thread = threading.Thread(target=warm, name="ocr-pool-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def shutdown_pool():
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_key = None
+
+
+def _process_one(source, settings, pool, ocr):
+    key, data = ocr_cache.source_key(source, cache_settings(settings))
+    result = ocr_cache.get(key)
+    if result is not None:
+        return result
+
+    # 업로드 버퍼는 메모리에서 바로 전처리하고, 블롭은 업로드 때 전처리해 둔 배열을 OCR에 전달
+    img = ocr_image(source, data)
+    del data
+    if pool is not None:
+        result, info = pool.submit(_ocr_in_worker, img).result()
+    else:
+        # PaddleOCR 인스턴스는 스레드 안전하지 않으므로 한 번에 하나씩
+        with _local_ocr_lock:
+            result, info = ocr_cache.timed_ocr(ocr, img)
+    ocr_cache.put(key, result, info)
+    return result
+
+
+def iter_ocr_batch(sources, settings, ocr=None, workers=BATCH_WORKERS, max_in_flight=MAX_IN_FLIGHT):
+    """여러 이미지(경로 또는 업로드 파일)를 병렬로 OCR하고 (순번, 원본, 결과)를 업로드 순서대로 돌려줍니다."""
+    sources = list(sources)
+    if not sources:
+        return
+
+    max_in_flight = max(1, max_in_flight)
+    if workers > 0:
+        pool = get_pool(settings, workers)
+    elif ocr is not None:
+        pool = None
+    else:
+        raise ValueError("workers=0 일 때는 ocr 인스턴스를 전달해야 합니다.")
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as decoder:
+        pending = {}
+        next_submit = 0
+        next_yield = 0
+        while next_yield < len(sources):
+            # 아직 돌려주지 않은 이미지가 max_in_flight개를 넘지 않도록 제출
+            while next_submit < len(sources) and next_submit - next_yield < max_in_flight:
+                pending[next_submit] = decoder.submit(_process_one, sources[next_submit], settings, pool, ocr)
+                next_submit += 1
+
+            result = pending.pop(next_yield).result()
+            yield next_yield, sources[next_yield], result
+            next_yield += 1
+
+
+def extract_texts(result):
+    """PaddleOCR 결과에서 텍스트 줄만 꺼냅니다 (화면/요약에 쓰는 텍스트는 저장된 구조화 결과에서 만듦)."""
+    if result and result[0]:
+        return [line[1][0] for line in result[0]]
+    return []
@@ -0,0 +1,324 @@
+"""OCR 결과 캐시 (구조화된 결과 저장소).
+
+결과는 이미지 한 장당 Arrow IPC 파일 하나로 저장합니다. 글자 상자(4점 좌표), 텍스트, 신뢰도를 열로,
+엔진 정보와 단계별 소요 시간은 파일 메타데이터로 둡니다. 압축하지 않은 IPC 파일이라
+get_table() 은 메모리 맵으로 복사 없이 읽고, 여러 결과를 모아 볼 때는 load_dataset() 을 씁니다.
+화면에 쓰는 줄바꿈 텍스트는 저장된 결과에서 만드는 파생 값입니다 (text_lines).
+캐시 전체 크기는 폴더 안의 작은 SQLite 파일(usage.db)에 누적해 두고, 합계가 CACHE_MAX_BYTES 를
+넘을 때만 폴더를 훑어서 오래된 항목을 지웁니다 (여러 OCR 프로세스가 같은 합계를 씀).
+
+    python ocr_cache.py summary
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import metrics
+
+# OCR 결과 캐시 설정 (이미지 바이트 해시 + OCR 설정을 키로 사용)
+CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join("cache", "ocr"))
+CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+FORMAT_VERSION = "1"
+ENTRY_EXTS = ('.arrow', '.json')
+
+_lock = threading.Lock()
+_local = threading.local()
+_schema = None
+
+
+def make_key(image_bytes, settings):
+    """이미지 바이트와 OCR 설정으로 캐시 키를 만듭니다."""
+    h = hashlib.sha256()
+    h.update(image_bytes)
+    h.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+def source_key(source, settings):
+    """(캐시 키, 이미지 바이트)를 반환합니다. 경로는 조각 단위로 해시해서 바이트를 메모리에 올리지 않고 None 을 돌려줍니다."""
+    if not isinstance(source, str):
+        data = read_source(source)
+        return make_key(data, settings), data
+    h = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    h.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest(), None
+
+
+def _entry_path(key, ext='.arrow'):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}{ext}")
+
+
+def schema():
+    """결과 파일의 열 구성 (한 행이 글자 상자 하나)."""
+    global _schema
+    if _schema is None:
+        import pyarrow as pa
+        _schema = pa.schema([
+            ("page", pa.int16()),
+            ("box", pa.list_(pa.float32(), 8)),
+            ("text", pa.string()),
+            ("confidence", pa.float32()),
+        ])
+    return _schema
+
+
+def to_table(result, info=None):
+    """PaddleOCR 형식 결과([[상자, [텍스트, 점수]], ...] 페이지 목록)를 Arrow 테이블로 바꿉니다."""
+    import pyarrow as pa
+
+    pages, boxes, texts, scores = [], [], [], []
+    for page_no, lines in enumerate(result or []):
+        for box, (text, score) in lines or []:
+            pages.append(page_no)
+            boxes.append([float(v) for point in box for v in point])
+            texts.append(text)
+            scores.append(float(score))
+    metadata = dict(info or {}, pages=len(result or []), format=FORMAT_VERSION)
+    return pa.table(
+        [pa.array(pages, pa.int16()), pa.array(boxes, schema().field("box").type),
+         pa.array(texts, pa.string()), pa.array(scores, pa.float32())],
+        schema=schema().with_metadata({b"ocr": json.dumps(metadata, ensure_ascii=False).encode('utf-8')}),
+    )
+
+
+def table_info(table):
+    """테이블 메타데이터(엔진, 설정, 소요 시간 등)."""
+    raw = (table.schema.metadata or {}).get(b"ocr")
+    return json.loads(raw) if raw else {}
+
+
+def from_table(table):
+    """Arrow 테이블을 PaddleOCR 형식 결과로 되돌립니다 (글자가 없는 페이지는 None)."""
+    pages = [[] for _ in range(table_info(table).get("pages", 1))]
+    columns = table.select(["page", "box", "text", "confidence"]).to_pydict()
+    for page_no, box, text, score in zip(columns["page"], columns["box"], columns["text"], columns["confidence"]):
+        pages[page_no].append([[box[i:i + 2] for i in range(0, 8, 2)], [text, score]])
+    return [lines or None for lines in pages]
+
+
+def text_lines(table):
+    """저장된 결과에서 텍스트 줄만 꺼냅니다 (text 열만 읽음)."""
+    return table.column("text").to_pylist()
+
+
+def _to_jsonable(obj):
+    # PaddleOCR 결과에 섞여 있는 numpy 값을 기본 타입으로 변환
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"직렬화할 수 없는 타입입니다: {type(obj)}")
+
+
+def normalize(result):
+    """OCR 결과를 캐시에서 읽은 것과 같은 형태(list/float)로 바꿉니다."""
+    return json.loads(json.dumps(result, ensure_ascii=False, default=_to_jsonable))
+
+
+def _touch(path):
+    # 최근 사용 시각을 갱신해서 LRU 순서를 유지
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def get_table(key):
+    """캐시된 결과를 메모리 맵으로 복사 없이 읽은 Arrow 테이블로 반환합니다. 없으면 None."""
+    import pyarrow as pa
+
+    path = _entry_path(key)
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    _touch(path)
+    return table
+
+
+def get(key):
+    """캐시된 OCR 결과를 PaddleOCR 형식으로 반환합니다. 없으면 None."""
+    table = get_table(key)
+    if table is not None:
+        return from_table(table)
+    # 이전 형식(JSON) 항목
+    path = _entry_path(key, '.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _touch(path)
+    return result
+
+
+def put(key, result, info=None):
+    """OCR 결과를 구조화해서 저장하고 용량을 넘으면 오래된 항목부터 지웁니다.
+
+    info 에는 단계별 소요 시간(timings), 걸린 시간(seconds) 등 함께 남길 값을 넣습니다.
+    """
+    import pyarrow as pa
+    from ocr_engine import engine_info
+
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = to_table(result, dict(engine_info(), **(info or {}), key=key, created_at=time.time()))
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = 0
+    os.replace(tmp_path, path)
+    if _add_usage(os.path.getsize(path) - replaced) > CACHE_MAX_BYTES:
+        evict(CACHE_MAX_BYTES)
+
+
+def _usage_conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), CACHE_DIR):
+        return conn
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(CACHE_DIR, "usage.db"), timeout=30, isolation_level=None,
+                           check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)")
+    _local.conn = conn
+    _local.key = (os.getpid(), CACHE_DIR)
+    return conn
+
+
+def _scan():
+    entries = []
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if not name.endswith(ENTRY_EXTS):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def _add_usage(delta):
+    """캐시 전체 크기에 delta 바이트를 더하고 합계를 반환합니다. 기록이 없으면 폴더를 한 번 훑어서 시작합니다."""
+    conn = _usage_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("UPDATE usage SET bytes = bytes + ? WHERE id = 0", (delta,)).rowcount:
+            total = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0]
+        else:
+            # 방금 쓴 항목도 이미 폴더에 있으므로 delta 는 더하지 않음
+            total = sum(size for _, size, _ in _scan())
+            conn.execute("INSERT INTO usage (id, bytes) VALUES (0, ?)", (total,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return total
+
+
+def cache_bytes():
+    """누적해 둔 캐시 전체 크기(바이트)."""
+    row = _usage_conn().execute("SELECT bytes FROM usage WHERE id = 0").fetchone()
+    return row[0] if row else _add_usage(0)
+
+
+def evict(max_bytes):
+    """전체 캐시 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 항목을 지웁니다.
+
+    폴더를 훑은 실제 크기로 누적 합계도 다시 맞춥니다 (다른 프로세스가 지운 항목, 직접 지운 파일).
+    """
+    with _lock:
+        entries = _scan()
+        total = sum(size for _, size, _ in entries)
+        if total > max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        conn = _usage_conn()
+        conn.execute("INSERT OR REPLACE INTO usage (id, bytes) VALUES (0, ?)", (total,))
+
+
+def read_source(source):
+    """경로, 바이트, 업로드 파일 객체에서 이미지 바이트를 읽습니다."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    return bytes(source)
+
+
+def cached_ocr(ocr, source, settings):
+    """캐시를 먼저 확인하고, 없을 때만 전처리 후 OCR을 수행합니다."""
+    from image_ingest import ocr_image
+    from preprocess import cache_settings
+
+    key, data = source_key(source, cache_settings(settings))
+
+    result = get(key)
+    metrics.count("ocr_cache", result="hit" if result is not None else "miss")
+    if result is None:
+        # 블롭이면 업로드 때 전처리해 둔 배열을 씀
+        result, info = timed_ocr(ocr, ocr_image(source, data))
+        put(key, result, info)
+    return result
+
+
+def timed_ocr(ocr, img):
+    """OCR을 실행하고 (정규화한 결과, 저장할 소요 시간 정보)를 반환합니다."""
+    from ocr_pipeline import last_timings
+
+    start = time.perf_counter()
+    with metrics.timer("ocr"):
+        result = normalize(ocr.ocr(img))
+    return result, {"seconds": time.perf_counter() - start, "timings": last_timings()}
+
+
+def load_dataset(cache_dir=None):
+    """캐시 폴더의 모든 결과 파일을 하나의 Arrow 데이터셋으로 엽니다 (분석용, 메모리 맵)."""
+    import pyarrow.dataset as ds
+
+    files = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(cache_dir or CACHE_DIR)
+        for name in names if name.endswith('.arrow')
+    ]
+    return ds.dataset(files, format="arrow", schema=schema())
+
+
+def summary(cache_dir=None):
+    """저장된 결과 수, 글자 상자 수, 평균 신뢰도."""
+    import pyarrow.compute as pc
+
+    dataset = load_dataset(cache_dir)
+    table = dataset.to_table(columns=["confidence"])
+    return {
+        "files": len(dataset.files),
+        "boxes": table.num_rows,
+        "mean_confidence": pc.mean(table.column("confidence")).as_py() if table.num_rows else None,
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["summary"]:
+        print(summary())
+    else:
+        print("사용법: python ocr_cache.py summary")
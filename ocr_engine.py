@@ -0,0 +1,225 @@
+"""OCR 엔진 생성과 프로세스 공용 인스턴스.
+
+paddleocr(와 paddle)는 불러오는 데만 수 초가 걸리므로 처음 OCR할 때 불러오고,
+설정별로 프로세스에 하나만 만들어서 모든 세션(스레드)이 같이 씁니다.
+OCR_PREWARM=1 이면 서버가 뜰 때 백그라운드에서 미리 만들어 두어 첫 요청이 기다리지 않습니다.
+
+엔진은 OCR_BACKEND 로 고릅니다. 어느 백엔드든 PaddleOCR 과 같은 ocr(img, det, rec, cls) 를 제공합니다.
+    paddle         기본 Paddle Inference
+    paddle-mkldnn  Paddle Inference + oneDNN(MKL-DNN) CPU 가속
+    onnx           ONNX 로 내보낸(선택적으로 INT8 양자화한) 모델을 onnxruntime 으로 실행
+OCR_ADAPTIVE=1 이면 엔진을 ocr_pipeline.AdaptiveOCR 로 감싸서 방향 분류와 빈 사진 인식을 건너뜁니다.
+onnx 모델은 한 번 내보내 둡니다:
+    python ocr_engine.py export-onnx [--no-quantize]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PREWARM = os.getenv("OCR_PREWARM", "1") == "1"
+BACKEND = os.getenv("OCR_BACKEND", "paddle")
+# 엔진 하나가 쓸 CPU 스레드 수 (0 이면 백엔드 기본값)
+CPU_THREADS = int(os.getenv("OCR_CPU_THREADS", "0"))
+ONNX_DIR = os.getenv("OCR_ONNX_DIR", os.path.join("models", "onnx"))
+ONNX_QUANTIZED = os.getenv("OCR_ONNX_QUANTIZED", "1") == "1"
+ONNX_STAGES = ("det", "rec", "cls")
+ADAPTIVE = os.getenv("OCR_ADAPTIVE", "1") == "1"
+
+_backends = {}
+_engines = {}
+_build_seconds = {}
+_lock = threading.Lock()
+
+
+def use_gpu():
+    """paddle 이 CUDA 로 빌드되었고 GPU가 보이면 True."""
+    import paddle
+    return paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+
+
+def backend(name):
+    """OCR 백엔드 생성 함수를 등록하는 데코레이터."""
+    def register(factory):
+        _backends[name] = factory
+        return factory
+    return register
+
+
+def backends():
+    return sorted(_backends)
+
+
+def cache_tag(name=None):
+    """OCR 결과 캐시 키에 넣을 엔진 설명 (기본 백엔드 + 적응형 꺼짐이면 이전 캐시를 그대로 쓰도록 None)."""
+    name = name or BACKEND
+    if name == "onnx" and ONNX_QUANTIZED:
+        name = "onnx-int8"
+    parts = [] if name == "paddle" else [name]
+    if ADAPTIVE:
+        parts.append("adaptive")
+    return "+".join(parts) or None
+
+
+def engine_info(name=None):
+    """OCR 결과와 함께 저장할 엔진 정보 (백엔드, 캐시 태그, paddleocr 버전)."""
+    from importlib import metadata
+
+    try:
+        version = metadata.version("paddleocr")
+    except metadata.PackageNotFoundError:
+        version = None
+    return {"backend": name or BACKEND, "engine": cache_tag(name) or "paddle", "paddleocr": version}
+
+
+def _threads(options):
+    if CPU_THREADS and "cpu_threads" not in options:
+        options["cpu_threads"] = CPU_THREADS
+    return options
+
+
+@backend("paddle")
+def _paddle(settings, **options):
+    from paddleocr import PaddleOCR
+
+    if "use_gpu" not in options:
+        options["use_gpu"] = use_gpu()
+    return PaddleOCR(**settings, **_threads(options))
+
+
+@backend("paddle-mkldnn")
+def _paddle_mkldnn(settings, **options):
+    from paddleocr import PaddleOCR
+
+    options["use_gpu"] = False
+    return PaddleOCR(**settings, enable_mkldnn=True, **_threads(options))
+
+
+def onnx_model_path(stage, quantized=None):
+    quantized = ONNX_QUANTIZED if quantized is None else quantized
+    return os.path.join(ONNX_DIR, f"{stage}.int8.onnx" if quantized and stage != "cls" else f"{stage}.onnx")
+
+
+@backend("onnx")
+def _onnx(settings, **options):
+    from paddleocr import PaddleOCR
+
+    options["use_gpu"] = False
+    threads = options.pop("cpu_threads", CPU_THREADS)
+    paths = {f"{stage}_model_dir": onnx_model_path(stage) for stage in ONNX_STAGES}
+    missing = [path for path in paths.values() if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(
+            f"ONNX 모델이 없습니다: {', '.join(missing)} (python ocr_engine.py export-onnx 로 먼저 내보내세요)"
+        )
+    engine = PaddleOCR(**settings, use_onnx=True, **paths, **options)
+    if threads:
+        _tune_onnx_sessions(engine, threads)
+    return engine
+
+
+def _tune_onnx_sessions(engine, threads):
+    # paddleocr 는 기본 옵션(모든 코어)으로 세션을 만들므로 스레드 수를 정해서 다시 만듦
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    for stage, attr in (("det", "text_detector"), ("rec", "text_recognizer"), ("cls", "text_classifier")):
+        predictor = getattr(engine, attr, None)
+        if predictor is not None:
+            predictor.predictor = ort.InferenceSession(
+                onnx_model_path(stage), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+
+
+def create_ocr(settings, backend_name=None, **options):
+    """새 OCR 엔진을 만듭니다 (프로세스 풀/작업 워커처럼 프로세스마다 하나씩 만들 때 사용)."""
+    name = backend_name or BACKEND
+    if name not in _backends:
+        raise ValueError(f"알 수 없는 OCR 백엔드입니다: {name} (가능한 값: {', '.join(backends())})")
+    options.setdefault("show_log", False)
+    engine = _backends[name](settings, **options)
+    if ADAPTIVE:
+        from ocr_pipeline import AdaptiveOCR
+        engine = AdaptiveOCR(engine)
+    return engine
+
+
+def _key(settings, options):
+    return json.dumps([BACKEND, settings, options], sort_keys=True, ensure_ascii=False)
+
+
+def get_ocr(settings, **options):
+    """설정별로 한 번만 만드는 프로세스 공용 OCR 엔진. 만드는 중이면 끝날 때까지 기다립니다."""
+    key = _key(settings, options)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            start = time.perf_counter()
+            engine = create_ocr(settings, **options)
+            _build_seconds[key] = time.perf_counter() - start
+            _engines[key] = engine
+    return engine
+
+
+def prewarm(settings, **options):
+    """백그라운드 스레드에서 엔진을 미리 만듭니다. 스레드를 반환합니다."""
+    thread = threading.Thread(target=get_ocr, args=(settings,), kwargs=options, name="ocr-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def build_times():
+    """설정별 엔진 생성 시간(초)."""
+    with _lock:
+        return {key: seconds for key, seconds in _build_seconds.items()}
+
+
+def export_onnx(settings, out_dir=ONNX_DIR, quantize=True):
+    """기본 PaddleOCR 모델(det/rec/cls)을 ONNX 로 내보내고, quantize 면 det/rec 를 INT8 로 양자화합니다."""
+    # 모델 파일을 내려받고 위치를 알아내기 위해 기본 백엔드를 한 번 만듦
+    engine = _paddle(settings, use_gpu=False, show_log=False)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for stage in ONNX_STAGES:
+        model_dir = getattr(engine.args, f"{stage}_model_dir")
+        target = os.path.join(out_dir, f"{stage}.onnx")
+        subprocess.run([
+            "paddle2onnx", "--model_dir", model_dir,
+            "--model_filename", "inference.pdmodel", "--params_filename", "inference.pdiparams",
+            "--save_file", target, "--opset_version", "11", "--enable_onnx_checker", "True",
+        ], check=True)
+        written.append(target)
+        # 방향 분류 모델은 작아서 양자화 이득이 거의 없음
+        if quantize and stage != "cls":
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantized = os.path.join(out_dir, f"{stage}.int8.onnx")
+            quantize_dynamic(target, quantized, weight_type=QuantType.QUInt8)
+            written.append(quantized)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 엔진 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export-onnx", help="PaddleOCR 모델을 ONNX 로 내보내기")
+    export.add_argument("--out", default=ONNX_DIR)
+    export.add_argument("--no-quantize", action="store_true", help="INT8 양자화 모델을 만들지 않음")
+    args = parser.parse_args(argv)
+
+    if args.command == "export-onnx":
+        for path in export_onnx({"lang": "korean", "use_angle_cls": True}, args.out, not args.no_quantize):
+            print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
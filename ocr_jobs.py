@@ -0,0 +1,347 @@
+"""로컬 OCR 작업 큐 (SQLite 기반).
+
+"OCR 실행"은 작업(강의, 주차, 이미지 목록)을 큐에 넣기만 하고,
+OCR 모델을 가진 워커 프로세스들이 이미지 단위로 작업을 가져가 처리합니다.
+워커는 몇 초마다 살아 있다는 기록(heartbeat)을 남기고, 기록이 끊긴 워커가 처리 중이던 이미지는
+다른 워커나 재시작한 워커가 다시 큐에 넣으므로 작업이 이어서 진행됩니다.
+같은 칠판을 다시 찍은 사진은 이전 사진(prev_path)을 기다렸다가 바뀐 부분만 OCR합니다 (incremental_ocr 참고).
+
+워커만 따로 실행하려면:
+    python ocr_jobs.py worker --count 2
+"""
+import argparse
+import multiprocessing as mp
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+JOBS_DB_PATH = os.getenv("OCR_JOBS_DB", os.path.join("jobs", "ocr_jobs.db"))
+JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# 워커가 살아 있다는 기록을 남기는 간격(초). HEARTBEAT_TIMEOUT 초 동안 기록이 없으면 죽은 것으로 보고
+# 그 워커가 처리 중이던 이미지를 다시 큐에 넣음
+HEARTBEAT_INTERVAL = float(os.getenv("OCR_JOB_HEARTBEAT_INTERVAL", "5"))
+HEARTBEAT_TIMEOUT = float(os.getenv("OCR_JOB_HEARTBEAT_TIMEOUT", "20"))
+# 워커가 살아 있어도 이 시간(초) 동안 끝나지 않은 'running' 이미지는 멈춘 것으로 보고 다시 큐에 넣음
+STALE_SECONDS = int(os.getenv("OCR_JOB_STALE_SECONDS", "300"))
+POLL_INTERVAL = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lecture TEXT NOT NULL,
+    week TEXT NOT NULL,
+    status TEXT NOT NULL,
+    text TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_images (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    seq INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    prev_path TEXT,
+    status TEXT NOT NULL,
+    text TEXT,
+    error TEXT,
+    worker TEXT,
+    claimed_at REAL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS job_images_status ON job_images(status, job_id, seq);
+CREATE INDEX IF NOT EXISTS jobs_lecture_week ON jobs(lecture, week, id);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+_ready = set()
+
+
+def connect(path=None):
+    """큐 DB 연결을 새로 엽니다. 스키마는 프로세스마다 처음 한 번만 확인합니다."""
+    path = path or JOBS_DB_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    key = (os.getpid(), path)
+    if key not in _ready:
+        conn.executescript(_SCHEMA)
+        # prev_path 가 없던 이전 버전의 큐 파일
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(job_images)")}
+        if "prev_path" not in columns:
+            conn.execute("ALTER TABLE job_images ADD COLUMN prev_path TEXT")
+        _ready.add(key)
+    return conn
+
+
+def get_conn():
+    """스레드(및 프로세스)별로 재사용하는 큐 DB 연결 (진행 상황 화면이 1초마다 조회하므로 매번 열지 않음)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), JOBS_DB_PATH):
+        return conn
+    conn = connect()
+    _local.conn = conn
+    _local.key = (os.getpid(), JOBS_DB_PATH)
+    return conn
+
+
+def plan_previous(image_paths, earlier=()):
+    """이미지마다 같은 칠판의 이전 사진 경로를 찾습니다 (없으면 None).
+
+    작업 안의 앞선 사진을 최근 것부터 먼저 보고, 그다음 earlier(이전에 올린 사진, 최근 것부터)를 봅니다.
+    """
+    import incremental_ocr
+
+    if not incremental_ocr.INCREMENTAL:
+        return [None] * len(image_paths)
+    paths = [os.path.abspath(path) for path in image_paths]
+    in_job = set(paths)
+    earlier = [os.path.abspath(path) for path in earlier if os.path.abspath(path) not in in_job]
+    return [incremental_ocr.find_previous(path, paths[:seq][::-1] + earlier) for seq, path in enumerate(paths)]
+
+
+def enqueue_job(lecture, week, image_paths, conn=None, earlier=()):
+    """OCR 작업을 큐에 넣고 작업 id를 반환합니다. earlier 는 같은 강의/주차에 이전에 올린 사진 경로(최근 것부터)."""
+    conn = conn or get_conn()
+    previous = plan_previous(image_paths, earlier)
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cur = conn.execute(
+            "INSERT INTO jobs (lecture, week, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+            (lecture, week, now, now),
+        )
+        job_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO job_images (job_id, seq, path, prev_path, status) VALUES (?, ?, ?, ?, 'queued')",
+            [(job_id, seq, os.path.abspath(path), prev) for seq, (path, prev) in enumerate(zip(image_paths, previous))],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return job_id
+
+
+def get_job(job_id, conn=None):
+    """작업 상태와 이미지별 진행 상황을 반환합니다."""
+    conn = conn or get_conn()
+    job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if job is None:
+        return None
+    images = conn.execute(
+        "SELECT seq, path, status, error FROM job_images WHERE job_id = ? ORDER BY seq", (job_id,)
+    ).fetchall()
+    job = dict(job)
+    job["images"] = [dict(row) for row in images]
+    job["done_count"] = sum(1 for row in images if row["status"] in ('done', 'failed'))
+    return job
+
+
+def latest_job(lecture, week, conn=None):
+    """강의/주차의 가장 최근 작업을 반환합니다."""
+    conn = conn or get_conn()
+    row = conn.execute(
+        "SELECT id FROM jobs WHERE lecture = ? AND week = ? ORDER BY id DESC LIMIT 1", (lecture, week)
+    ).fetchone()
+    return get_job(row["id"], conn) if row else None
+
+
+def heartbeat(conn, worker_name):
+    """워커가 살아 있다고 기록합니다."""
+    conn.execute(
+        "INSERT INTO workers (name, heartbeat_at) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+        (worker_name, time.time()),
+    )
+
+
+def _heartbeat_loop(worker_name, stop):
+    # OCR 한 장이 오래 걸려도 기록이 끊기지 않도록 작업 루프와 따로 돌림
+    conn = connect()
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        heartbeat(conn, worker_name)
+    conn.close()
+
+
+def requeue_stale(conn, stale_seconds=STALE_SECONDS, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+    """기록이 끊긴(죽은) 워커가 잡고 있거나 오래 멈춰 있는 'running' 이미지를 다시 큐에 넣습니다."""
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE job_images SET status = 'queued', worker = NULL, claimed_at = NULL "
+        "WHERE status = 'running' AND (claimed_at < ? OR NOT EXISTS ("
+        "SELECT 1 FROM workers AS w WHERE w.name = job_images.worker AND w.heartbeat_at >= ?))",
+        (now - stale_seconds, now - heartbeat_timeout),
+    )
+    conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - max(stale_seconds, heartbeat_timeout),))
+    return cur.rowcount
+
+
+def _claim_image(conn, worker_name):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # 같은 작업 안의 이전 사진이 아직 끝나지 않은 이미지는 건너뜀 (그 결과를 재사용하므로)
+        row = conn.execute(
+            "SELECT job_id, seq, path, prev_path FROM job_images AS i WHERE status = 'queued' AND NOT EXISTS ("
+            "SELECT 1 FROM job_images AS p WHERE p.job_id = i.job_id AND p.seq < i.seq "
+            "AND p.path = i.prev_path AND p.status NOT IN ('done', 'failed')) "
+            "ORDER BY job_id, seq LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            now = time.time()
+            conn.execute(
+                "UPDATE job_images SET status = 'running', worker = ?, claimed_at = ? WHERE job_id = ? AND seq = ?",
+                (worker_name, now, row["job_id"], row["seq"]),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, row["job_id"]),
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def _finish_image(conn, job_id, seq, text=None, error=None):
+    conn.execute(
+        "UPDATE job_images SET status = ?, text = ?, error = ? WHERE job_id = ? AND seq = ?",
+        ('failed' if error else 'done', text, error, job_id, seq),
+    )
+
+
+def _finalize_job(conn, job_id):
+    """모든 이미지가 끝난 작업의 텍스트를 합쳐서 필기 저장소에 기록합니다."""
+    from incremental_ocr import merge_transcript
+    from search_index import index_ocr
+    from storage import append_note
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        remaining = conn.execute(
+            "SELECT COUNT(*) FROM job_images WHERE job_id = ? AND status NOT IN ('done', 'failed')", (job_id,)
+        ).fetchone()[0]
+        if job is None or job["status"] in ('done', 'failed') or remaining:
+            conn.execute("COMMIT")
+            return
+
+        rows = conn.execute(
+            "SELECT path, status, text, error FROM job_images WHERE job_id = ? ORDER BY seq", (job_id,)
+        ).fetchall()
+        # 같은 칠판을 여러 번 찍어서 겹치는 줄은 한 번만 남김
+        text = "\n".join(merge_transcript(
+            row["text"].splitlines() for row in rows if row["status"] == 'done' and row["text"]
+        ))
+        errors = [row["error"] for row in rows if row["status"] == 'failed']
+        status = 'failed' if errors and len(errors) == len(rows) else 'done'
+
+        # 이미지별 OCR 텍스트도 검색할 수 있도록 색인 (같은 내용이면 다시 색인하지 않음)
+        for row in rows:
+            if row["status"] == 'done' and row["text"]:
+                index_ocr(job["lecture"], job["week"], row["path"], row["text"])
+        # 같은 텍스트는 다시 붙이지 않으므로 재시작 후 반복되어도 안전함
+        if text:
+            append_note(job["lecture"], job["week"], text)
+        conn.execute(
+            "UPDATE jobs SET status = ?, text = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, text, "\n".join(errors) or None, time.time(), job_id),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def worker_loop(ocr_settings, worker_name=None, parent_pid=None, stop_when_idle=False):
+    """큐에서 이미지를 하나씩 가져와 OCR하는 워커 루프입니다."""
+    from ocr_engine import create_ocr
+
+    # os.uname 은 윈도우에 없음
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    # 모델을 먼저 올려두고(웜업) 작업을 받기 시작
+    ocr = create_ocr(ocr_settings, use_gpu=False)
+    conn = get_conn()
+    # 이미지를 가져가기 전에 살아 있다는 기록부터 남김 (다른 워커가 곧바로 되돌리지 않도록)
+    heartbeat(conn, worker_name)
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat_loop, args=(worker_name, stop), name="ocr-worker-heartbeat", daemon=True).start()
+    requeue_stale(conn)
+    last_recover = time.time()
+
+    try:
+        while True:
+            if parent_pid is not None and os.getppid() != parent_pid:
+                return
+            if time.time() - last_recover > HEARTBEAT_TIMEOUT:
+                requeue_stale(conn)
+                last_recover = time.time()
+
+            row = _claim_image(conn, worker_name)
+            if row is None:
+                if stop_when_idle:
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            _process_image(conn, ocr, ocr_settings, row)
+    finally:
+        stop.set()
+        conn.execute("DELETE FROM workers WHERE name = ?", (worker_name,))
+
+
+def _process_image(conn, ocr, ocr_settings, row):
+    from incremental_ocr import incremental_ocr
+    from ocr_batch import extract_texts
+    from ocr_cache import cached_ocr
+
+    try:
+        if row["prev_path"]:
+            result = incremental_ocr(ocr, row["path"], row["prev_path"], ocr_settings)
+        else:
+            result = cached_ocr(ocr, row["path"], ocr_settings)
+        _finish_image(conn, row["job_id"], row["seq"], text="\n".join(extract_texts(result)))
+    except Exception as e:
+        _finish_image(conn, row["job_id"], row["seq"], error=f"{os.path.basename(row['path'])}: {e}")
+    _finalize_job(conn, row["job_id"])
+
+
+def start_workers(ocr_settings, count=JOB_WORKERS):
+    """OCR 워커 프로세스들을 띄우고 프로세스 목록을 반환합니다."""
+    ctx = mp.get_context('spawn')
+    processes = []
+    for i in range(count):
+        p = ctx.Process(
+            target=worker_loop,
+            args=(ocr_settings, None, os.getpid()),
+            name=f"ocr-worker-{i}",
+            daemon=True,
+        )
+        p.start()
+        processes.append(p)
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 작업 큐 워커")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="워커 프로세스 실행")
+    worker.add_argument("--count", type=int, default=JOB_WORKERS)
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        processes = start_workers({"lang": "korean", "use_angle_cls": True}, args.count)
+        for p in processes:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""단계별(검출 -> 방향 분류 -> 인식) OCR 파이프라인과 적응형 OCR.
+
+PaddleOCR 은 use_angle_cls=True 이면 모든 글자 상자에 방향 분류기를 돌립니다.
+판서 사진은 거의 항상 바로 서 있으므로, 적응형 모드는 사진마다 큰 상자 몇 개로 전체 방향을 한 번 추정하고
+확실하면 상자별 분류를 건너뜁니다. 검출 결과 글자가 없는(빈 칠판, 칠판이 아닌) 사진은 인식을 아예 하지 않습니다.
+단계별 소요 시간은 last_timings() / stage_stats() 로 확인합니다.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+# PaddleOCR 기본값과 같은 인식 점수 하한
+DROP_SCORE = 0.5
+# 방향 추정에 쓸 상자 수와, 상자별 분류를 건너뛸 최소 신뢰도/일치 비율
+ORIENTATION_SAMPLES = 5
+ORIENTATION_CONFIDENCE = 0.9
+ORIENTATION_AGREEMENT = 0.8
+# 글자 상자 면적 합이 사진의 이 비율보다 작으면 글자가 없는 사진으로 봄
+MIN_TEXT_AREA_RATIO = float(os.getenv("OCR_MIN_TEXT_AREA", "0.0005"))
+
+STAGES = ("det", "cls", "rec", "total")
+
+_local = threading.local()
+_stats = {"calls": 0, "skipped_blank": 0, "cls_skipped": 0, **{f"{stage}_s": 0.0 for stage in STAGES}}
+_stats_lock = threading.Lock()
+
+
+def last_timings():
+    """현재 스레드에서 마지막으로 실행한 적응형 OCR의 단계별 시간(초)."""
+    return dict(getattr(_local, 'timings', {}))
+
+
+def stage_stats():
+    """적응형 OCR 누적 통계 (호출 수, 건너뛴 단계 수, 단계별 누적 시간)."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _rect(box):
+    pts = np.asarray(box, dtype=np.float32)
+    return pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()
+
+
+def _area(box):
+    x0, y0, x1, y1 = _rect(box)
+    return float((x1 - x0) * (y1 - y0))
+
+
+def crop_box(img, box):
+    """PaddleOCR 와 같은 방식으로 글자 상자를 똑바로 펴서 잘라냅니다."""
+    import cv2
+
+    pts = np.asarray(box, dtype=np.float32)
+    width = int(max(np.linalg.norm(pts[0] - pts[1]), np.linalg.norm(pts[2] - pts[3])))
+    height = int(max(np.linalg.norm(pts[0] - pts[3]), np.linalg.norm(pts[1] - pts[2])))
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    crop = cv2.warpPerspective(img, cv2.getPerspectiveTransform(pts, target), (max(1, width), max(1, height)),
+                               borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    if crop.ndim == 2:
+        crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+    if height and height / max(1, width) >= 1.5:
+        crop = np.rot90(crop)
+    return np.ascontiguousarray(crop)
+
+
+def reading_order(lines):
+    """[상자, ...] 로 시작하는 줄 목록을 위에서 아래로, 같은 줄(10px 이내)은 왼쪽에서 오른쪽으로 정렬합니다."""
+    lines.sort(key=lambda line: (_rect(line[0])[1], _rect(line[0])[0]))
+    for i in range(len(lines) - 1):
+        for j in range(i, -1, -1):
+            a, b = _rect(lines[j][0]), _rect(lines[j + 1][0])
+            if abs(b[1] - a[1]) < 10 and b[0] < a[0]:
+                lines[j], lines[j + 1] = lines[j + 1], lines[j]
+            else:
+                break
+    return lines
+
+
+def detect(ocr, img):
+    """글자 상자 검출만 합니다."""
+    result = ocr.ocr(img, rec=False)
+    return (result[0] if result else None) or []
+
+
+def recognize(ocr, img, boxes, cls=True, rotate=False):
+    """상자들을 잘라서 인식하고 [[상자, [텍스트, 점수]], ...] 를 반환합니다 (DROP_SCORE 미만은 제외)."""
+    if not boxes:
+        return []
+    crops = [crop_box(img, box) for box in boxes]
+    if rotate:
+        crops = [np.ascontiguousarray(np.rot90(crop, 2)) for crop in crops]
+    lines = []
+    for box, rec in zip(boxes, ocr.ocr(crops, det=False, cls=cls)):
+        text, score = rec[0]
+        if score >= DROP_SCORE:
+            lines.append([box, [text, float(score)]])
+    return lines
+
+
+def estimate_orientation(ocr, img, boxes):
+    """큰 상자 몇 개로 사진 전체의 글자 방향('0' 또는 '180')을 추정합니다. 확실하지 않으면 None."""
+    samples = sorted(boxes, key=_area, reverse=True)[:ORIENTATION_SAMPLES]
+    results = ocr.ocr([crop_box(img, box) for box in samples], det=False, rec=False, cls=True)
+    votes = [result[0] for result in results if result]
+    if not votes:
+        return None
+    labels = [label for label, _ in votes]
+    best = max(set(labels), key=labels.count)
+    agreeing = [score for label, score in votes if label == best]
+    if len(agreeing) / len(votes) >= ORIENTATION_AGREEMENT and min(agreeing) >= ORIENTATION_CONFIDENCE:
+        return best
+    return None
+
+
+def adaptive_ocr(ocr, img, cls=True):
+    """검출 -> (필요하면) 방향 분류 -> 인식 순서로 OCR하고 ocr.ocr() 와 같은 형식으로 반환합니다."""
+    timings = {stage: 0.0 for stage in STAGES}
+    start = time.perf_counter()
+    boxes = detect(ocr, img)
+    timings["det"] = time.perf_counter() - start
+
+    text_area = sum(_area(box) for box in boxes)
+    if not boxes or text_area < MIN_TEXT_AREA_RATIO * img.shape[0] * img.shape[1]:
+        # 글자가 없는 사진은 인식 단계를 건너뜀
+        timings["total"] = time.perf_counter() - start
+        _record(timings, skipped_blank=1)
+        return [None]
+
+    use_cls = cls and getattr(ocr, "use_angle_cls", False)
+    rotate = False
+    cls_skipped = 0
+    if use_cls:
+        t = time.perf_counter()
+        orientation = estimate_orientation(ocr, img, boxes)
+        timings["cls"] = time.perf_counter() - t
+        if orientation is not None:
+            # 전체 방향이 확실하면 상자별 분류 없이 (필요하면 한꺼번에 뒤집어서) 인식
+            use_cls = False
+            rotate = orientation == '180'
+            cls_skipped = 1
+
+    t = time.perf_counter()
+    lines = recognize(ocr, img, boxes, cls=use_cls, rotate=rotate)
+    timings["rec"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - start
+    _record(timings, cls_skipped=cls_skipped)
+    return [reading_order(lines) or None]
+
+
+def _record(timings, skipped_blank=0, cls_skipped=0):
+    _local.timings = timings
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["skipped_blank"] += skipped_blank
+        _stats["cls_skipped"] += cls_skipped
+        for stage in STAGES:
+            _stats[f"{stage}_s"] += timings[stage]
+
+
+class AdaptiveOCR:
+    """OCR 엔진을 감싸서 이미지 한 장의 전체 OCR(det+rec)만 적응형 파이프라인으로 처리합니다.
+
+    검출만/인식만 하는 호출과 경로 입력은 원래 엔진으로 그대로 넘깁니다.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        if det and rec and isinstance(img, np.ndarray):
+            return adaptive_ocr(self.engine, img, cls=cls)
+        return self.engine.ocr(img, det=det, rec=rec, cls=cls)
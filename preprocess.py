@@ -0,0 +1,106 @@
+import io
+import math
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+import metrics
+
+# OCR 전처리 설정 (OCR 결과 캐시 키에도 포함됨)
+PREPROCESS_SETTINGS = {
+    "max_long_edge": int(os.getenv("OCR_MAX_LONG_EDGE", "1600")),
+    "grayscale": os.getenv("OCR_GRAYSCALE", "1") == "1",
+    "crop_board": os.getenv("OCR_CROP_BOARD", "1") == "1",
+}
+
+# 칠판 영역으로 인정할 최소 면적 비율
+BOARD_MIN_AREA_RATIO = 0.25
+# 칠판 영역을 자를 때 남겨둘 여백 비율
+BOARD_MARGIN_RATIO = 0.02
+
+
+def cache_settings(ocr_settings, settings=None):
+    """OCR 설정과 전처리 설정(기본이 아닌 OCR 백엔드도)을 합쳐 캐시 키용 설정을 만듭니다."""
+    from ocr_engine import cache_tag
+
+    key = dict(ocr_settings, preprocess=settings or PREPROCESS_SETTINGS)
+    if cache_tag():
+        key["backend"] = cache_tag()
+    return key
+
+
+def draft_size(size, max_edge):
+    """긴 변이 max_edge 가 되는 크기. Image.draft 는 두 변 모두 요청 크기 이상이 되게 줄이므로
+    (max_edge, max_edge) 를 그대로 넘기면 가로로 긴 사진은 거의 줄지 않음."""
+    w, h = size
+    scale = max_edge / max(w, h)
+    return max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale))
+
+
+def _open(source):
+    if isinstance(source, str):
+        return Image.open(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+
+def _board_bbox(gray):
+    import cv2
+
+    h, w = gray.shape[:2]
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(blur, 50, 150)
+    edges = cv2.dilate(edges, np.ones((5, 5), np.uint8), iterations=2)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    best = None
+    best_area = 0
+    for contour in contours:
+        x, y, cw, ch = cv2.boundingRect(contour)
+        area = cw * ch
+        # 너무 작거나 사진 전체와 같은 영역은 칠판으로 보지 않음
+        if area < BOARD_MIN_AREA_RATIO * w * h or area > 0.98 * w * h:
+            continue
+        if area > best_area:
+            best = (x, y, cw, ch)
+            best_area = area
+
+    if best is None:
+        return None
+
+    x, y, cw, ch = best
+    mx = int(w * BOARD_MARGIN_RATIO)
+    my = int(h * BOARD_MARGIN_RATIO)
+    return max(0, x - mx), max(0, y - my), min(w, x + cw + mx), min(h, y + ch + my)
+
+
+@metrics.timed("image_preprocess")
+def preprocess_image(source, settings=None):
+    """사진을 OCR용 NumPy 배열로 변환합니다 (EXIF 회전, 축소, 흑백, 칠판 영역 자르기)."""
+    settings = settings or PREPROCESS_SETTINGS
+    max_edge = settings["max_long_edge"]
+    mode = 'L' if settings["grayscale"] else 'RGB'
+
+    img = _open(source)
+    # JPEG는 디코딩 단계에서 바로 축소해서 메모리 사용량을 줄임
+    if max_edge:
+        img.draft(mode, draft_size(img.size, max_edge))
+    img = ImageOps.exif_transpose(img)
+    img = img.convert(mode)
+    if max_edge and max(img.size) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    arr = np.asarray(img)
+    if settings["crop_board"]:
+        gray = arr if arr.ndim == 2 else np.asarray(img.convert('L'))
+        bbox = _board_bbox(gray)
+        if bbox is not None:
+            x0, y0, x1, y1 = bbox
+            arr = arr[y0:y1, x0:x1]
+
+    if arr.ndim == 3:
+        # PaddleOCR는 OpenCV와 같은 BGR 순서를 기대함
+        arr = arr[:, :, ::-1]
+    return np.ascontiguousarray(arr)
@@ -0,0 +1,185 @@
+"""강의 학기 일정 (주차 레코드, 일괄 변경, 선택 목록).
+
+저장 형식은 예전과 같은 {"N주차": {"date", "display_name", "type"}} dict 이고,
+이 모듈은 그것을 주차 번호 순서의 Week 튜플로 바꿔서 다룹니다.
+표시명은 번호/날짜/유형에서 항상 새로 만들므로 문자열을 잘라 고치지 않습니다.
+화면의 주차 선택 목록과 표시명 -> 주차 역참조는 view() 로 한 번 만들고,
+data_access 가 강의 데이터 버전마다 캐시합니다.
+
+여러 강의를 한 번에 등록하려면 (CSV 열: 강의명, 첫 수업 날짜(YYYY-MM-DD)[, 주차 수]):
+    python schedule.py import courses.csv
+"""
+import argparse
+import csv
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, NamedTuple, Tuple
+
+# 학기 주차 수 기본값
+TERM_WEEKS = int(os.getenv("TERM_WEEKS", "15"))
+DATE_FORMAT = "%Y-%m-%d"
+
+# 주차 유형과 화면 표시 이름
+WEEK_TYPES = {
+    "regular": "일반 수업",
+    "midterm": "중간고사",
+    "final": "기말고사",
+    "holiday": "휴강",
+}
+
+
+class Week(NamedTuple):
+    number: int
+    date: date
+    type: str = "regular"
+
+    @property
+    def name(self):
+        return f"{self.number}주차"
+
+    @property
+    def display_name(self):
+        label = f"{self.number}주차({self.date.strftime('%m월 %d일')})"
+        # 일반 수업이 아닌 주차는 유형을 뒤에 붙임
+        return label if self.type == "regular" else f"{label} - {WEEK_TYPES[self.type]}"
+
+    def to_dict(self):
+        return {"date": self.date.strftime(DATE_FORMAT), "display_name": self.display_name, "type": self.type}
+
+
+class ScheduleView(NamedTuple):
+    """한 강의의 주차 선택에 필요한 값들 (주차 번호 순서)."""
+    weeks: Tuple[Week, ...]
+    names: Tuple[str, ...]
+    options: Tuple[str, ...]
+    by_name: Dict[str, Week]
+    by_display: Dict[str, str]
+
+
+def parse_date(value):
+    return value if isinstance(value, date) else datetime.strptime(value, DATE_FORMAT).date()
+
+
+def week_number(week_name):
+    return int(week_name.split("주차")[0])
+
+
+def build(start_date, weeks=TERM_WEEKS):
+    """첫 수업 날짜부터 매주 한 주차씩 weeks 개의 주차를 만듭니다."""
+    if weeks < 1:
+        raise ValueError(f"주차 수는 1 이상이어야 합니다: {weeks}")
+    start = parse_date(start_date)
+    return tuple(Week(i, start + timedelta(days=7 * (i - 1))) for i in range(1, weeks + 1))
+
+
+def parse(schedule):
+    """저장된 dict 를 주차 번호 순서의 Week 튜플로 바꿉니다."""
+    return tuple(sorted(
+        (Week(week_number(name), parse_date(info["date"]), info.get("type", "regular"))
+         for name, info in schedule.items()),
+        key=lambda week: week.number,
+    ))
+
+
+def to_schedule(weeks):
+    """Week 들을 저장 형식 dict 로 바꿉니다."""
+    return {week.name: week.to_dict() for week in weeks}
+
+
+def view(schedule):
+    weeks = parse(schedule)
+    options = tuple(week.display_name for week in weeks)
+    return ScheduleView(
+        weeks=weeks,
+        names=tuple(week.name for week in weeks),
+        options=options,
+        by_name={week.name: week for week in weeks},
+        by_display={display: week.name for display, week in zip(options, weeks)},
+    )
+
+
+def _check_type(week_type):
+    if week_type not in WEEK_TYPES:
+        raise ValueError(f"알 수 없는 주차 유형: {week_type}")
+
+
+def update_week(weeks, number, date_value=None, week_type=None):
+    """number 주차의 날짜/유형을 바꾼 새 튜플을 반환합니다. 없는 주차면 KeyError."""
+    if week_type is not None:
+        _check_type(week_type)
+    if not any(week.number == number for week in weeks):
+        raise KeyError(f"{number}주차")
+    return tuple(
+        week._replace(
+            date=parse_date(date_value) if date_value else week.date,
+            type=week_type or week.type,
+        ) if week.number == number else week
+        for week in weeks
+    )
+
+
+def shift(weeks, days, first=1):
+    """first 주차부터 끝까지의 날짜를 days 일 옮깁니다 (보강/휴강으로 학기가 밀릴 때)."""
+    delta = timedelta(days=days)
+    return tuple(week._replace(date=week.date + delta) if week.number >= first else week for week in weeks)
+
+
+def mark(weeks, first, last, week_type):
+    """first ~ last 주차의 유형을 한 번에 바꿉니다 (시험 기간, 연휴)."""
+    _check_type(week_type)
+    return tuple(week._replace(type=week_type) if first <= week.number <= last else week for week in weeks)
+
+
+def resize(weeks, count):
+    """주차 수를 count 로 맞춥니다. 늘어나는 주차는 마지막 주차부터 매주 이어집니다."""
+    if count < 1:
+        raise ValueError(f"주차 수는 1 이상이어야 합니다: {count}")
+    weeks = tuple(week for week in weeks if week.number <= count)
+    if not weeks:
+        raise ValueError("주차가 없는 일정은 늘릴 수 없습니다.")
+    last = weeks[-1]
+    return weeks + tuple(
+        Week(number, last.date + timedelta(days=7 * (number - last.number)))
+        for number in range(last.number + 1, count + 1)
+    )
+
+
+def parse_csv(lines):
+    """CSV 줄들(강의명, 첫 수업 날짜[, 주차 수])에서 {강의명: 저장 형식 일정}을 만듭니다. 첫 줄이 머리글이면 건너뜁니다."""
+    courses = {}
+    for i, row in enumerate(csv.reader(lines)):
+        if not row or not row[0].strip():
+            continue
+        name, start = row[0].strip(), row[1].strip() if len(row) > 1 else ''
+        try:
+            start_date = parse_date(start)
+        except ValueError:
+            if i == 0:
+                continue
+            raise ValueError(f"{i + 1}번째 줄의 날짜를 읽을 수 없습니다: {start}")
+        weeks = int(row[2]) if len(row) > 2 and row[2].strip() else TERM_WEEKS
+        courses[name] = to_schedule(build(start_date, weeks))
+    return courses
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return parse_csv(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강의 학기 일정")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("import", help="CSV 의 강의들을 한 번에 등록")
+    load.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        import data_access
+
+        added = data_access.import_courses(read_csv(args.path))
+        print(f"{len(added)}개 강의를 등록했습니다. (이미 있는 강의는 건너뜀)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""필기, 요약, OCR 텍스트 전체 검색 (SQLite 역색인 + BM25).
+
+한국어는 띄어쓰기와 조사 때문에 단어 단위로 자르면 잘 찾지 못하므로, 한글/한자 구간은 글자 2-gram으로,
+영문/숫자는 단어 단위로 색인합니다. 색인은 필기를 저장할 때(storage.save_note / append_note)
+같은 트랜잭션에서 그 문서만 갱신하고, OCR 결과는 index_ocr() 로 이미지마다,
+요약은 만들어질 때 index_summary() 로 강의/주차마다 (무엇을 요약했는지별로 최근 것 하나) 추가합니다.
+검색은 질의의 토큰별 게시 목록만 읽으므로 문서가 늘어도 전체를 훑지 않습니다.
+이전 데이터를 다시 색인하려면:
+    python search_index.py rebuild
+    python search_index.py search "회귀 분석" [--lecture 통계학] [--week 1주차]
+"""
+import argparse
+import math
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+
+import storage
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_WIDTH = 80
+HIGHLIGHT = ("**", "**")
+
+KIND_NOTE = 'note'
+KIND_OCR = 'ocr'
+KIND_SUMMARY = 'summary'
+KIND_LABELS = {KIND_NOTE: "필기", KIND_OCR: "OCR", KIND_SUMMARY: "요약"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL DEFAULT '',
+    lecture TEXT NOT NULL,
+    week TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ref TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (username, lecture, week, kind, ref)
+);
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_postings_doc ON search_postings(doc_id);
+CREATE TABLE IF NOT EXISTS search_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# 한글 음절/자모, 한자, 일본 가나 구간은 2-gram으로 자름
+_CJK = "ᄀ-ᇿ㄰-㆏぀-ヿ㐀-䶿一-鿿가-힣"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[^\\W{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+_ready = set()
+
+
+def tokenize(text):
+    """텍스트를 색인 토큰으로 자릅니다 (한글/한자는 글자 2-gram, 그 밖은 소문자 단어)."""
+    tokens = []
+    for run in _TOKEN_RE.findall(unicodedata.normalize('NFC', text).lower()):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _ensure_schema(conn):
+    # storage 의 쓰기 트랜잭션 안에서도 부를 수 있도록 executescript(자동 COMMIT) 대신 문장별로 실행
+    key = (os.getpid(), storage.DB_PATH)
+    if key in _ready:
+        return
+    for statement in _SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    _ready.add(key)
+
+
+def get_conn():
+    conn = storage.get_conn()
+    built = (os.getpid(), storage.DB_PATH, 'built')
+    _ensure_schema(conn)
+    if built not in _ready:
+        _ready.add(built)
+        _ensure_built(conn)
+    return conn
+
+
+def _add_stat(conn, name, delta):
+    conn.execute(
+        "INSERT INTO search_stats (name, value) VALUES (?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+        (name, delta),
+    )
+
+
+def _remove(conn, doc_id, length):
+    conn.execute("DELETE FROM search_postings WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM search_docs WHERE id = ?", (doc_id,))
+    _add_stat(conn, 'docs', -1)
+    _add_stat(conn, 'length', -length)
+
+
+def index_document(conn, username, lecture, week, kind, ref, content):
+    """문서 하나의 색인을 새 내용으로 바꿉니다. 호출하는 쪽의 트랜잭션 안에서 실행됩니다.
+
+    내용이 비어 있으면 문서를 색인에서 지웁니다. 색인에 문서가 남아 있으면 True 를 반환합니다.
+    """
+    _ensure_schema(conn)
+    old = conn.execute(
+        "SELECT id, length, content FROM search_docs "
+        "WHERE username = ? AND lecture = ? AND week = ? AND kind = ? AND ref = ?",
+        (username, lecture, week, kind, ref),
+    ).fetchone()
+    if old is not None:
+        if old["content"] == content:
+            return True
+        _remove(conn, old["id"], old["length"])
+
+    tokens = tokenize(content)
+    if not tokens:
+        return False
+    cur = conn.execute(
+        "INSERT INTO search_docs (username, lecture, week, kind, ref, content, length, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (username, lecture, week, kind, ref, content, len(tokens), time.time()),
+    )
+    conn.executemany(
+        "INSERT INTO search_postings (term, doc_id, tf) VALUES (?, ?, ?)",
+        [(term, cur.lastrowid, tf) for term, tf in Counter(tokens).items()],
+    )
+    _add_stat(conn, 'docs', 1)
+    _add_stat(conn, 'length', len(tokens))
+    return True
+
+
+def index_ocr(lecture, week, ref, text, username=''):
+    """이미지 한 장의 OCR 텍스트를 색인합니다 (ref 는 이미지 경로 등 이미지를 구분하는 값)."""
+    conn = get_conn()
+    with storage.transaction(conn):
+        index_document(conn, username, lecture, week, KIND_OCR, ref, text)
+
+
+def index_summary(lecture, week, ref, text, username=''):
+    """만든 요약을 색인합니다. ref 는 요약한 대상('note', 'ocr')이며 같은 대상의 이전 요약을 바꿉니다.
+    실패한 요약(summarizer.summary_failed)은 호출하는 쪽에서 거릅니다."""
+    conn = get_conn()
+    with storage.transaction(conn):
+        index_document(conn, username, lecture, week, KIND_SUMMARY, ref, text)
+
+
+def _stats(conn):
+    rows = dict(conn.execute("SELECT name, value FROM search_stats").fetchall())
+    return rows.get('docs', 0), rows.get('length', 0)
+
+
+def search(query, username='', lecture=None, week=None, kind=None, limit=20):
+    """질의와 맞는 문서를 BM25 점수순으로 반환합니다.
+
+    결과는 {"lecture", "week", "kind", "ref", "score", "snippet"} dict 목록이며
+    snippet 에는 일치한 부분이 HIGHLIGHT 로 표시됩니다.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    conn = get_conn()
+    total_docs, total_length = _stats(conn)
+    if total_docs <= 0:
+        return []
+    avg_length = total_length / total_docs
+
+    document_frequency = dict(conn.execute(
+        f"SELECT term, COUNT(*) FROM search_postings WHERE term IN ({', '.join('?' * len(terms))}) GROUP BY term",
+        terms,
+    ).fetchall())
+    idf = {
+        term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        for term, df in document_frequency.items()
+    }
+
+    # 점수 계산과 상위 limit 개 선택은 SQLite 안에서 (게시 목록을 파이썬으로 옮기지 않음)
+    weights = [(term, idf[term]) for term in terms if term in idf]
+    if not weights:
+        return []
+    sql = (
+        f"WITH q(term, idf) AS (VALUES {', '.join(['(?, ?)'] * len(weights))}) "
+        "SELECT p.doc_id, SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * d.length / ?))) AS score "
+        "FROM q JOIN search_postings p ON p.term = q.term JOIN search_docs d ON d.id = p.doc_id "
+        "WHERE d.username = ?"
+    )
+    params = [value for weight in weights for value in weight]
+    params += [BM25_K1, BM25_K1, BM25_B, BM25_B, avg_length, username]
+    for column, value in (("lecture", lecture), ("week", week), ("kind", kind)):
+        if value is not None:
+            sql += f" AND d.{column} = ?"
+            params.append(value)
+    sql += " GROUP BY p.doc_id ORDER BY score DESC LIMIT ?"
+    params.append(limit)
+
+    top = conn.execute(sql, params).fetchall()
+    if not top:
+        return []
+    docs = {
+        row["id"]: row for row in conn.execute(
+            f"SELECT id, lecture, week, kind, ref, content FROM search_docs "
+            f"WHERE id IN ({', '.join('?' * len(top))})",
+            [doc_id for doc_id, _ in top],
+        )
+    }
+    return [
+        {
+            "lecture": docs[doc_id]["lecture"],
+            "week": docs[doc_id]["week"],
+            "kind": docs[doc_id]["kind"],
+            "ref": docs[doc_id]["ref"],
+            "score": score,
+            "snippet": snippet(docs[doc_id]["content"], query),
+        }
+        for doc_id, score in top if doc_id in docs
+    ]
+
+
+def _match_spans(text, query):
+    # 질의 토큰(2-gram/단어)이 원문에 나오는 위치를 모아서 겹치는 구간을 합침
+    folded = unicodedata.normalize('NFC', text).lower()
+    spans = []
+    for term in set(tokenize(query)):
+        start = folded.find(term)
+        while start >= 0:
+            spans.append((start, start + len(term)))
+            start = folded.find(term, start + 1)
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def snippet(text, query, width=SNIPPET_WIDTH, highlight=HIGHLIGHT):
+    """일치한 부분이 가장 많이 모인 구간을 width 글자 정도로 잘라 일치한 부분을 표시합니다."""
+    text = unicodedata.normalize('NFC', text)
+    spans = _match_spans(text, query)
+    if not spans:
+        return text[:width].replace("\n", " ")
+
+    # 창 안에 들어오는 일치 글자 수가 가장 많은 시작점
+    best_start, best_covered = 0, -1
+    for start, _ in spans:
+        window_start = max(0, start - width // 4)
+        covered = sum(min(end, window_start + width) - s for s, end in spans
+                      if s >= window_start and s < window_start + width)
+        if covered > best_covered:
+            best_start, best_covered = window_start, covered
+    window_end = min(len(text), best_start + width)
+
+    parts = ["…" if best_start > 0 else ""]
+    position = best_start
+    for start, end in spans:
+        if end <= best_start or start >= window_end:
+            continue
+        start, end = max(start, best_start), min(end, window_end)
+        parts.append(text[position:start])
+        parts.append(f"{highlight[0]}{text[start:end]}{highlight[1]}")
+        position = end
+    parts.append(text[position:window_end])
+    parts.append("…" if window_end < len(text) else "")
+    return "".join(parts).replace("\n", " ")
+
+
+def rebuild(conn=None):
+    """저장된 필기로 필기 색인을 다시 만들고, 나머지 문서(OCR)는 저장된 내용으로 다시 색인합니다.
+
+    색인한 문서 수를 반환합니다.
+    """
+    conn = conn or storage.get_conn()
+    _ensure_schema(conn)
+    with storage.transaction(conn):
+        others = conn.execute(
+            "SELECT username, lecture, week, kind, ref, content FROM search_docs WHERE kind != ?", (KIND_NOTE,)
+        ).fetchall()
+        conn.execute("DELETE FROM search_postings")
+        conn.execute("DELETE FROM search_docs")
+        conn.execute("DELETE FROM search_stats")
+        count = 0
+        for row in conn.execute("SELECT username, lecture, week, note FROM notes").fetchall():
+            count += index_document(conn, row["username"], row["lecture"], row["week"], KIND_NOTE, '', row["note"])
+        for row in others:
+            count += index_document(conn, row["username"], row["lecture"], row["week"], row["kind"], row["ref"],
+                                    row["content"])
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('search_index_built', ?)", (str(time.time()),)
+        )
+    return count
+
+
+def _ensure_built(conn):
+    # 색인이 처음 만들어질 때 한 번만 기존 필기를 색인
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'search_index_built'").fetchone() is None:
+        rebuild(conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="필기, 요약, OCR 텍스트 검색 색인")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="저장된 필기와 OCR 텍스트로 색인 다시 만들기")
+    find = sub.add_parser("search", help="질의로 검색")
+    find.add_argument("query")
+    find.add_argument("--lecture")
+    find.add_argument("--week")
+    find.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        print(f"{rebuild()}개 문서를 색인했습니다.")
+    elif args.command == "search":
+        start = time.perf_counter()
+        results = search(args.query, lecture=args.lecture, week=args.week, limit=args.limit)
+        for result in results:
+            print(f"{result['score']:7.2f}  {result['lecture']} {result['week']} [{result['kind']}]  {result['snippet']}")
+        print(f"{len(results)}건 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
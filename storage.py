@@ -0,0 +1,341 @@
+"""필기, 강의, 사용자 데이터 저장소 (SQLite, WAL 모드).
+
+전체 JSON 파일을 다시 쓰는 대신 (강의, 주차) 단위로 upsert 하므로
+저장 시간이 노트 개수와 무관하고, 여러 Streamlit 세션이 동시에 써도 안전합니다.
+기존 notes.json / courses/courses.json / users/user_data.json 은
+처음 연결할 때 한 번만 옮겨옵니다 (python storage.py migrate 로 직접 실행 가능).
+"""
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+DB_PATH = os.getenv("STUDIO_DB", os.path.join("data", "studio.db"))
+
+# 이전 JSON 저장 위치 (마이그레이션용)
+NOTES_PATH = 'notes.json'
+COURSES_PATH = os.path.join('courses', 'courses.json')
+USERS_PATH = os.path.join('users', 'user_data.json')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    username TEXT NOT NULL DEFAULT '',
+    lecture TEXT NOT NULL,
+    week TEXT NOT NULL,
+    note TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (username, lecture, week)
+);
+CREATE TABLE IF NOT EXISTS courses (
+    name TEXT PRIMARY KEY,
+    schedule TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+def get_conn():
+    """스레드(및 프로세스)별 SQLite 연결을 반환합니다."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), DB_PATH):
+        return conn
+
+    os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    _local.conn = conn
+    _local.key = (os.getpid(), DB_PATH)
+    migrate_from_json(conn)
+    return conn
+
+
+@contextmanager
+def transaction(conn=None):
+    """쓰기 잠금을 잡은 트랜잭션 (BEGIN IMMEDIATE)."""
+    conn = conn or get_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# 데이터 버전 (쓰기마다 1씩 증가, 프로세스 간 캐시 무효화에 사용)
+def notes_version_name(username=''):
+    return f"notes:{username}"
+
+
+def get_version(name):
+    row = get_conn().execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+    return row["version"] if row else 0
+
+
+def _bump_version(conn, name):
+    conn.execute(
+        "INSERT INTO versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+        (name,),
+    )
+    return conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()[0]
+
+
+# 필기 노트
+@metrics.timed("storage", op="load_notes")
+def load_notes(username=''):
+    rows = get_conn().execute(
+        "SELECT lecture, week, note FROM notes WHERE username = ?", (username,)
+    ).fetchall()
+    notes = {}
+    for row in rows:
+        notes.setdefault(row["lecture"], {})[row["week"]] = row["note"]
+    return notes
+
+
+def get_note(lecture, week, username=''):
+    row = get_conn().execute(
+        "SELECT note FROM notes WHERE username = ? AND lecture = ? AND week = ?", (username, lecture, week)
+    ).fetchone()
+    return row["note"] if row else None
+
+
+def _upsert_note(conn, lecture, week, note, username):
+    # 덮어쓰기 전 내용과 새 내용을 같은 트랜잭션에서 수정 기록으로 남김
+    from note_history import record_version
+    row = conn.execute(
+        "SELECT note FROM notes WHERE username = ? AND lecture = ? AND week = ?", (username, lecture, week)
+    ).fetchone()
+    record_version(conn, username, lecture, week, note, row["note"] if row else None)
+    conn.execute(
+        "INSERT INTO notes (username, lecture, week, note, updated_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (username, lecture, week) DO UPDATE SET note = excluded.note, updated_at = excluded.updated_at",
+        (username, lecture, week, note, time.time()),
+    )
+    # 같은 트랜잭션에서 검색 색인도 갱신 (이 필기 하나만)
+    from search_index import KIND_NOTE, index_document
+    index_document(conn, username, lecture, week, KIND_NOTE, '', note)
+
+
+@metrics.timed("storage", op="save_note")
+def save_note(lecture, week, note, username=''):
+    """필기를 저장하고 새 데이터 버전을 반환합니다."""
+    with transaction() as conn:
+        _upsert_note(conn, lecture, week, note, username)
+        return _bump_version(conn, notes_version_name(username))
+
+
+@metrics.timed("storage", op="append_note")
+def append_note(lecture, week, text, username=''):
+    """기존 필기 뒤에 텍스트를 덧붙입니다. 이미 들어 있는 텍스트면 다시 붙이지 않습니다."""
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT note FROM notes WHERE username = ? AND lecture = ? AND week = ?", (username, lecture, week)
+        ).fetchone()
+        current = row["note"] if row else ""
+        if text in current:
+            return
+        _upsert_note(conn, lecture, week, f"{current}\n{text}" if current else text, username)
+        _bump_version(conn, notes_version_name(username))
+
+
+# 강의
+@metrics.timed("storage", op="load_courses")
+def load_courses():
+    rows = get_conn().execute("SELECT name, schedule FROM courses ORDER BY position").fetchall()
+    return {row["name"]: json.loads(row["schedule"]) for row in rows}
+
+
+def get_course(name):
+    row = get_conn().execute("SELECT schedule FROM courses WHERE name = ?", (name,)).fetchone()
+    return json.loads(row["schedule"]) if row else None
+
+
+def _upsert_course(conn, name, schedule):
+    conn.execute(
+        "INSERT INTO courses (name, schedule, position, updated_at) "
+        "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM courses), ?) "
+        "ON CONFLICT (name) DO UPDATE SET schedule = excluded.schedule, updated_at = excluded.updated_at",
+        (name, json.dumps(schedule, ensure_ascii=False), time.time()),
+    )
+
+
+@metrics.timed("storage", op="save_course")
+def save_course(name, schedule):
+    """강의를 저장하고 새 데이터 버전을 반환합니다."""
+    with transaction() as conn:
+        _upsert_course(conn, name, schedule)
+        return _bump_version(conn, 'courses')
+
+
+@metrics.timed("storage", op="add_courses")
+def add_courses(courses):
+    """없는 강의만 한 트랜잭션으로 추가합니다. (새 데이터 버전, 추가한 강의명 목록)을 반환하고, 추가한 것이 없으면 버전은 None."""
+    with transaction() as conn:
+        added = []
+        now = time.time()
+        for name, schedule in courses.items():
+            cur = conn.execute(
+                "INSERT INTO courses (name, schedule, position, updated_at) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM courses), ?) "
+                "ON CONFLICT (name) DO NOTHING",
+                (name, json.dumps(schedule, ensure_ascii=False), now),
+            )
+            if cur.rowcount:
+                added.append(name)
+        if not added:
+            return None, added
+        return _bump_version(conn, 'courses'), added
+
+
+@metrics.timed("storage", op="delete_course")
+def delete_course(name):
+    """강의를 삭제합니다. 삭제했으면 새 데이터 버전, 없던 강의면 None을 반환합니다."""
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM courses WHERE name = ?", (name,))
+        if cur.rowcount == 0:
+            return None
+        return _bump_version(conn, 'courses')
+
+
+@metrics.timed("storage", op="save_courses")
+def save_courses(courses):
+    """강의 전체를 주어진 dict 내용으로 맞춥니다."""
+    with transaction() as conn:
+        existing = {row["name"] for row in conn.execute("SELECT name FROM courses")}
+        for name in existing - set(courses):
+            conn.execute("DELETE FROM courses WHERE name = ?", (name,))
+        for name, schedule in courses.items():
+            _upsert_course(conn, name, schedule)
+        return _bump_version(conn, 'courses')
+
+
+# 사용자
+@metrics.timed("storage", op="load_users")
+def load_users():
+    rows = get_conn().execute("SELECT username, password, created_at FROM users").fetchall()
+    return {row["username"]: {"password": row["password"], "created_at": row["created_at"]} for row in rows}
+
+
+@metrics.timed("storage", op="get_user")
+def get_user(username):
+    row = get_conn().execute(
+        "SELECT password, created_at FROM users WHERE username = ?", (username,)
+    ).fetchone()
+    return {"password": row["password"], "created_at": row["created_at"]} if row else None
+
+
+def _upsert_user(conn, username, record):
+    conn.execute(
+        "INSERT INTO users (username, password, created_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (username) DO UPDATE SET password = excluded.password, created_at = excluded.created_at",
+        (username, record["password"], record.get("created_at")),
+    )
+
+
+@metrics.timed("storage", op="create_user")
+def create_user(username, record):
+    """새 사용자를 추가합니다. 이미 있는 아이디면 None, 추가했으면 새 데이터 버전을 반환합니다.
+
+    확인과 추가가 한 문장(INSERT ... ON CONFLICT DO NOTHING)이므로 동시에 같은 아이디로 가입해도 한 명만 성공합니다.
+    """
+    with transaction() as conn:
+        cur = conn.execute(
+            "INSERT INTO users (username, password, created_at) VALUES (?, ?, ?) ON CONFLICT (username) DO NOTHING",
+            (username, record["password"], record.get("created_at")),
+        )
+        if cur.rowcount == 0:
+            return None
+        return _bump_version(conn, 'users')
+
+
+@metrics.timed("storage", op="save_user")
+def save_user(username, record):
+    with transaction() as conn:
+        _upsert_user(conn, username, record)
+        return _bump_version(conn, 'users')
+
+
+@metrics.timed("storage", op="save_users")
+def save_users(users):
+    with transaction() as conn:
+        for username, record in users.items():
+            _upsert_user(conn, username, record)
+        return _bump_version(conn, 'users')
+
+
+# JSON -> SQLite 마이그레이션
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def migrate_from_json(conn=None, force=False):
+    """기존 JSON 파일의 데이터를 한 번만 옮겨옵니다. 옮긴 항목 수를 반환합니다."""
+    conn = conn or get_conn()
+    with transaction(conn):
+        done = conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done and not force:
+            return 0
+
+        count = 0
+        for lecture, weeks in _read_json(NOTES_PATH).items():
+            for week, note in weeks.items():
+                _upsert_note(conn, lecture, week, note, '')
+                count += 1
+
+        # app.py 의 사용자별 노트 (users/<아이디>/notes.json)
+        for path in glob.glob(os.path.join('users', '*', 'notes.json')):
+            username = os.path.basename(os.path.dirname(path))
+            for lecture, weeks in _read_json(path).items():
+                for week, note in weeks.items():
+                    _upsert_note(conn, lecture, week, note, username)
+                    count += 1
+
+        for name, schedule in _read_json(COURSES_PATH).items():
+            _upsert_course(conn, name, schedule)
+            count += 1
+
+        for username, record in _read_json(USERS_PATH).items():
+            _upsert_user(conn, username, record)
+            count += 1
+
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),)
+        )
+    return count
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        print(f"{migrate_from_json(force=True)}개 항목을 옮겼습니다.")
+    else:
+        print("사용법: python storage.py migrate")
@@ -0,0 +1,321 @@
+"""텍스트 요약 (OpenAI / Hugging Face Zephyr).
+
+같은 입력의 요약은 summary_cache 로 재사용하고, 동시에 들어온 같은 요청은 (스트리밍이어도) 한 번만 호출합니다.
+긴 텍스트는 토큰 수 기준 청크로 나눠 병렬로 요약한 뒤(map) 하나로 합칩니다(reduce).
+청크 경계는 내용으로 정해지므로 필기 일부를 고치면 바뀐 청크만 다시 요약합니다.
+stream_summary / stream_summary_with_zephyr 는 생성되는 토큰을 바로바로 돌려줍니다.
+API 호출은 model_client 를 거쳐서 연결 재사용, 시간 제한, 재시도, 서킷 브레이커가 적용됩니다.
+로컬 스텁 서버로 시험할 때는 OPENAI_API_BASE, HF_API_URL 환경 변수로 주소를 바꿉니다.
+API 키(OPENAI_API_KEY, HF_TOKEN)는 요청할 때 환경 변수에서 읽습니다.
+"""
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import metrics
+import model_client
+import summary_cache
+
+# OpenAI 설정
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")  # gpt-3.5-turbo 또는 gpt-4 선택 가능
+OPENAI_PARAMS = {"temperature": 0.5, "max_tokens": 300}
+SYSTEM_PROMPT = "너는 전문적인 학습 도우미야."
+LECTURE_PROMPT = """이 글은 '{lecture}' 강의의 내용이야 강의 내용을 요약하고 즁요한 부분이나 핵심부분 설명해주는데 줄바꿈이나 오타는 너가 정리해서 부탁할게:\n\n{text}. """
+GENERAL_PROMPT = """다음 글을 핵심 내용만 요약해주는데 줄바꿈이나 오타는 너가 정리해서 부탁할게:\n\n{text}"""
+
+# 긴 텍스트 요약 설정
+CHUNK_PROMPT = """다음은 긴 강의 필기의 일부야. 줄바꿈이나 오타는 너가 정리해서 핵심 내용만 요약해줘:\n\n{text}"""
+LECTURE_REDUCE_PROMPT = """다음은 '{lecture}' 강의 내용을 부분별로 요약한 거야. 하나의 강의 요약으로 정리하고 즁요한 부분이나 핵심부분 설명해줘:\n\n{text}"""
+GENERAL_REDUCE_PROMPT = """다음은 긴 글을 부분별로 요약한 거야. 하나로 합쳐서 핵심 내용만 정리해줘:\n\n{text}"""
+TOKEN_ENCODING = "cl100k_base"
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+MAX_PARALLEL = int(os.getenv("SUMMARY_MAX_PARALLEL", "4"))
+# 평균 몇 줄마다 청크 경계를 둘지 (내용 기반 경계)
+BOUNDARY_DIVISOR = 8
+MAX_REDUCE_LEVELS = 3
+
+# Hugging Face Zephyr 설정
+HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/models/HuggingFaceH4/zephyr-7b-beta")
+ZEPHYR_PROMPT = "다음 글의 핵심을 요약해줘:\\n{text}"
+ZEPHYR_PARAMS = {"max_new_tokens": 300, "temperature": 0.5}
+
+# 스트리밍 요약의 첫 토큰까지 걸린 시간(초) 기록
+TTFT_SAMPLES = 200
+_ttft = {"openai": deque(maxlen=TTFT_SAMPLES), "zephyr": deque(maxlen=TTFT_SAMPLES)}
+
+
+def _build_prompt(text, lecture=None):
+    if lecture:
+        return LECTURE_PROMPT.format(lecture=lecture, text=text)
+    return GENERAL_PROMPT.format(text=text)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken 인코딩. tiktoken 이 없거나 인코딩 파일을 받을 수 없으면(오프라인) None."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        print(f"tiktoken 을 쓸 수 없어 글자 수로 토큰 수를 어림합니다: {e}")
+        return None
+
+
+def count_tokens(text):
+    enc = _encoding()
+    if enc is None:
+        # 한글은 대체로 글자당 1토큰 안팎이므로 글자 수로 어림 (영문은 넉넉하게 잡힘)
+        return len(text)
+    return len(enc.encode(text))
+
+
+def _split_long_line(line, max_tokens):
+    """청크보다 긴 한 줄을 max_tokens 토큰 안팎의 조각으로 나눕니다.
+
+    토큰 경계가 한글처럼 여러 바이트인 글자 중간에 걸리면 그 글자는 통째로 다음 조각으로 넘깁니다.
+    """
+    enc = _encoding()
+    if enc is None:
+        return [line[i:i + max_tokens] for i in range(0, len(line), max_tokens)]
+    tokens = enc.encode(line)
+    # offsets[i]: i번째 토큰이 시작하는 글자 위치 (글자 중간에서 시작하면 그 글자의 위치)
+    _, offsets = enc.decode_with_offsets(tokens)
+    cuts = sorted({0, len(line), *(offsets[i] for i in range(max_tokens, len(tokens), max_tokens))})
+    return [line[start:end] for start, end in zip(cuts, cuts[1:])]
+
+
+def _is_boundary(line):
+    return zlib.crc32(" ".join(line.split()).encode('utf-8')) % BOUNDARY_DIVISOR == 0
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """줄 단위로 max_tokens 이하의 청크를 만듭니다.
+
+    최소 크기(max_tokens의 절반)를 넘은 뒤에는 줄 내용의 해시로 경계를 정하므로,
+    앞부분을 고쳐도 뒤쪽 청크의 경계와 내용은 그대로 유지됩니다.
+    """
+    min_tokens = max_tokens // 2
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current = []
+        current_tokens = 0
+
+    for line in text.splitlines():
+        line_tokens = count_tokens(line)
+        # 한 줄이 청크보다 길면 토큰 단위로 자름
+        pieces = [line] if line_tokens < max_tokens else _split_long_line(line, max_tokens - 1)
+        for piece in pieces:
+            n = (line_tokens if len(pieces) == 1 else count_tokens(piece)) + 1
+            if current and current_tokens + n > max_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += n
+            if current_tokens >= min_tokens and _is_boundary(piece):
+                flush()
+    flush()
+    return chunks
+
+
+def _openai_request(prompt, stream=False):
+    # 키는 .env 를 늦게 읽어도(load_dotenv) 반영되도록 요청할 때마다 환경 변수에서 읽음
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    payload = {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        **OPENAI_PARAMS,
+    }
+    if stream:
+        payload["stream"] = True
+    return f"{OPENAI_API_BASE.rstrip('/')}/chat/completions", payload, headers
+
+
+def _chat(prompt):
+    # 시간 제한, 재시도(429/5xx), 서킷 브레이커는 model_client 가 처리
+    response = model_client.post_json("openai", *_openai_request(prompt))
+    return response["choices"][0]["message"]["content"].strip()
+
+
+def _chat_stream(prompt):
+    for event in model_client.stream_events("openai", *_openai_request(prompt, stream=True)):
+        delta = event["choices"][0].get("delta", {}).get("content")
+        if delta:
+            yield delta
+
+
+def _summarize_chunk(chunk, lecture):
+    # 청크별 결과도 캐시해서 바뀌지 않은 청크는 다시 요약하지 않음
+    key = summary_cache.make_key(
+        chunk, lecture=lecture, model=OPENAI_MODEL, system=SYSTEM_PROMPT, template=CHUNK_PROMPT, params=OPENAI_PARAMS
+    )
+    return summary_cache.get_or_compute(key, lambda: _chat(CHUNK_PROMPT.format(text=chunk)))
+
+
+def _map_chunks(chunks, lecture):
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL, len(chunks)))) as pool:
+        return list(pool.map(lambda chunk: _summarize_chunk(chunk, lecture), chunks))
+
+
+def _final_prompt(text, lecture=None):
+    """짧은 텍스트는 요약 프롬프트를 그대로, 긴 텍스트는 청크 요약(map)을 마친 뒤 합치기(reduce) 프롬프트를 만듭니다."""
+    if count_tokens(text) <= CHUNK_TOKENS:
+        return _build_prompt(text, lecture)
+
+    combined = "\n\n".join(_map_chunks(split_into_chunks(text), lecture))
+    # 부분 요약을 합친 것도 길면 한 단계 더 줄임
+    for _ in range(MAX_REDUCE_LEVELS):
+        if count_tokens(combined) <= CHUNK_TOKENS:
+            break
+        combined = "\n\n".join(_map_chunks(split_into_chunks(combined), lecture))
+
+    if lecture:
+        return LECTURE_REDUCE_PROMPT.format(lecture=lecture, text=combined)
+    return GENERAL_REDUCE_PROMPT.format(text=combined)
+
+
+def _summarize(text, lecture=None):
+    return _chat(_final_prompt(text, lecture))
+
+
+def _call_openai(text, lecture=None):
+    try:
+        return _summarize(text, lecture)
+    except Exception as e:
+        return f"[요약 실패: {str(e)}]"
+
+
+# 텍스트 요약 함수
+@metrics.timed("summarize", model="openai")
+def summarize_text(text, lecture=None):
+    key = _summary_key(text, lecture)
+    return summary_cache.get_or_compute(
+        key,
+        lambda: _call_openai(text, lecture),
+        should_cache=lambda summary: not summary.startswith("[요약 실패"),
+    )
+
+
+def _record_stream(source, tokens):
+    """토큰을 그대로 넘겨주면서 첫 토큰까지 걸린 시간과 전체 시간을 기록합니다."""
+    start = time.perf_counter()
+    first = True
+    for token in tokens:
+        if first:
+            first = False
+            _ttft[source].append(time.perf_counter() - start)
+            metrics.observe("summary_ttft", _ttft[source][-1], model=source)
+        yield token
+    metrics.observe("summarize_stream", time.perf_counter() - start, model=source)
+
+
+def summary_failed(summary):
+    """요약 호출이 (중간에라도) 실패해서 실패 표시가 들어간 결과인지."""
+    return not summary or not summary.strip() or "요약 실패:" in summary
+
+
+def ttft_stats():
+    """모델별 최근 첫 토큰 시간(초) 목록을 반환합니다."""
+    return {source: list(samples) for source, samples in _ttft.items()}
+
+
+def _summary_key(text, lecture=None):
+    return summary_cache.make_key(
+        text,
+        lecture=lecture,
+        model=OPENAI_MODEL,
+        system=SYSTEM_PROMPT,
+        template=LECTURE_PROMPT if lecture else GENERAL_PROMPT,
+        params=OPENAI_PARAMS,
+        chunk_tokens=CHUNK_TOKENS,
+    )
+
+
+def _stream_openai(text, lecture=None, failed=None):
+    try:
+        # 긴 텍스트는 청크 요약까지 끝낸 뒤 마지막 합치기 단계만 스트리밍
+        yield from _chat_stream(_final_prompt(text, lecture))
+    except Exception as e:
+        # 토큰을 보낸 뒤에 끊겨도 화면에는 실패를 이어서 보여주고, 잘린 요약은 캐시하지 않도록 표시
+        if failed is not None:
+            failed.append(e)
+        yield f"[요약 실패: {str(e)}]"
+
+
+def stream_summary(text, lecture=None):
+    """summarize_text 의 스트리밍 버전. 요약 토큰을 생성되는 대로 돌려줍니다."""
+    failed = []
+    return summary_cache.get_or_stream(
+        _summary_key(text, lecture),
+        lambda: _record_stream("openai", _stream_openai(text, lecture, failed)),
+        should_cache=lambda summary: bool(summary.strip()) and not failed,
+    )
+
+
+def _zephyr_request(text, stream=False):
+    token = os.getenv("HF_TOKEN", "")
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    payload = {"inputs": ZEPHYR_PROMPT.format(text=text), "parameters": ZEPHYR_PARAMS}
+    if stream:
+        payload["stream"] = True
+    return HF_API_URL, payload, headers
+
+
+def _call_zephyr(text):
+    try:
+        result = model_client.post_json("zephyr", *_zephyr_request(text))
+    except Exception as e:
+        return f"요약 실패: {e}"
+    if isinstance(result, list) and result and "generated_text" in result[0]:
+        return result[0]["generated_text"]
+    else:
+        return f"요약 실패: 예상치 못한 응답 형식입니다.\\n{result}"
+
+
+@metrics.timed("summarize", model="zephyr")
+def summarize_text_with_zephyr(text):
+    key = _zephyr_key(text)
+    return summary_cache.get_or_compute(
+        key,
+        lambda: _call_zephyr(text),
+        should_cache=lambda summary: not summary.startswith("요약 실패"),
+    )
+
+
+def _zephyr_key(text):
+    return summary_cache.make_key(text, model=HF_API_URL, template=ZEPHYR_PROMPT, params=ZEPHYR_PARAMS)
+
+
+def _stream_zephyr(text, failed=None):
+    try:
+        # text-generation-inference 의 SSE 형식: data: {"token": {"text": ..., "special": ...}}
+        for event in model_client.stream_events("zephyr", *_zephyr_request(text, stream=True)):
+            token = event.get("token") or {}
+            if token.get("text") and not token.get("special"):
+                yield token["text"]
+    except Exception as e:
+        if failed is not None:
+            failed.append(e)
+        yield f"요약 실패: {e}"
+
+
+def stream_summary_with_zephyr(text):
+    """summarize_text_with_zephyr 의 스트리밍 버전."""
+    failed = []
+    return summary_cache.get_or_stream(
+        _zephyr_key(text),
+        lambda: _record_stream("zephyr", _stream_zephyr(text, failed)),
+        should_cache=lambda summary: bool(summary.strip()) and not failed,
+    )
@@ -0,0 +1,231 @@
+"""요약 결과 캐시와 동일 요청 합치기.
+
+키는 정규화한 텍스트, 강의명, 모델, 프롬프트 템플릿, 파라미터의 해시이며
+결과는 SQLite 파일에 TTL/LRU 방식으로 보관합니다.
+같은 키의 요약이 여러 세션(스레드)에서 동시에 요청되면 한 번만 모델을 호출하고
+나머지는 그 결과를 기다려서 함께 받습니다. 스트리밍 요약(get_or_stream)도 마찬가지로
+먼저 시작한 스트림의 토큰을 처음부터 함께 받습니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+
+CACHE_DB_PATH = os.getenv("SUMMARY_CACHE_DB", os.path.join("cache", "summaries.db"))
+# 보관 기간(초)과 최대 항목 수
+CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_last_access ON summaries(last_access);
+"""
+
+_local = threading.local()
+_inflight = {}
+_inflight_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), CACHE_DB_PATH):
+        return conn
+    os.makedirs(os.path.dirname(CACHE_DB_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    _local.conn = conn
+    _local.key = (os.getpid(), CACHE_DB_PATH)
+    return conn
+
+
+def normalize_text(text):
+    """요약 결과에 영향을 주지 않는 차이(유니코드 조합, 공백)를 없앱니다."""
+    text = unicodedata.normalize('NFC', text)
+    return " ".join(text.split())
+
+
+def make_key(text, **parts):
+    """텍스트와 모델/프롬프트/파라미터 등으로 캐시 키를 만듭니다."""
+    h = hashlib.sha256()
+    h.update(normalize_text(text).encode('utf-8'))
+    h.update(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+def get(key):
+    now = time.time()
+    conn = _conn()
+    row = conn.execute(
+        "SELECT summary FROM summaries WHERE key = ? AND created_at >= ?", (key, now - CACHE_TTL)
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (now, key))
+    return row[0]
+
+
+def put(key, summary):
+    now = time.time()
+    conn = _conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO summaries (key, summary, created_at, last_access) VALUES (?, ?, ?, ?)",
+        (key, summary, now, now),
+    )
+    evict()
+
+
+def evict():
+    """만료된 항목과, 최대 개수를 넘는 가장 오래 쓰지 않은 항목을 지웁니다."""
+    conn = _conn()
+    conn.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - CACHE_TTL,))
+    conn.execute(
+        "DELETE FROM summaries WHERE key IN ("
+        "SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+        (CACHE_MAX_ENTRIES,),
+    )
+
+
+def cache_stats():
+    with _inflight_lock:
+        return dict(_stats)
+
+
+def get_or_compute(key, compute, should_cache=lambda value: True):
+    """캐시에 있으면 바로 반환하고, 없으면 한 번만 계산합니다. 동시에 같은 키를 요청하면 결과를 공유합니다."""
+    cached = get(key)
+    if cached is not None:
+        with _inflight_lock:
+            _stats["hits"] += 1
+        return cached
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+            _stats["misses"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not owner:
+        return future.result()
+
+    try:
+        # 캐시를 확인한 사이에 다른 요청이 끝났을 수 있으므로 한 번 더 확인
+        value = get(key)
+        if value is None:
+            value = compute()
+            if should_cache(value):
+                put(key, value)
+        future.set_result(value)
+        return value
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+class _Stream(Future):
+    """스트리밍 중인 계산. 나온 토큰을 모아 두고, 같은 키를 요청한 모두에게 처음부터 흘려 보냅니다."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._changed = threading.Condition()
+
+    def push(self, token):
+        with self._changed:
+            self._parts.append(token)
+            self._changed.notify_all()
+
+    def finish(self, value=None, error=None):
+        if error is None:
+            self.set_result(value)
+        else:
+            self.set_exception(error)
+        with self._changed:
+            self._changed.notify_all()
+
+    def tokens(self):
+        sent = 0
+        while True:
+            with self._changed:
+                while sent == len(self._parts) and not self.done():
+                    self._changed.wait()
+                parts = self._parts[sent:]
+                finished = self.done()
+            sent += len(parts)
+            yield from parts
+            if finished:
+                break
+        # 실패했으면 예외를 올림
+        self.result()
+
+
+def _pump(key, stream, produce, should_cache):
+    try:
+        # 캐시를 확인한 사이에 다른 요청이 끝났을 수 있으므로 한 번 더 확인
+        value = get(key)
+        if value is None:
+            parts = []
+            for token in produce():
+                parts.append(token)
+                stream.push(token)
+            value = "".join(parts)
+            if should_cache(value):
+                put(key, value)
+        else:
+            stream.push(value)
+        stream.finish(value)
+    except BaseException as e:
+        stream.finish(error=e)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def get_or_stream(key, produce, should_cache=lambda value: True):
+    """get_or_compute 의 스트리밍 버전. produce() 가 돌려주는 토큰을 나오는 대로 돌려줍니다.
+
+    같은 키를 계산 중인 요청이 있으면 새로 호출하지 않고 그 토큰을 처음부터 함께 받습니다.
+    스트림은 별도 스레드에서 끝까지 읽으므로 먼저 요청한 쪽이 중간에 그만둬도(Streamlit rerun)
+    기다리던 요청은 끝까지 받고 결과도 캐시에 남습니다.
+    """
+    cached = get(key)
+    if cached is not None:
+        with _inflight_lock:
+            _stats["hits"] += 1
+        yield cached
+        return
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = _Stream()
+            _stats["misses"] += 1
+        else:
+            _stats["coalesced"] += 1
+    if owner:
+        threading.Thread(target=_pump, args=(key, future, produce, should_cache),
+                         name="summary-stream", daemon=True).start()
+
+    if isinstance(future, _Stream):
+        yield from future.tokens()
+    else:
+        # 같은 요약을 스트리밍 없이(get_or_compute) 계산 중이면 끝난 결과를 한 번에 받음
+        yield future.result()
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 최상위 모듈(storage, model_client 등)을 테스트에서 바로 불러옴
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """테스트마다 빈 SQLite DB 와 빈 작업 폴더 (JSON 마이그레이션 대상이 없도록)."""
+    import storage
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "studio.db"))
+    try:
+        import data_access
+        data_access.clear_cache()
+    except ImportError:
+        pass
+    return storage
@@ -0,0 +1,80 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import image_ingest
+import thumbnails
+from preprocess import PREPROCESS_SETTINGS, preprocess_image
+
+
+def _photo(width=2400, height=1800):
+    img = Image.new('RGB', (width, height), (40, 60, 50))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((200, 150, width - 200, height - 150), outline=(230, 230, 220), width=12)
+    for i in range(10):
+        draw.line((300, 300 + i * 120, width - 400, 320 + i * 120), fill=(230, 230, 220), width=6)
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+class _Upload(io.BytesIO):
+    name = "board.jpg"
+
+
+@pytest.fixture
+def upload(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_ingest, "DECODED_DIR", str(tmp_path / "decoded"))
+    return _photo()
+
+
+def test_ocr_image_matches_preprocess_and_is_prepared_once(upload):
+    path = image_ingest.ingest_upload(_Upload(upload), "통계학", "1주차")
+    before = image_ingest.ingest_stats()
+
+    # 업로드 때 저장해 둔 배열을 다시 전처리하지 않고 쓰며, 바이트에서 바로 전처리한 결과와 같음
+    arr = image_ingest.ocr_image(path)
+    after = image_ingest.ingest_stats()
+    assert np.array_equal(arr, preprocess_image(upload))
+    assert after["prepared"] == before["prepared"]
+    assert after["prepared_hits"] == before["prepared_hits"] + 1
+
+
+def test_missing_array_is_rebuilt_from_blob(upload):
+    path = image_ingest.ingest_upload(_Upload(upload), "통계학", "1주차")
+    content_hash = os.path.splitext(os.path.basename(path))[0]
+    image_ingest.evict(0)
+
+    assert np.array_equal(image_ingest.ocr_image(path), preprocess_image(upload))
+    assert os.path.exists(image_ingest.ocr_array_path(content_hash))
+
+
+def test_thumbnails_do_not_depend_on_ocr_edge(upload, monkeypatch):
+    monkeypatch.setitem(PREPROCESS_SETTINGS, "max_long_edge", 512)
+    path = image_ingest.ingest_upload(_Upload(upload), "통계학", "1주차")
+
+    for size, edge in thumbnails.THUMB_SIZES.items():
+        with Image.open(thumbnails.thumbnail_path(path, size)) as thumb:
+            assert max(thumb.size) == edge
+    assert max(image_ingest.ocr_image(path).shape) <= 512
+
+
+def test_upload_keeps_a_running_total_and_evicts_over_cap(upload, monkeypatch):
+    scans = []
+    scan = image_ingest._scan
+    monkeypatch.setattr(image_ingest, "_scan", lambda: scans.append(1) or scan())
+    for i in range(3):
+        image_ingest.ingest_upload(_Upload(_photo(2400, 1800 - i * 100)), "통계학", "1주차")
+    # 처음 한 번만 폴더를 훑어서 시작 값을 정함
+    assert len(scans) == 1
+    assert image_ingest.cache_bytes() == sum(size for _, size, _ in scan())
+
+    # 한도를 넘으면 그때만 정리하고 합계를 실제 크기로 맞춤
+    monkeypatch.setattr(image_ingest, "DECODED_MAX_BYTES", image_ingest.cache_bytes())
+    image_ingest.ingest_upload(_Upload(_photo(2000, 1500)), "통계학", "1주차")
+    assert len(scans) == 2
+    assert image_ingest.cache_bytes() == sum(size for _, size, _ in scan()) <= image_ingest.DECODED_MAX_BYTES
+    assert len(scan()) < 4
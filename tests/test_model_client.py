@@ -0,0 +1,124 @@
+import json
+import os
+import time
+
+import httpx
+import pytest
+
+import model_client
+from model_client import CircuitBreaker
+
+
+def _open(breaker):
+    for _ in range(breaker.failures):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, reset_after=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.enter() is None
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failures=1, reset_after=0.01)
+    _open(breaker)
+    time.sleep(0.02)
+    assert breaker.state == "half-open"
+    assert breaker.enter() == "half-open"
+    assert not breaker.allow()
+
+
+def test_trial_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(failures=3, reset_after=0.01)
+    _open(breaker)
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_release_returns_the_trial_slot():
+    breaker = CircuitBreaker(failures=1, reset_after=0.01)
+    _open(breaker)
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    """MockTransport 로 응답을 흉내 내는 클라이언트와 바로 half-open 이 되는 브레이커."""
+    responses = []
+
+    def handler(request):
+        return responses.pop(0) if responses else httpx.Response(200, json={"ok": True})
+
+    monkeypatch.setattr(model_client, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(model_client, "_client_pid", os.getpid())
+    monkeypatch.setattr(model_client, "_breakers", {})
+    monkeypatch.setattr(model_client, "RETRY_ATTEMPTS", 1)
+    breaker = model_client._breakers["test"] = CircuitBreaker(failures=1, reset_after=0.01)
+    _open(breaker)
+    time.sleep(0.02)
+    return breaker, responses
+
+
+def _sse(*events):
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+
+def test_closed_stream_does_not_leave_breaker_half_open(endpoint):
+    breaker, responses = endpoint
+    responses.append(_sse({"n": 1}, {"n": 2}))
+    events = model_client.stream_events("test", "http://model/stream", {})
+    assert next(events) == {"n": 1}
+    events.close()
+    # 시험 호출 자리가 돌아왔으므로 다음 호출이 다시 시험 호출이 되고, 성공하면 닫힘
+    assert model_client.post_json("test", "http://model/call", {}) == {"ok": True}
+    assert breaker.state == "closed"
+
+
+def test_deadline_during_trial_releases_slot(endpoint):
+    breaker, _ = endpoint
+    with pytest.raises(model_client.DeadlineExceeded):
+        model_client.post_json("test", "http://model/call", {}, deadline=0)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+def test_trial_server_error_reopens(endpoint):
+    breaker, responses = endpoint
+    responses.append(httpx.Response(503, text="busy"))
+    with pytest.raises(model_client.ModelHTTPError):
+        model_client.post_json("test", "http://model/call", {})
+    assert breaker.state == "open"
+    with pytest.raises(model_client.CircuitOpenError):
+        model_client.post_json("test", "http://model/call", {})
+
+
+def test_trial_rate_limit_releases_without_reopening(endpoint):
+    breaker, responses = endpoint
+    responses.append(httpx.Response(429, text="slow down"))
+    with pytest.raises(model_client.ModelHTTPError):
+        model_client.post_json("test", "http://model/call", {})
+    assert breaker.state == "half-open"
+    assert model_client.post_json("test", "http://model/call", {}) == {"ok": True}
+    assert breaker.state == "closed"
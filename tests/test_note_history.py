@@ -0,0 +1,105 @@
+import math
+import random
+
+import pytest
+
+import note_history
+
+INTERVAL = 8
+
+
+@pytest.fixture
+def history(db, monkeypatch):
+    monkeypatch.setattr(note_history, "SNAPSHOT_INTERVAL", INTERVAL)
+    monkeypatch.setattr(note_history, "KEEP", 1000)
+    return db
+
+
+def _edits(count, seed=0):
+    """몇 줄씩 고치고 더하고 지운 필기 내용을 차례로 돌려줌 (매번 내용이 바뀜)."""
+    rng = random.Random(seed)
+    lines = [f"- {i}번째 줄: 강의 내용 정리\n" for i in range(40)]
+    for n in range(count):
+        i = rng.randrange(len(lines))
+        op = n % 3
+        if op == 0:
+            lines[i] = f"- 수정한 필기 {n}: 예시와 함께 다시 정리\n"
+        elif op == 1:
+            lines.insert(i, f"- 추가한 필기 {n}: 새로 들은 설명\n")
+        else:
+            del lines[i]
+        yield ''.join(lines)
+
+
+def _rows(storage):
+    rows = note_history.get_conn().execute(
+        "SELECT version, base FROM note_versions WHERE username = '' AND lecture = ? AND week = ? ORDER BY version",
+        ("통계학", "1주차"),
+    ).fetchall()
+    return {row["version"]: row["base"] for row in rows}
+
+
+def test_every_version_round_trips_across_snapshot_intervals(history):
+    texts = {}
+    for version, text in enumerate(_edits(3 * INTERVAL + 5), start=1):
+        history.save_note("통계학", "1주차", text)
+        texts[version] = text
+
+    bases = _rows(history)
+    assert sorted(bases) == sorted(texts)
+    # 구간마다 첫 버전이 스냅샷이고, 나머지는 스냅샷에서 log2(INTERVAL) 단계 안에 닿음
+    assert [v for v, base in bases.items() if base is None] == [1, 9, 17, 25]
+    for version in bases:
+        depth = 0
+        while bases[version] is not None:
+            assert bases[version] < version
+            version = bases[version]
+            depth += 1
+        assert depth <= math.log2(INTERVAL)
+    for version, text in texts.items():
+        assert note_history.get_text("통계학", "1주차", version) == text
+
+
+def test_rewritten_note_is_stored_as_snapshot(history):
+    edits = _edits(3)
+    history.save_note("통계학", "1주차", next(edits))
+    history.save_note("통계학", "1주차", next(edits))
+    rewritten = ''.join(f"- 완전히 새로 쓴 필기 {i}\n" for i in range(40))
+    history.save_note("통계학", "1주차", rewritten)
+    edited = rewritten.replace("새로 쓴 필기 7\n", "새로 쓴 필기 7 (보충)\n")
+    history.save_note("통계학", "1주차", edited)
+
+    bases = _rows(history)
+    # 델타가 전체보다 커서 스냅샷으로 남기고, 다음 버전은 그 스냅샷을 기준으로 함
+    assert bases == {1: None, 2: 1, 3: None, 4: 3}
+    assert note_history.get_text("통계학", "1주차", 3) == rewritten
+    assert note_history.get_text("통계학", "1주차", 4) == edited
+
+
+def test_pruned_history_reconstructs_every_kept_version(history, monkeypatch):
+    keep = 10
+    monkeypatch.setattr(note_history, "KEEP", keep)
+    texts = {}
+    for version, text in enumerate(_edits(5 * INTERVAL), start=1):
+        history.save_note("통계학", "1주차", text)
+        texts[version] = text
+    latest = max(texts)
+
+    kept = [row["version"] for row in note_history.versions("통계학", "1주차")]
+    # 최근 keep 개는 반드시 남고, 그보다 오래된 것은 그 기준 스냅샷 구간까지만 남음
+    assert set(range(latest - keep + 1, latest + 1)) <= set(kept)
+    assert len(kept) <= keep + INTERVAL
+    assert min(kept) < latest - keep + 1
+    for version in range(1, latest + 1):
+        if version in kept:
+            assert note_history.get_text("통계학", "1주차", version) == texts[version]
+        else:
+            with pytest.raises(KeyError):
+                note_history.get_text("통계학", "1주차", version)
+
+    # 보관 개수를 줄여 다시 적용해도 남은 버전은 모두 복원됨
+    assert note_history.prune_all(keep=3) > 0
+    kept = [row["version"] for row in note_history.versions("통계학", "1주차")]
+    assert set(range(latest - 2, latest + 1)) <= set(kept)
+    for version in kept:
+        assert note_history.get_text("통계학", "1주차", version) == texts[version]
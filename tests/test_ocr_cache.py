@@ -0,0 +1,46 @@
+import pytest
+
+import ocr_cache
+
+RESULT = [[[[[0, 0], [10, 0], [10, 10], [0, 10]], ["표본분포", 0.98]]]]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, "CACHE_DIR", str(tmp_path / "ocr"))
+    scans = []
+    scan = ocr_cache._scan
+    monkeypatch.setattr(ocr_cache, "_scan", lambda: scans.append(1) or scan())
+    return scans
+
+
+def _disk_bytes():
+    return sum(size for _, size, _ in ocr_cache._scan())
+
+
+def test_put_keeps_a_running_total_without_walking(cache_dir):
+    scans = cache_dir
+    for i in range(5):
+        ocr_cache.put(f"{i:064x}", RESULT)
+    # 처음 한 번만 폴더를 훑어서 시작 값을 정함
+    assert len(scans) == 1
+    assert ocr_cache.cache_bytes() == _disk_bytes()
+
+    # 같은 키를 다시 저장해도 두 번 세지 않음
+    ocr_cache.put(f"{0:064x}", RESULT)
+    assert ocr_cache.cache_bytes() == _disk_bytes()
+
+
+def test_evicts_only_when_total_crosses_cap(cache_dir, monkeypatch):
+    scans = cache_dir
+    ocr_cache.put("a" * 64, RESULT)
+    entry = ocr_cache.cache_bytes()
+    monkeypatch.setattr(ocr_cache, "CACHE_MAX_BYTES", entry * 3)
+    ocr_cache.put("b" * 64, RESULT)
+    ocr_cache.put("c" * 64, RESULT)
+    walks = len(scans)
+    ocr_cache.put("d" * 64, RESULT)
+    assert len(scans) == walks + 1
+    # 가장 오래 쓰지 않은 항목부터 지워짐
+    assert ocr_cache.get("a" * 64) is None
+    assert ocr_cache.cache_bytes() == _disk_bytes() <= entry * 3
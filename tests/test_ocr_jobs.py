@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+import incremental_ocr
+import ocr_jobs
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_jobs, "JOBS_DB_PATH", str(tmp_path / "ocr_jobs.db"))
+    # 없는 사진 경로로 이전 사진을 찾지 않도록
+    monkeypatch.setattr(incremental_ocr, "INCREMENTAL", False)
+    return ocr_jobs.get_conn()
+
+
+def _enqueue(conn, paths):
+    return ocr_jobs.enqueue_job("통계학2", "3주차", paths, conn=conn)
+
+
+def test_poller_reuses_one_connection_per_thread(queue):
+    assert ocr_jobs.get_conn() is queue
+    job_id = _enqueue(queue, ["a.jpg"])
+    assert ocr_jobs.get_job(job_id)["status"] == "queued"
+    assert ocr_jobs.latest_job("통계학2", "3주차")["id"] == job_id
+
+
+def test_dead_worker_images_are_requeued_without_waiting(queue):
+    job_id = _enqueue(queue, ["a.jpg", "b.jpg"])
+    ocr_jobs.heartbeat(queue, "alive")
+    ocr_jobs.heartbeat(queue, "dead")
+    assert ocr_jobs._claim_image(queue, "alive")["seq"] == 0
+    assert ocr_jobs._claim_image(queue, "dead")["seq"] == 1
+    queue.execute("UPDATE workers SET heartbeat_at = ? WHERE name = 'dead'", (time.time() - 60,))
+
+    assert ocr_jobs.requeue_stale(queue, stale_seconds=300, heartbeat_timeout=20) == 1
+    statuses = [image["status"] for image in ocr_jobs.get_job(job_id)["images"]]
+    assert statuses == ["running", "queued"]
+
+
+def test_live_worker_image_is_requeued_after_hard_limit(queue):
+    _enqueue(queue, ["a.jpg"])
+    ocr_jobs.heartbeat(queue, "stuck")
+    ocr_jobs._claim_image(queue, "stuck")
+    queue.execute("UPDATE job_images SET claimed_at = ?", (time.time() - 600,))
+    assert ocr_jobs.requeue_stale(queue, stale_seconds=300, heartbeat_timeout=20) == 1
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+import pytest
+
+import schedule
+from schedule import Week
+
+
+def _weeks(count=15):
+    return schedule.build("2025-03-03", count)
+
+
+def test_build_makes_weekly_numbered_weeks():
+    weeks = _weeks(16)
+    assert [week.number for week in weeks] == list(range(1, 17))
+    assert weeks[0].date == date(2025, 3, 3) and weeks[-1].date == date(2025, 6, 16)
+    assert all(week.type == "regular" for week in weeks)
+    assert weeks[9].display_name == "10주차(05월 05일)"
+    with pytest.raises(ValueError):
+        schedule.build("2025-03-03", 0)
+
+
+def test_stored_dict_round_trips_in_number_order():
+    weeks = schedule.mark(_weeks(12), 8, 8, "midterm")
+    stored = schedule.to_schedule(weeks)
+    assert stored["8주차"] == {"date": "2025-04-21", "display_name": "8주차(04월 21일) - 중간고사", "type": "midterm"}
+
+    # dict 순서나 문자열 정렬과 상관없이 10주차가 9주차 뒤에 옴
+    shuffled = dict(sorted(stored.items()))
+    assert schedule.parse(shuffled) == weeks
+    # 유형이 없는 예전 데이터는 일반 수업
+    old = {"2주차": {"date": "2025-03-10", "display_name": "2주차(03월 10일)"}}
+    assert schedule.parse(old) == (Week(2, date(2025, 3, 10)),)
+
+
+def test_update_week_changes_only_that_week():
+    weeks = _weeks()
+    updated = schedule.update_week(weeks, 3, "2025-03-20", "holiday")
+    assert updated[2] == Week(3, date(2025, 3, 20), "holiday")
+    assert updated[:2] == weeks[:2] and updated[3:] == weeks[3:]
+    # 날짜만 바꾸면 유형은 그대로
+    assert schedule.update_week(updated, 3, "2025-03-17")[2] == Week(3, date(2025, 3, 17), "holiday")
+    with pytest.raises(KeyError):
+        schedule.update_week(weeks, 16, "2025-07-01")
+    with pytest.raises(ValueError):
+        schedule.update_week(weeks, 3, week_type="exam")
+
+
+def test_shift_moves_dates_from_first_week_on():
+    weeks = _weeks()
+    shifted = schedule.shift(weeks, 7, first=5)
+    assert shifted[:4] == weeks[:4]
+    assert [week.date for week in shifted[4:]] == [week.date + timedelta(days=7) for week in weeks[4:]]
+    assert schedule.shift(shifted, -7, first=5) == weeks
+
+
+def test_mark_sets_type_on_inclusive_range():
+    marked = schedule.mark(_weeks(), 14, 15, "final")
+    assert [week.number for week in marked if week.type == "final"] == [14, 15]
+    assert all(week.type == "regular" for week in marked[:13])
+    assert [week.date for week in marked] == [week.date for week in _weeks()]
+    with pytest.raises(ValueError):
+        schedule.mark(_weeks(), 1, 2, "exam")
+
+
+def test_resize_trims_or_continues_from_last_week():
+    weeks = schedule.mark(schedule.shift(_weeks(), 3, first=10), 8, 8, "midterm")
+    assert schedule.resize(weeks, 9) == weeks[:9]
+    grown = schedule.resize(weeks, 17)
+    assert grown[:15] == weeks
+    # 늘어난 주차는 (옮겨진) 마지막 주차 날짜에서 매주 이어짐
+    assert weeks[-1].date == date(2025, 6, 12)
+    assert grown[15:] == (Week(16, date(2025, 6, 19)), Week(17, date(2025, 6, 26)))
+    with pytest.raises(ValueError):
+        schedule.resize(weeks, 0)
+
+
+def test_parse_csv_skips_header_and_blank_rows():
+    courses = schedule.parse_csv([
+        "강의명,첫 수업 날짜,주차 수",
+        "통계학,2025-03-03,16",
+        "",
+        "회귀분석,2025-03-05,",
+    ])
+    assert list(courses) == ["통계학", "회귀분석"]
+    assert len(courses["통계학"]) == 16
+    assert len(courses["회귀분석"]) == schedule.TERM_WEEKS
+    assert courses["회귀분석"]["1주차"]["date"] == "2025-03-05"
+    with pytest.raises(ValueError, match="2번째 줄"):
+        schedule.parse_csv(["통계학,2025-03-03", "회귀분석,3월 5일"])
+
+
+def test_view_options_and_reverse_maps():
+    view = schedule.view(schedule.to_schedule(schedule.mark(_weeks(12), 8, 8, "midterm")))
+    assert view.names == tuple(f"{i}주차" for i in range(1, 13))
+    assert view.options[7] == "8주차(04월 21일) - 중간고사"
+    assert all(view.by_display[option] == name for option, name in zip(view.options, view.names))
+    assert view.by_name["8주차"].type == "midterm"
+
+
+def test_cached_selectors_follow_bulk_edits(db):
+    import data_access
+
+    assert data_access.create_course_with_schedule("통계학", "2025-03-03", 12)
+    assert data_access.import_courses({
+        "통계학": schedule.to_schedule(_weeks(3)),
+        "회귀분석": schedule.to_schedule(_weeks(15)),
+    }) == ["회귀분석"]
+    assert data_access.course_names() == ("통계학", "회귀분석")
+    before = data_access.course_schedule("통계학")
+    assert len(before.weeks) == 12
+
+    assert data_access.shift_course_dates("통계학", 7, first_week=6)
+    assert data_access.mark_weeks("통계학", 8, 8, "midterm")
+    assert data_access.resize_course("통계학", 14)
+    assert data_access.update_week_info("통계학", "2주차", week_type="holiday")
+    assert not data_access.mark_weeks("통계학", 1, 2, "exam")
+    assert not data_access.update_week_info("없는 강의", "1주차", "2025-03-03")
+
+    # 버전별로 캐시된 선택 목록이 저장된 dict 에서 예전 방식으로 만든 목록과 같음
+    view = data_access.course_schedule("통계학")
+    stored = data_access.load_courses()["통계학"]
+    legacy_options = [stored[w]["display_name"] for w in sorted(stored, key=lambda x: int(x.split('주차')[0]))]
+    assert list(view.options) == legacy_options
+    assert view.by_display == {stored[w]["display_name"]: w for w in stored}
+    assert view.names[-1] == "14주차" and view.by_name["8주차"].type == "midterm"
+    assert view.by_name["6주차"].date == before.by_name["7주차"].date
+    assert view.by_name["2주차"].type == "holiday"
+    assert data_access.course_schedule("없는 강의") is None
@@ -0,0 +1,103 @@
+import unicodedata
+
+import pytest
+
+import search_index
+
+
+@pytest.fixture
+def index(db):
+    return db
+
+
+def _found(results):
+    return [(r["lecture"], r["week"], r["kind"], r["ref"]) for r in results]
+
+
+def test_tokenize_splits_hangul_into_bigrams_and_other_text_into_words():
+    assert search_index.tokenize("회귀분석") == ["회귀", "귀분", "분석"]
+    # 띄어쓰기가 달라도 같은 2-gram 이 나옴 (조사가 붙어도 앞부분이 일치)
+    assert set(search_index.tokenize("회귀 분석")) <= set(search_index.tokenize("회귀분석을"))
+    assert search_index.tokenize("값 t-Test ANOVA2") == ["값", "t", "test", "anova2"]
+    assert search_index.tokenize("統計學") == ["統計", "計學"]
+    # 자모가 나뉜(NFD) 입력도 같은 토큰
+    assert search_index.tokenize(unicodedata.normalize('NFD', "분산")) == ["분산"]
+    assert search_index.tokenize("  ...  ") == []
+
+
+def test_notes_are_indexed_with_the_note_write(index):
+    index.save_note("통계학", "1주차", "표본분포와 중심극한정리")
+    assert _found(search_index.search("중심극한")) == [("통계학", "1주차", "note", "")]
+
+    # 고친 필기는 이전 내용으로 찾을 수 없음
+    index.save_note("통계학", "1주차", "회귀분석의 가정")
+    assert search_index.search("중심극한") == []
+    assert _found(search_index.search("회귀")) == [("통계학", "1주차", "note", "")]
+
+    # 비운 필기는 색인에서 빠지고 문서 수, 길이 합계도 함께 줄어듦
+    index.save_note("통계학", "1주차", "")
+    assert search_index.search("회귀") == []
+    assert search_index._stats(search_index.get_conn()) == (0, 0)
+
+
+def test_bm25_prefers_frequent_terms_rare_terms_and_short_documents(index):
+    filler = " ".join(f"word{i}" for i in range(30))
+    index.save_note("통계학", "1주차", "분산 분산 분산 평균")
+    index.save_note("통계학", "2주차", f"분산 평균 {filler}")
+    index.save_note("통계학", "3주차", "분산 평균")
+    index.save_note("통계학", "4주차", "왜도 정리")
+
+    # 같은 길이면 더 많이 나온 문서가, 같은 빈도면 짧은 문서가 위
+    scores = {r["week"]: r["score"] for r in search_index.search("분산")}
+    assert list(scores) == ["1주차", "3주차", "2주차"]
+    assert scores["1주차"] > scores["3주차"] > scores["2주차"] > 0
+    # 길이가 같고 한 번씩 나오면, 여러 문서에 있는 "평균" 보다 한 문서에만 있는 "왜도" 가 점수가 높음
+    scores = {r["week"]: r["score"] for r in search_index.search("평균 왜도")}
+    assert scores["4주차"] > scores["3주차"]
+
+
+def test_search_filters_and_ocr_documents(index):
+    index.save_note("통계학", "1주차", "가설검정 정리")
+    index.save_note("통계학", "1주차", "가설검정 (다른 사용자)", username="kim")
+    search_index.index_ocr("통계학", "2주차", "images/blobs/ab/1.jpg", "칠판: 가설검정 절차")
+    search_index.index_ocr("회귀분석", "1주차", "images/blobs/cd/2.jpg", "가설검정과 회귀계수")
+
+    assert len(search_index.search("가설검정")) == 3
+    assert _found(search_index.search("가설검정", kind="ocr", lecture="통계학")) == [
+        ("통계학", "2주차", "ocr", "images/blobs/ab/1.jpg")]
+    assert _found(search_index.search("가설검정", username="kim")) == [("통계학", "1주차", "note", "")]
+    assert len(search_index.search("가설검정", limit=1)) == 1
+
+    # 다시 만들어도 필기는 notes 에서, OCR 은 저장된 내용에서 그대로 색인됨
+    before = sorted(_found(search_index.search("가설검정")))
+    assert search_index.rebuild() == 4
+    assert sorted(_found(search_index.search("가설검정"))) == before
+
+
+def test_summaries_are_indexed_as_their_own_kind(index):
+    from summarizer import summary_failed
+
+    index.save_note("통계학", "3주차", "분산분석 필기")
+    search_index.index_summary("통계학", "3주차", "note", "요약: 분산분석은 집단 평균 비교")
+    search_index.index_summary("통계학", "3주차", "ocr", "칠판 요약: 분산분석 표")
+    assert sorted(_found(search_index.search("분산분석", kind="summary"))) == [
+        ("통계학", "3주차", "summary", "note"), ("통계학", "3주차", "summary", "ocr")]
+    assert search_index.KIND_LABELS["summary"] == "요약"
+
+    # 같은 대상을 다시 요약하면 이전 요약을 바꾸고, 다시 만들어도 남음
+    search_index.index_summary("통계학", "3주차", "note", "요약: 회귀계수 해석")
+    assert _found(search_index.search("집단", kind="summary")) == []
+    assert search_index.rebuild() == 3
+    assert _found(search_index.search("회귀계수")) == [("통계학", "3주차", "summary", "note")]
+
+    # 실패 표시가 들어간 요약은 앱에서 색인하지 않음
+    assert summary_failed("앞부분 요약\n\n[요약 실패: ReadTimeout]")
+    assert summary_failed("") and not summary_failed("요약: 회귀계수 해석")
+
+
+def test_snippet_highlights_matches_near_the_densest_part():
+    text = "서론 " * 40 + "신뢰구간은 표본평균 ± 오차한계" + " 결론" * 40
+    result = search_index.snippet(text, "신뢰구간", width=30)
+    assert "**신뢰구간**" in result
+    assert result.startswith("…") and result.endswith("…")
+    assert search_index.snippet("짧은 필기\n둘째 줄", "없는말") == "짧은 필기 둘째 줄"
@@ -0,0 +1,93 @@
+import pytest
+import tiktoken
+
+import summarizer
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    """tiktoken.get_encoding 을 바꿔 끼우고 summarizer 의 인코딩 캐시를 비웁니다."""
+    def use(get_encoding):
+        monkeypatch.setattr(tiktoken, "get_encoding", get_encoding)
+        summarizer._encoding.cache_clear()
+    yield use
+    summarizer._encoding.cache_clear()
+
+
+def _offline(name):
+    raise ConnectionError("openaipublic.blob.core.windows.net 에 연결할 수 없음")
+
+
+def _byte_level(name):
+    # 바이트마다 토큰 하나: 한글 한 글자(3바이트)가 토큰 세 개에 걸침
+    return tiktoken.Encoding("bytes", pat_str=r".+", mergeable_ranks={bytes([i]): i for i in range(256)},
+                             special_tokens={})
+
+
+LINES = [f"{i}번째 줄: 표본분포와 중심극한정리, 신뢰구간의 해석" for i in range(200)]
+
+
+def test_offline_estimates_tokens_from_characters(encoding):
+    encoding(_offline)
+    assert summarizer.count_tokens("표본분포 abc") == 8
+    assert summarizer._final_prompt("짧은 필기") == summarizer._build_prompt("짧은 필기")
+
+
+def test_offline_chunks_keep_every_line(encoding):
+    encoding(_offline)
+    text = "\n".join(LINES)
+    chunks = summarizer.split_into_chunks(text, max_tokens=300)
+    assert len(chunks) > 1
+    assert "\n".join(chunks) == text
+    assert all(len(chunk) <= 300 for chunk in chunks)
+
+
+@pytest.mark.parametrize("get_encoding", [_offline, _byte_level])
+def test_long_line_splits_on_whole_characters(encoding, get_encoding):
+    encoding(get_encoding)
+    line = "".join(LINES)
+    chunks = summarizer.split_into_chunks(line, max_tokens=100)
+    assert "".join(chunks) == line
+    assert not any("�" in chunk for chunk in chunks)
+    assert all(summarizer.count_tokens(chunk) <= 101 for chunk in chunks)
+
+
+@pytest.fixture
+def summary_db(tmp_path, monkeypatch):
+    import summary_cache
+
+    monkeypatch.setattr(summary_cache, "CACHE_DB_PATH", str(tmp_path / "summaries.db"))
+    return summary_cache
+
+
+def _cut_off(*args, **kwargs):
+    import httpx
+
+    yield "부분 요약"
+    raise httpx.ReadTimeout("timeout")
+
+
+def test_stream_cut_off_midway_is_not_cached(summary_db, encoding, monkeypatch):
+    encoding(_offline)
+    monkeypatch.setattr(summarizer, "_chat_stream", _cut_off)
+    tokens = list(summarizer.stream_summary("중간에 끊기는 필기"))
+    assert tokens == ["부분 요약", "[요약 실패: timeout]"]
+    assert summary_db.get(summarizer._summary_key("중간에 끊기는 필기")) is None
+
+    def events(*args, **kwargs):
+        for token in _cut_off():
+            yield {"token": {"text": token, "special": False}}
+
+    monkeypatch.setattr(summarizer.model_client, "stream_events", events)
+    assert list(summarizer.stream_summary_with_zephyr("중간에 끊기는 필기")) == ["부분 요약", "요약 실패: timeout"]
+    assert summary_db.get(summarizer._zephyr_key("중간에 끊기는 필기")) is None
+
+
+def test_api_keys_are_read_when_requesting(monkeypatch):
+    # app_ver_2.py 처럼 summarizer 를 불러온 뒤에 .env 를 읽어도 키가 쓰임
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert summarizer._openai_request("x")[2] == {}
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-late")
+    monkeypatch.setenv("HF_TOKEN", "hf-late")
+    assert summarizer._openai_request("x")[2] == {"Authorization": "Bearer sk-late"}
+    assert summarizer._zephyr_request("x")[2] == {"Authorization": "Bearer hf-late"}
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import summary_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(summary_cache, "CACHE_DB_PATH", str(tmp_path / "summaries.db"))
+
+
+def _slow_tokens(calls, release):
+    def produce():
+        calls.append(1)
+        release.wait(5)
+        for token in ["표본", "분포와 ", "중심극한정리"]:
+            time.sleep(0.01)
+            yield token
+    return produce
+
+
+def test_concurrent_streams_share_one_upstream_call():
+    calls, release = [], threading.Event()
+    produce = _slow_tokens(calls, release)
+    key = summary_cache.make_key("같은 필기")
+
+    def consume():
+        return list(summary_cache.get_or_stream(key, produce))
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(consume) for _ in range(8)]
+        time.sleep(0.1)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(tokens == ["표본", "분포와 ", "중심극한정리"] for tokens in results)
+    # 끝난 뒤에는 캐시에서 한 번에
+    assert list(summary_cache.get_or_stream(key, produce)) == ["표본분포와 중심극한정리"]
+    assert len(calls) == 1
+
+
+def test_abandoned_stream_still_finishes_for_followers_and_cache():
+    calls, release = [], threading.Event()
+    produce = _slow_tokens(calls, release)
+    key = summary_cache.make_key("중간에 닫힘")
+
+    leader = summary_cache.get_or_stream(key, produce)
+    release.set()
+    assert next(leader) == "표본"
+    follower = summary_cache.get_or_stream(key, produce)
+    leader.close()
+    assert "".join(follower) == "표본분포와 중심극한정리"
+    assert summary_cache.get(key) == "표본분포와 중심극한정리"
+    assert len(calls) == 1
+
+
+def test_stream_follows_a_plain_computation():
+    started, release = threading.Event(), threading.Event()
+    key = summary_cache.make_key("비스트리밍")
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return "요약"
+
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(summary_cache.get_or_compute, key, compute)
+        started.wait(5)
+        stream = summary_cache.get_or_stream(key, lambda: iter(["다른 호출"]))
+        release.set()
+        assert list(stream) == ["요약"]
+        assert future.result() == "요약"
+
+
+def test_failed_stream_is_not_cached():
+    key = summary_cache.make_key("실패")
+    tokens = list(summary_cache.get_or_stream(
+        key, lambda: iter(["[요약 실패: 연결 오류]"]), should_cache=lambda s: not s.startswith("[요약 실패")))
+    assert tokens == ["[요약 실패: 연결 오류]"]
+    assert summary_cache.get(key) is None
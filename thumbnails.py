@@ -0,0 +1,86 @@
+"""이미지 썸네일 생성과 디스크 캐시.
+
+업로드할 때 원본 옆 thumbs/ 폴더에 크기별 WebP 썸네일을 한 번 만들어 두고,
+갤러리는 썸네일을 기본으로 보여준 뒤 요청할 때만 원본을 불러옵니다.
+썸네일이 없는 기존 이미지는 처음 볼 때 만들어지며, 한 번에 만들려면:
+    python thumbnails.py backfill
+"""
+import io
+import os
+import sys
+
+import metrics
+
+# 썸네일 크기 (긴 변 기준 픽셀)
+THUMB_SIZES = {"small": 256, "medium": 768}
+THUMB_DIR_NAME = 'thumbs'
+WEBP_QUALITY = 80
+
+
+def thumbnail_path(path, size='medium'):
+    folder, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, THUMB_DIR_NAME, f"{stem}_{THUMB_SIZES[size]}.webp")
+
+
+@metrics.timed("image_thumbnails")
+def make_thumbnails(path, data=None):
+    """모든 크기의 썸네일을 만들고 {크기: 경로}를 반환합니다. 원본은 한 번만 디코딩합니다."""
+    from PIL import Image, ImageOps
+
+    from preprocess import draft_size
+
+    img = Image.open(io.BytesIO(data) if data is not None else path)
+    # JPEG는 가장 큰 썸네일 크기에 맞춰 축소 디코딩
+    largest = max(THUMB_SIZES.values())
+    img.draft('RGB', draft_size(img.size, largest))
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+
+    paths = {}
+    # 큰 크기부터 만들어서 다음 크기는 이미 줄인 이미지에서 다시 줄임
+    for size, edge in sorted(THUMB_SIZES.items(), key=lambda item: -item[1]):
+        img.thumbnail((edge, edge), Image.LANCZOS)
+        out_path = thumbnail_path(path, size)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        img.save(tmp_path, format='WEBP', quality=WEBP_QUALITY)
+        os.replace(tmp_path, out_path)
+        paths[size] = out_path
+    return paths
+
+
+def get_thumbnail(path, size='medium'):
+    """썸네일 경로를 반환합니다. 없거나 원본보다 오래되었으면 새로 만듭니다."""
+    out_path = thumbnail_path(path, size)
+    try:
+        if os.path.getmtime(out_path) >= os.path.getmtime(path):
+            return out_path
+    except OSError:
+        pass
+    try:
+        return make_thumbnails(path)[size]
+    except Exception as e:
+        # 썸네일을 만들 수 없는 파일은 원본을 그대로 사용
+        print(f"Error creating thumbnail: {e}")
+        return path
+
+
+def backfill():
+    """카탈로그에 있는 이미지 중 썸네일이 없는 것을 모두 만듭니다."""
+    import image_catalog
+
+    count = 0
+    for (path,) in image_catalog.get_conn().execute("SELECT path FROM images"):
+        if os.path.exists(path) and not all(os.path.exists(thumbnail_path(path, s)) for s in THUMB_SIZES):
+            get_thumbnail(path)
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        print(f"{backfill()}개 이미지의 썸네일을 만들었습니다.")
+    else:
+        print("사용법: python thumbnails.py backfill")